@@ -7,6 +7,7 @@ from models import User
 from auth import get_current_user
 from settings import get_settings_manager
 from database import get_db_session
+from hash_benchmarks import get_benchmark_registry
 from sqlalchemy.orm import Session
 
 # Create router
@@ -115,17 +116,53 @@ def get_system_info() -> Dict:
             "uptime": "N/A"
         }
 
+def format_speed(hashes_per_second: Optional[float]) -> str:
+    """Format a hash rate the way hashcat prints it."""
+    if hashes_per_second is None:
+        return "N/A"
+    value = float(hashes_per_second)
+    for unit in ("H/s", "kH/s", "MH/s", "GH/s", "TH/s"):
+        if value < 1000:
+            break
+        value /= 1000
+    return f"{value:.1f} {unit}"
+
+def get_benchmarks() -> Dict:
+    """Get this host's hash mode benchmarks, formatted for display."""
+    registry = get_benchmark_registry()
+    listing = registry.list()
+    rows = []
+    for entry in listing["results"].get(registry.host, []):
+        rows.append({
+            **entry,
+            "speed_display": format_speed(entry.get("speed")),
+            "devices_display": ", ".join(
+                f"#{device_id} {device.get('name') or ''} {format_speed(device.get('speed'))}".replace("  ", " ")
+                for device_id, device in sorted(entry.get("devices", {}).items())
+            )
+        })
+    rows.sort(key=lambda row: int(row["mode"]) if row["mode"].isdigit() else 0)
+    return {
+        "host": registry.host,
+        "results": rows,
+        "pending": listing["pending"],
+        "running": listing["running"]
+    }
+
 def get_hash_modes() -> List[tuple]:
     """Get list of hashcat hash modes."""
-    # This will be implemented with actual hash mode data
-    # For now, return some common ones
-    return [
-        ("0", "MD5"),
-        ("100", "SHA1"),
-        ("1000", "NTLM"),
-        ("1800", "SHA512crypt"),
-        ("3200", "bcrypt")
-    ]
+    # Common modes, plus any that have been benchmarked, named as hashcat names them
+    modes = {
+        "0": "MD5",
+        "100": "SHA1",
+        "1000": "NTLM",
+        "1800": "SHA512crypt",
+        "3200": "bcrypt"
+    }
+    for entry in get_benchmarks()["results"]:
+        if entry.get("name"):
+            modes[entry["mode"]] = entry["name"]
+    return sorted(modes.items(), key=lambda mode: int(mode[0]) if mode[0].isdigit() else 0)
 
 # --- Route handlers ---
 
@@ -143,6 +180,7 @@ async def admin_dashboard(
     job_stats = get_job_stats(db)
     recent_jobs = get_recent_jobs(db)
     system_info = get_system_info()
+    benchmarks = get_benchmarks()
     
     return templates.TemplateResponse("admin_dashboard.html", {
         "request": request,
@@ -150,7 +188,8 @@ async def admin_dashboard(
         "user_stats": user_stats,
         "job_stats": job_stats,
         "recent_jobs": recent_jobs,
-        "system_info": system_info
+        "system_info": system_info,
+        "benchmarks": benchmarks
     })
 
 @router.get("/users", response_class=HTMLResponse)
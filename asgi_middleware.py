@@ -0,0 +1,294 @@
+import re
+import time
+import gzip
+import ipaddress
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from metrics import HTTP_IN_PROGRESS, HTTP_REQUESTS, HTTP_REQUEST_SECONDS
+
+# Content types that are already compressed and not worth gzipping again
+COMPRESSED_CONTENT_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-bzip2",
+    "application/x-7z-compressed",
+    "application/x-xz",
+    "application/zstd",
+    "font/woff",
+)
+
+
+def _get_header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key == name:
+            return value
+    return None
+
+
+class PrefixTrie:
+    """
+    Precompiled matcher for a set of path prefixes.
+
+    The prefixes are built into a trie, which is then compiled into a single
+    regular expression with shared prefixes factored out (e.g.
+    "/(?:static|login|...)"). Matching is one anchored regex call instead
+    of a startswith call per prefix.
+    """
+    _END = ""
+
+    def __init__(self, prefixes: Iterable[str] = ()):
+        self._root: Dict = {}
+        self._pattern = None
+        for prefix in prefixes:
+            self.add(prefix)
+
+    def add(self, prefix: str) -> None:
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[self._END] = {}
+        self._pattern = None
+
+    def _compile_node(self, node: Dict) -> str:
+        # A completed prefix matches regardless of what follows
+        if self._END in node:
+            return ""
+        branches = [re.escape(char) + self._compile_node(child) for char, child in node.items()]
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    def compile(self) -> None:
+        """Build the matcher; called automatically on first use"""
+        if not self._root:
+            # No prefixes: never match
+            self._pattern = re.compile(r"(?!)")
+        else:
+            self._pattern = re.compile(self._compile_node(self._root))
+
+    def matches(self, path: str) -> bool:
+        """Check whether the path starts with any of the prefixes"""
+        if self._pattern is None:
+            self.compile()
+        return self._pattern.match(path) is not None
+
+
+class ProxyHeadersMiddleware:
+    """
+    Apply the client address, scheme and host reported by a reverse proxy.
+
+    Reads the standard Forwarded header or the X-Forwarded-For/-Proto/-Host
+    headers, but only from peers in trusted_hosts ("*" trusts every peer).
+    The left-most value is used when a proxy chain appended several.
+    """
+    def __init__(self, app, trusted_hosts: Iterable[str] = ("*",)):
+        self.app = app
+        self.trust_all = "*" in trusted_hosts
+        self.trusted_networks = []
+        for host in trusted_hosts:
+            if host == "*":
+                continue
+            try:
+                self.trusted_networks.append(ipaddress.ip_network(host.strip(), strict=False))
+            except ValueError:
+                print(f"Warning: ignoring invalid trusted proxy address: {host}")
+
+    def _is_trusted(self, client: Optional[Tuple[str, int]]) -> bool:
+        if self.trust_all:
+            return True
+        if not client:
+            return False
+        try:
+            address = ipaddress.ip_address(client[0])
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted_networks)
+
+    @staticmethod
+    def _parse_forwarded(value: str) -> Dict[str, str]:
+        """Parse the first element of an RFC 7239 Forwarded header"""
+        params = {}
+        for pair in value.split(",")[0].split(";"):
+            key, _, val = pair.strip().partition("=")
+            if val:
+                params[key.lower()] = val.strip().strip('"')
+        return params
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or not self._is_trusted(scope.get("client")):
+            await self.app(scope, receive, send)
+            return
+
+        headers = scope["headers"]
+        proto = host = client_ip = None
+
+        forwarded = _get_header(headers, b"forwarded")
+        if forwarded:
+            params = self._parse_forwarded(forwarded.decode("latin-1"))
+            proto, host, client_ip = params.get("proto"), params.get("host"), params.get("for")
+        else:
+            value = _get_header(headers, b"x-forwarded-proto")
+            if value:
+                proto = value.decode("latin-1").split(",")[0].strip()
+            value = _get_header(headers, b"x-forwarded-host")
+            if value:
+                host = value.decode("latin-1").split(",")[0].strip()
+            value = _get_header(headers, b"x-forwarded-for")
+            if value:
+                client_ip = value.decode("latin-1").split(",")[0].strip()
+
+        if proto or host or client_ip:
+            scope = dict(scope)
+            if proto:
+                proto = proto.lower()
+                if scope["type"] == "websocket":
+                    proto = "wss" if proto in ("https", "wss") else "ws"
+                scope["scheme"] = proto
+            if host:
+                # Replace the Host header rather than adding a second one
+                scope["headers"] = [(k, v) for k, v in headers if k != b"host"]
+                scope["headers"].append((b"host", host.encode("latin-1")))
+            if client_ip:
+                # Strip brackets and ports from values like "[2001:db8::1]:4711"
+                if client_ip.startswith("["):
+                    client_ip = client_ip[1:].split("]")[0]
+                elif client_ip.count(":") == 1:
+                    client_ip = client_ip.split(":")[0]
+                scope["client"] = (client_ip, 0)
+
+        await self.app(scope, receive, send)
+
+
+class PublicRouteMiddleware:
+    """Mark requests for public routes so the auth dependencies skip them"""
+    def __init__(self, app, prefixes: Iterable[str]):
+        self.app = app
+        self.matcher = PrefixTrie(prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.matcher.matches(scope["path"]):
+            # Read by the auth dependencies through request.state
+            scope.setdefault("state", {})["skip_auth"] = True
+        await self.app(scope, receive, send)
+
+
+class CompressionMiddleware:
+    """
+    Gzip single-message response bodies.
+
+    Responses sent in several chunks (StreamingResponse, FileResponse) are
+    passed through untouched so they keep streaming, as are responses that
+    are already encoded, use an already-compressed content type, or are
+    smaller than minimum_size.
+    """
+    def __init__(self, app, minimum_size: int = 1000, compresslevel: int = 6):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = _get_header(scope["headers"], b"accept-encoding") or b""
+        if b"gzip" not in accept_encoding:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                content_type = (_get_header(headers, b"content-type") or b"").decode("latin-1").lower()
+                if (_get_header(headers, b"content-encoding") is not None
+                        or content_type.startswith(COMPRESSED_CONTENT_TYPES)):
+                    passthrough = True
+                    await send(message)
+                    return
+                # Hold the start message until the first body chunk shows whether it streams
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = gzip.compress(body, compresslevel=self.compresslevel)
+            headers = [(k, v) for k, v in start_message.get("headers", [])
+                       if k not in (b"content-length", b"content-encoding")]
+            headers.append((b"content-encoding", b"gzip"))
+            headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+            vary = _get_header(headers, b"vary")
+            if vary is None:
+                headers.append((b"vary", b"Accept-Encoding"))
+            elif b"accept-encoding" not in vary.lower():
+                headers = [(k, v) for k, v in headers if k != b"vary"]
+                headers.append((b"vary", vary + b", Accept-Encoding"))
+            await send(dict(start_message, headers=headers))
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class MetricsMiddleware:
+    """
+    Count requests and time them per route template.
+
+    Routes are labelled with their template (e.g. /api/jobs/{job_id}) so the
+    number of series stays bounded; mounts use their prefix and anything the
+    router did not match is labelled "unmatched".
+    """
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _route_label(scope) -> str:
+        route = scope.get("route")
+        if route is not None and hasattr(route, "path"):
+            return route.path
+        if "endpoint" in scope:
+            # Mounted apps such as /static
+            return scope.get("root_path") or "/"
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.dec()
+            route = self._route_label(scope)
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, route, status).inc()
+            HTTP_REQUEST_SECONDS.labels(method, route).observe(time.perf_counter() - start)
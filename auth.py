@@ -9,72 +9,151 @@ from sqlalchemy.orm import Session
 
 # Import models for database authentication
 from models import User, get_db_session
+from credential_cache import get_credential_cache, get_last_login_writer
+from session_tokens import ACCESS_COOKIE, TOKEN_REFRESH, get_session_signer
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize HTTP Basic auth
-security = HTTPBasic()
+# Initialize HTTP Basic auth; optional so session tokens can be used instead
+security = HTTPBasic(auto_error=False)
 
 # Default credentials from environment variables
 DEFAULT_USERNAME = os.getenv("HASHCAT_USERNAME", "Hashes")
 DEFAULT_PASSWORD = os.getenv("HASHCAT_PASSWORD", "PasstheH@SH!")
 
-def get_current_user(credentials: HTTPBasicCredentials = Depends(security), request: Request = None):
+def _identity(user: User) -> dict:
+    """Snapshot the fields of a user needed after authentication"""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "is_admin": user.is_admin,
+        "is_active": user.is_active,
+        # Lets refresh tokens notice password changes
+        "pwv": get_session_signer().password_fingerprint(user.password_hash)
+    }
+
+def _user_from_identity(identity: dict) -> User:
+    """Build a detached User from a cached identity, without touching the database"""
+    return User(
+        id=identity["id"],
+        username=identity["username"],
+        email=identity.get("email"),
+        is_admin=identity.get("is_admin", False),
+        is_active=identity.get("is_active", True)
+    )
+
+def _load_legacy_credentials():
+    """Get the legacy username and password from credentials.json or the environment"""
+    if os.path.exists("credentials.json"):
+        with open("credentials.json", "r") as f:
+            creds = json.load(f)
+        return creds.get("username", DEFAULT_USERNAME), creds.get("password", DEFAULT_PASSWORD)
+    # Use environment variables or defaults
+    return DEFAULT_USERNAME, DEFAULT_PASSWORD
+
+def _unauthorized() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Incorrect username or password",
+        headers={"WWW-Authenticate": "Basic"},
+    )
+
+def _session_token(request: Optional[Request]) -> Optional[str]:
+    """Get the session token from a Bearer Authorization header or the session cookie"""
+    if request is None:
+        return None
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return token.strip()
+    return request.cookies.get(ACCESS_COOKIE)
+
+def verify_credentials(username: str, password: str, require_user: bool = True) -> Optional[dict]:
     """
-    Authenticate user using HTTP Basic Auth and return the User object
-    Skip authentication if request has skip_auth marker
+    Verify a username and password, returning the user's identity or None.
+    
+    With require_user, legacy credentials are migrated into a database user as
+    before; without it, a legacy login is accepted by name only.
     """
-    # Skip auth for public routes (like /login page)
-    if request and hasattr(request.state, 'skip_auth') and request.state.skip_auth:
-        # Return a dummy user for public routes
-        return None
+    # Recently verified credentials skip the database and bcrypt entirely
+    cache = get_credential_cache()
+    identity = cache.get(username, password)
+    if identity and (identity["id"] is not None or not require_user):
+        return identity
+    # Read before the query: a change committed while this check runs makes put() a no-op
+    generation = cache.generation(username)
         
     db = get_db_session()
     try:
         # Try database authentication first
-        user = db.query(User).filter(User.username == credentials.username).first()
+        user = db.query(User).filter(User.username == username).first()
         
-        if user and user.is_active and user.verify_password(credentials.password):
-            # Update last login time
-            user.last_login = datetime.utcnow()
-            db.commit()
-            return user
+        if user and user.is_active and user.verify_password(password):
+            identity = _identity(user)
+            cache.put(username, password, identity, generation)
+            return identity
             
         # Fall back to legacy credential check if no user found or password incorrect
-        if not user:
-            if os.path.exists("credentials.json"):
-                with open("credentials.json", "r") as f:
-                    creds = json.load(f)
-                legacy_username = creds.get("username", DEFAULT_USERNAME)
-                legacy_password = creds.get("password", DEFAULT_PASSWORD)
-            else:
-                # Use environment variables or defaults
-                legacy_username = DEFAULT_USERNAME
-                legacy_password = DEFAULT_PASSWORD
-                
-            if credentials.username == legacy_username and credentials.password == legacy_password:
-                # Create user in database from legacy credentials
-                new_user = User(
-                    username=legacy_username,
-                    password_hash=User.get_password_hash(legacy_password),
-                    is_admin=True,  # Legacy user is admin
-                    is_active=True
-                )
-                db.add(new_user)
-                db.commit()
-                return new_user
+        if user and require_user:
+            return None
+        legacy_username, legacy_password = _load_legacy_credentials()
+        if username != legacy_username or password != legacy_password:
+            return None
         
-        # Authentication failed
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Basic"},
-        )
+        if require_user:
+            # Create user in database from legacy credentials
+            new_user = User(
+                username=legacy_username,
+                password_hash=User.get_password_hash(legacy_password),
+                is_admin=True,  # Legacy user is admin
+                is_active=True,
+                last_login=datetime.utcnow()
+            )
+            db.add(new_user)
+            db.commit()
+            identity = _identity(new_user)
+        else:
+            # Legacy users without a database row are cached by name only
+            identity = {
+                "id": None,
+                "username": legacy_username,
+                "email": None,
+                "is_admin": True,
+                "is_active": True,
+                "pwv": None
+            }
+        cache.put(username, password, identity, generation)
+        return identity
     finally:
         db.close()
 
-def get_current_username(credentials: HTTPBasicCredentials = Depends(security), request: Request = None) -> str:
+def get_current_user(credentials: Optional[HTTPBasicCredentials] = Depends(security), request: Request = None):
+    """
+    Authenticate user using a session token or HTTP Basic Auth and return the User object
+    Skip authentication if request has skip_auth marker
+    """
+    # Skip auth for public routes (like /login page)
+    if request and hasattr(request.state, 'skip_auth') and request.state.skip_auth:
+        # Return a dummy user for public routes
+        return None
+    
+    # Signed session tokens are checked without touching the database
+    payload = get_session_signer().verify(_session_token(request))
+    if payload:
+        return User(id=payload["uid"], username=payload["sub"], is_admin=payload["adm"], is_active=True)
+    
+    if credentials is None:
+        raise _unauthorized()
+    identity = verify_credentials(credentials.username, credentials.password)
+    if identity is None:
+        raise _unauthorized()
+    # Last login times are written in debounced batches
+    get_last_login_writer().record(identity["id"])
+    return _user_from_identity(identity)
+
+def get_current_username(credentials: Optional[HTTPBasicCredentials] = Depends(security), request: Request = None) -> str:
     """
     Backwards compatibility function for existing code
     """
@@ -82,32 +161,38 @@ def get_current_username(credentials: HTTPBasicCredentials = Depends(security),
     if request and hasattr(request.state, 'skip_auth') and request.state.skip_auth:
         # Return a dummy username for public routes
         return "public"
-        
+    
+    payload = get_session_signer().verify(_session_token(request))
+    if payload:
+        return payload["sub"]
+    
+    # Basic Auth is still accepted for hashctl and other API clients
+    if credentials is None:
+        raise _unauthorized()
+    identity = verify_credentials(credentials.username, credentials.password, require_user=False)
+    if identity is None:
+        raise _unauthorized()
+    return identity["username"]
+
+def refresh_identity(refresh_token: Optional[str]) -> Optional[dict]:
+    """
+    Check a refresh token against the database and return the current identity.
+    
+    Costs one indexed query and no bcrypt; fails if the user was deactivated
+    or changed their password since the token was issued.
+    """
+    payload = get_session_signer().verify(refresh_token, TOKEN_REFRESH)
+    if not payload:
+        return None
     db = get_db_session()
     try:
-        user = db.query(User).filter(User.username == credentials.username).first()
-        if user and user.is_active and user.verify_password(credentials.password):
-            return user.username
-            
-        # Fall back to legacy credential check if needed
-        if os.path.exists("credentials.json"):
-            with open("credentials.json", "r") as f:
-                creds = json.load(f)
-            legacy_username = creds.get("username", DEFAULT_USERNAME)
-            legacy_password = creds.get("password", DEFAULT_PASSWORD)
-        else:
-            legacy_username = DEFAULT_USERNAME
-            legacy_password = DEFAULT_PASSWORD
-            
-        if credentials.username == legacy_username and credentials.password == legacy_password:
-            return legacy_username
-            
-        # Authentication failed
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Basic"},
-        )
+        user = db.query(User).filter(User.id == payload["uid"]).first()
+        if not user or not user.is_active:
+            return None
+        identity = _identity(user)
+        if identity["pwv"] != payload.get("pwv"):
+            return None
+        return identity
     finally:
         db.close()
 
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Auth throughput benchmark: per-call engine vs the shared pooled engine.
+
+Runs the database half of Basic Auth verification (open a session, look the
+user up by name, close) from concurrent threads, first the way the server did
+it before (a new engine and pool on every call), then through the shared
+engine in database.py. Pass --verify to include the bcrypt check, which was
+paid on every request before the credential cache.
+
+Uses a throwaway SQLite database unless DATABASE_URL is set.
+
+    python benchmarks/auth_throughput.py --threads 16 --seconds 5
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+
+# Run against a scratch database unless one is given explicitly
+if "DATABASE_URL" not in os.environ:
+    _tmp_dir = tempfile.mkdtemp(prefix="hashcat_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import DATABASE_URL
+from models import User, get_db_session, init_db
+
+USERNAME = "admin"
+PASSWORD = "password"
+
+
+def per_call_engine_session():
+    """The old models.get_db_session(): a new engine for every session"""
+    engine = create_engine(DATABASE_URL)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def authenticate(session_factory, verify: bool) -> None:
+    db = session_factory()
+    try:
+        user = db.query(User).filter(User.username == USERNAME).first()
+        if verify and not user.verify_password(PASSWORD):
+            raise RuntimeError("benchmark user has an unexpected password")
+    finally:
+        db.close()
+
+
+def run(name: str, session_factory, threads: int, seconds: float, verify: bool) -> dict:
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        local = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                authenticate(session_factory, verify)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        "name": name,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+    }
+    print(f"{name:<22} {result['throughput']:>10.1f} auth/s  "
+          f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+          f"errors {result['errors']}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark auth database throughput")
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--seconds", type=float, default=5, help="Duration of each run")
+    parser.add_argument("--verify", action="store_true", help="Include the bcrypt password check")
+    args = parser.parse_args()
+
+    init_db()
+    print(f"Database: {DATABASE_URL}")
+    print(f"{args.threads} threads, {args.seconds}s per run, bcrypt {'on' if args.verify else 'off'}\n")
+
+    before = run("per-call engine", per_call_engine_session, args.threads, args.seconds, args.verify)
+    after = run("shared pooled engine", get_db_session, args.threads, args.seconds, args.verify)
+    if before["throughput"]:
+        print(f"\nSpeedup: {after['throughput'] / before['throughput']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Shared helpers for the benchmark scripts: run a copy of the server from a
+scratch directory, start it in-process and summarise latencies.
+"""
+import os
+import sys
+import time
+import shutil
+import socket
+import tempfile
+import threading
+from typing import Dict, List
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_workdir(prefix: str = "hashcat_bench_") -> str:
+    """Run a copy of the server from a scratch directory so benchmarks leave no files behind"""
+    workdir = tempfile.mkdtemp(prefix=prefix)
+    # The job runner keeps its state next to its own module, so copy the modules
+    for name in os.listdir(REPO_DIR):
+        if name.endswith(".py"):
+            shutil.copy(os.path.join(REPO_DIR, name), workdir)
+    for name in ("templates", "static"):
+        os.symlink(os.path.join(REPO_DIR, name), os.path.join(workdir, name))
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    os.chdir(workdir)
+    sys.path.insert(0, workdir)
+    return workdir
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, port: int):
+    """Serve the app with uvicorn in a background thread"""
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * pct), len(values) - 1)]
+
+
+def summarize(latencies: List[float], errors: int = 0, elapsed: float = 0.0) -> Dict[str, float]:
+    """Summarise latencies given in seconds"""
+    latencies = sorted(latency * 1000 for latency in latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": latencies[-1] if latencies else 0.0,
+    }
@@ -0,0 +1,621 @@
+#!/usr/bin/env python3
+"""
+Drop-in hashcat simulator for end-to-end runner tests and benchmarks.
+
+Accepts the command lines the job runner builds and behaves like hashcat from
+the outside: it prints status blocks (text, or JSON with --status-json) every
+--status-timer seconds, appends "hash:plain" lines to the outfile and potfile,
+skips hashes already in the potfile, honours --skip/--limit, --runtime,
+--session/--restore-file-path and --restore, keeps a restore file while it
+runs, and exits with hashcat's exit codes (0 cracked, 1 exhausted, 2 aborted,
+3 checkpoint stop, 4 runtime limit, 255 error). When run in a terminal it
+reads hashcat's interactive keys: [c]heckpoint stops at the next restore file
+write and [q]uit aborts. --keyspace prints the base keyspace, and -b
+prints a benchmark of the configured speed for the -m hash mode.
+
+No hashing is done. Which hashes crack, and where in the keyspace, is derived
+from the hash and the seed, so runs are deterministic regardless of timing.
+Point the server at it with the HASHCAT_BINARY environment variable or the
+jobs.hashcat_binary setting.
+
+Behaviour is configured with a JSON file, found through HASHCAT_SIM_CONFIG,
+then hashcat_simulator.json in the working directory, then next to this
+script; HASHCAT_SIM_<KEY> environment variables override single keys. See
+DEFAULT_CONFIG for the keys.
+"""
+import os
+import sys
+import json
+import time
+import select
+import signal
+import hashlib
+from datetime import datetime
+
+VERSION = "v6.2.6-simulator"
+
+DEFAULT_CONFIG = {
+    "speed": 50e6,              # simulated candidates per second
+    "speed_jitter": 0.05,       # +/- fraction applied to each status update
+    "crack_rate": 0.5,          # fraction of target hashes that crack somewhere in the keyspace
+    "keyspace": None,           # override the base keyspace (otherwise derived from the attack)
+    "startup_delay": 0.5,       # seconds spent "initializing" before the attack starts
+    "checkpoint_interval": 10,  # seconds between restore file writes
+    "seed": 0,
+    "failure": None,            # None, "startup", "crash" or "hang"
+    "failure_rate": 1.0,        # fraction of sessions the failure applies to
+    "failure_at": 50.0,         # progress percentage at which "crash" and "hang" happen
+}
+
+# hashcat status codes used in --status-json output
+STATUS_RUNNING = 3
+STATUS_EXHAUSTED = 5
+STATUS_CRACKED = 6
+STATUS_ABORTED = 7
+STATUS_ABORTED_CHECKPOINT = 10
+STATUS_ABORTED_RUNTIME = 11
+
+STATUS_NAMES = {
+    STATUS_RUNNING: "Running",
+    STATUS_EXHAUSTED: "Exhausted",
+    STATUS_CRACKED: "Cracked",
+    STATUS_ABORTED: "Aborted",
+    STATUS_ABORTED_CHECKPOINT: "Aborted (Checkpoint)",
+    STATUS_ABORTED_RUNTIME: "Aborted (Runtime)",
+}
+
+EXIT_CODES = {
+    STATUS_CRACKED: 0,
+    STATUS_EXHAUSTED: 1,
+    STATUS_ABORTED: 2,
+    STATUS_ABORTED_CHECKPOINT: 3,
+    STATUS_ABORTED_RUNTIME: 4,
+}
+
+HASH_MODE_NAMES = {
+    "0": "MD5",
+    "100": "SHA1",
+    "1000": "NTLM",
+    "1400": "SHA2-256",
+    "1700": "SHA2-512",
+    "1800": "sha512crypt $6$, SHA512 (Unix)",
+    "3200": "bcrypt $2*$, Blowfish (Unix)",
+    "5600": "NetNTLMv2",
+    "13100": "Kerberos 5, etype 23, TGS-REP",
+    "22000": "WPA-PBKDF2-PMKID+EAPOL",
+}
+
+MASK_CHARSETS = {"l": 26, "u": 26, "d": 10, "s": 33, "a": 95, "b": 256, "h": 16, "H": 16}
+
+# Options that take a value; everything else starting with "-" is a flag
+VALUE_OPTIONS = {
+    "-m", "--hash-type", "-a", "--attack-mode", "-o", "--outfile", "--outfile-format",
+    "--session", "--restore-file-path", "--potfile-path", "--status-timer",
+    "-s", "--skip", "-l", "--limit", "--runtime", "-r", "--rules-file",
+    "-w", "--workload-profile", "-1", "-2", "-3", "-4", "--custom-charset1",
+    "--custom-charset2", "--custom-charset3", "--custom-charset4", "-d", "--backend-devices",
+    "-D", "--opencl-device-types", "--increment-min", "--increment-max", "-j", "--rule-left",
+    "-k", "--rule-right", "-t", "--markov-threshold", "--hwmon-temp-abort", "--segment-size",
+    "-n", "--kernel-accel", "-u", "--kernel-loops", "-T", "--kernel-threads", "-c",
+    "--separator", "-p", "--debug-mode", "--debug-file", "--induction-dir",
+    "--outfile-check-dir", "--encoding-from", "--encoding-to", "--cpu-affinity",
+    "--hook-threads", "--backend-vector-width", "--markov-hcstat2", "--scrypt-tuning",
+    "--spin-damp", "--stdin-timeout-abort", "--bitmap-min", "--bitmap-max",
+}
+
+ALIASES = {
+    "--hash-type": "-m", "--attack-mode": "-a", "--outfile": "-o", "--skip": "-s",
+    "--limit": "-l", "--rules-file": "-r", "--workload-profile": "-w",
+}
+
+
+def load_config() -> dict:
+    """Defaults, overlaid with the config file and HASHCAT_SIM_* variables"""
+    config = dict(DEFAULT_CONFIG)
+    candidates = [
+        os.environ.get("HASHCAT_SIM_CONFIG"),
+        os.path.join(os.getcwd(), "hashcat_simulator.json"),
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "hashcat_simulator.json"),
+    ]
+    for path in candidates:
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                config.update(json.load(f))
+            break
+    for key, default in DEFAULT_CONFIG.items():
+        value = os.environ.get(f"HASHCAT_SIM_{key.upper()}")
+        if value is None:
+            continue
+        if isinstance(default, (int, float)) and not isinstance(default, bool):
+            config[key] = float(value)
+        else:
+            config[key] = value or None
+    return config
+
+
+def parse_args(argv: list) -> tuple:
+    """Split a hashcat command line into options and positional arguments"""
+    options, positional = {}, []
+    i = 0
+    while i < len(argv):
+        token = argv[i]
+        if token.startswith("--") and "=" in token:
+            key, value = token.split("=", 1)
+            options[ALIASES.get(key, key)] = value
+        elif token in VALUE_OPTIONS:
+            options[ALIASES.get(token, token)] = argv[i + 1] if i + 1 < len(argv) else ""
+            i += 1
+        elif token.startswith("-") and not token.startswith("--") and len(token) > 2 and token[:2] in VALUE_OPTIONS:
+            # Attached short option value, e.g. -m0 or -w3
+            options[token[:2]] = token[2:]
+        elif token.startswith("-") and token != "-":
+            options[ALIASES.get(token, token)] = True
+        else:
+            positional.append(token)
+        i += 1
+    return options, positional
+
+
+def count_lines(path: str) -> int:
+    count = 0
+    last = b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            count += chunk.count(b"\n")
+            last = chunk
+    if last and not last.endswith(b"\n"):
+        count += 1
+    return count
+
+
+def count_rules(path: str) -> int:
+    with open(path, "r", errors="replace") as f:
+        return sum(1 for line in f if line.strip() and not line.lstrip().startswith("#"))
+
+
+def mask_keyspace(mask: str, options: dict) -> int:
+    """Number of candidates a mask produces; custom charsets are counted by length"""
+    if os.path.isfile(mask):
+        # .hcmask file: one mask per line, optionally prefixed with custom charsets
+        total = 0
+        with open(mask, "r", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    total += mask_keyspace(line.replace("\\,", "\0").split(",")[-1].replace("\0", ","), options)
+        return total
+    keyspace = 1
+    i = 0
+    while i < len(mask):
+        if mask[i] == "?" and i + 1 < len(mask):
+            key = mask[i + 1]
+            if key in MASK_CHARSETS:
+                keyspace *= MASK_CHARSETS[key]
+            elif key in "1234":
+                charset = options.get(f"-{key}") or options.get(f"--custom-charset{key}") or "?a"
+                keyspace *= max(1, mask_keyspace(charset, options) if "?" in charset else len(charset))
+            # "??" is a literal question mark
+            i += 2
+        else:
+            i += 1
+    return keyspace
+
+
+def attack_keyspace(attack_mode: str, positional: list, options: dict) -> tuple:
+    """
+    Base keyspace and amplifier for an attack.
+
+    As in hashcat, --skip/--limit count base words and progress counts
+    candidates (base x amplifier): rules amplify a wordlist, the right-hand
+    wordlist amplifies a combinator attack, and the mask amplifies hybrid
+    attacks. Brute-force masks are treated as having no amplifier.
+    """
+    args = positional[1:]
+    if attack_mode == "0":
+        base = sum(count_lines(path) for path in args if os.path.isfile(path))
+        amplifier = count_rules(options["-r"]) if isinstance(options.get("-r"), str) and os.path.isfile(options["-r"]) else 1
+    elif attack_mode == "1" and len(args) >= 2:
+        base, amplifier = count_lines(args[0]), count_lines(args[1])
+    elif attack_mode == "3" and args:
+        base, amplifier = mask_keyspace(args[0], options), 1
+    elif attack_mode == "6" and len(args) >= 2:
+        base, amplifier = count_lines(args[0]), mask_keyspace(args[1], options)
+    elif attack_mode == "7" and len(args) >= 2:
+        base, amplifier = mask_keyspace(args[0], options), count_lines(args[1])
+    else:
+        raise ValueError(f"Invalid attack mode or missing arguments: -a {attack_mode}")
+    return base, max(1, amplifier)
+
+
+def unit_fraction(*parts) -> float:
+    """Deterministic value in [0, 1) derived from the parts"""
+    digest = hashlib.sha256("\0".join(str(p) for p in parts).encode("utf-8", errors="replace")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def crack_position(target: str, keyspace: int, config: dict):
+    """Base keyspace index at which a target cracks, or None if it never does"""
+    if keyspace <= 0 or unit_fraction(config["seed"], "crack", target) >= float(config["crack_rate"]):
+        return None
+    return int(unit_fraction(config["seed"], "position", target) * keyspace)
+
+
+def plain_for(target: str, position: int) -> str:
+    return f"sim{position}-{hashlib.md5(target.encode('utf-8', errors='replace')).hexdigest()[:6]}"
+
+
+def read_targets(path: str) -> list:
+    targets, seen = [], set()
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            value = line.strip()
+            if value and value not in seen:
+                seen.add(value)
+                targets.append(value)
+    return targets
+
+
+def read_potfile(path: str) -> set:
+    known = set()
+    if path and os.path.exists(path):
+        with open(path, "r", errors="replace") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if ":" in line:
+                    known.add(line.rsplit(":", 1)[0])
+    return known
+
+
+def format_speed(speed: float) -> str:
+    for unit in ("H/s", "kH/s", "MH/s", "GH/s", "TH/s"):
+        if speed < 1000 or unit == "TH/s":
+            return f"{speed:.1f} {unit}" if unit != "H/s" else f"{speed:.0f} {unit}"
+        speed /= 1000
+    return ""
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    parts = []
+    for name, size in (("day", 86400), ("hour", 3600), ("min", 60)):
+        if seconds >= size:
+            value, seconds = divmod(seconds, size)
+            parts.append(f"{value} {name}{'s' if value != 1 else ''}")
+    if seconds or not parts:
+        parts.append(f"{seconds} sec{'s' if seconds != 1 else ''}")
+    return ", ".join(parts)
+
+
+def format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%a %b %d %H:%M:%S %Y")
+
+
+class Simulation:
+    def __init__(self, argv: list, config: dict, restored_position: int = None):
+        self.argv = argv
+        self.config = config
+        self.options, self.positional = parse_args(argv)
+        options = self.options
+
+        self.session = options.get("--session") if isinstance(options.get("--session"), str) else "hashcat"
+        self.restore_file = options.get("--restore-file-path")
+        if not isinstance(self.restore_file, str):
+            self.restore_file = f"{self.session}.restore"
+        self.restore_enabled = "--restore-disable" not in options
+        self.hash_mode = str(options.get("-m", "0"))
+        self.attack_mode = str(options.get("-a", "0"))
+        self.outfile = options.get("-o") if isinstance(options.get("-o"), str) else None
+        self.potfile = None
+        if "--potfile-disable" not in options:
+            self.potfile = options.get("--potfile-path") if isinstance(options.get("--potfile-path"), str) else "hashcat.potfile"
+        self.status_enabled = "--status" in options or "--status-json" in options
+        self.status_json = "--status-json" in options
+        self.status_timer = float(options.get("--status-timer", 10) or 10)
+        self.quiet = "--quiet" in options
+        self.runtime = float(options.get("--runtime", 0) or 0)
+
+        if not self.positional:
+            raise ValueError("No hash or hashfile specified")
+        self.hash_file = self.positional[0]
+        if config.get("keyspace"):
+            self.base_keyspace, self.amplifier = int(float(config["keyspace"])), 1
+        else:
+            self.base_keyspace, self.amplifier = attack_keyspace(self.attack_mode, self.positional, options)
+
+        self.skip = int(options.get("-s", 0) or 0)
+        limit = int(options.get("-l", 0) or 0)
+        self.end = min(self.skip + limit, self.base_keyspace) if limit else self.base_keyspace
+        self.position = restored_position if restored_position is not None else self.skip
+
+        self.targets = read_targets(self.hash_file) if os.path.isfile(self.hash_file) else [self.hash_file]
+        known = read_potfile(self.potfile)
+        self.removed = [t for t in self.targets if t in known]
+        self.cracked = len(self.removed)
+        # Cracks still ahead of us in this session's slice of the keyspace
+        self.pending = []
+        for target in self.targets:
+            if target in known:
+                continue
+            position = crack_position(target, self.base_keyspace, config)
+            if position is not None and self.position <= position < self.end:
+                self.pending.append((position, target))
+        self.pending.sort()
+
+        self.started = time.time()
+        self.speed = 0.0
+        self.aborted = False
+        self.checkpoint_stop = False
+
+        # Per-session failure decision, stable across restores
+        self.failure = config.get("failure")
+        if self.failure and unit_fraction(config["seed"], "failure", self.session) >= float(config["failure_rate"]):
+            self.failure = None
+
+    # --- Output ---
+
+    def progress(self) -> tuple:
+        done = (self.position - self.skip) * self.amplifier
+        total = (self.end - self.skip) * self.amplifier
+        return done, total
+
+    def print_status(self, status: int) -> None:
+        done, total = self.progress()
+        now = time.time()
+        remaining = (total - done) / self.speed if self.speed and status == STATUS_RUNNING else 0
+        if self.status_json:
+            print(json.dumps({
+                "session": self.session,
+                "guess": {"guess_base": self.positional[1] if len(self.positional) > 1 else None,
+                          "guess_base_count": 1, "guess_base_offset": 1, "guess_base_percent": 100.0,
+                          "guess_mod": None, "guess_mode": int(self.attack_mode) if self.attack_mode.isdigit() else 0},
+                "status": status,
+                "target": self.hash_file,
+                "progress": [done, total],
+                "restore_point": self.position,
+                "recovered_hashes": [self.cracked, len(self.targets)],
+                "recovered_salts": [self.cracked, len(self.targets)],
+                "rejected": 0,
+                "devices": [{"device_id": 1, "device_name": "Simulated Device", "device_type": "GPU",
+                             "speed": int(self.speed), "util": 98 if status == STATUS_RUNNING else 0}],
+                "time_start": int(self.started),
+                "estimated_stop": int(now + remaining),
+            }), flush=True)
+            return
+
+        percent = done / total * 100 if total else 100.0
+        recovered = self.cracked / len(self.targets) * 100 if self.targets else 0.0
+        mode_name = HASH_MODE_NAMES.get(self.hash_mode, "Simulated")
+        lines = [
+            f"Session..........: {self.session}",
+            f"Status...........: {STATUS_NAMES[status]}",
+            f"Hash.Mode........: {self.hash_mode} ({mode_name})",
+            f"Hash.Target......: {self.hash_file}",
+            f"Time.Started.....: {format_time(self.started)} ({format_duration(now - self.started)})",
+            f"Time.Estimated...: {format_time(now + remaining)} ({format_duration(remaining)})",
+            f"Guess.Base.......: {' '.join(self.positional[1:])}",
+            f"Speed.#1.........: {format_speed(self.speed):>12} (1.00ms) @ Accel:64 Loops:1 Thr:256 Vec:1",
+            f"Recovered........: {self.cracked}/{len(self.targets)} ({recovered:.2f}%) Digests",
+            f"Progress.........: {done}/{total} ({percent:.2f}%)",
+            f"Rejected.........: 0/{done} (0.00%)",
+            f"Restore.Point....: {self.position}/{self.end} ({percent:.2f}%)",
+            f"Restore.Sub.#1...: Salt:0 Amplifier:0-{self.amplifier} Iteration:0-1",
+            f"Candidates.#1....: sim{self.position} -> sim{min(self.position + 1, self.end)}",
+            "",
+        ]
+        print("\n".join(lines), flush=True)
+
+    def write_restore(self) -> None:
+        if not self.restore_enabled:
+            return
+        tmp = f"{self.restore_file}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": VERSION, "cwd": os.getcwd(), "argv": self.argv, "position": self.position}, f)
+        os.replace(tmp, self.restore_file)
+
+    def remove_restore(self) -> None:
+        try:
+            os.remove(self.restore_file)
+        except OSError:
+            pass
+
+    def emit_crack(self, target: str, position: int) -> None:
+        line = f"{target}:{plain_for(target, position)}\n"
+        if self.potfile:
+            with open(self.potfile, "a") as f:
+                f.write(line)
+        if self.outfile:
+            with open(self.outfile, "a") as f:
+                f.write(line)
+        else:
+            print(line, end="", flush=True)
+        self.cracked += 1
+
+    def read_keys(self) -> None:
+        """Handle keys pressed at hashcat's interactive prompt"""
+        while select.select([sys.stdin], [], [], 0)[0]:
+            key = sys.stdin.read(1)
+            if not key:
+                return
+            if key == "c":
+                self.checkpoint_stop = True
+                print("Checkpoint enabled. Will quit at next restore-point update.", flush=True)
+            elif key == "q":
+                self.aborted = True
+
+    # --- Main loop ---
+
+    def run(self) -> int:
+        interactive = sys.stdin.isatty()
+        if interactive:
+            import termios
+            import tty
+            saved_terminal = termios.tcgetattr(sys.stdin)
+            tty.setcbreak(sys.stdin)
+        try:
+            return self._run(interactive)
+        finally:
+            if interactive:
+                termios.tcsetattr(sys.stdin, termios.TCSADRAIN, saved_terminal)
+
+    def _run(self, interactive: bool) -> int:
+        if not self.quiet:
+            print(f"hashcat ({VERSION}) starting\n", flush=True)
+
+        if self.failure == "startup":
+            print("clGetPlatformIDs(): CL_PLATFORM_NOT_FOUND_KHR\n\n"
+                  "ATTENTION! No OpenCL, HIP or CUDA compatible platform found.\n", flush=True)
+            return 255
+
+        if self.removed and not self.quiet:
+            print(f"INFO: Removed {len(self.removed)} hash{'es' if len(self.removed) != 1 else ''} "
+                  f"found as potfile entries.\n", flush=True)
+        if self.targets and self.cracked == len(self.targets):
+            print("INFO: All hashes found as potfile and/or empty entries! Use --show to display them.\n",
+                  flush=True)
+            return 0
+
+        if not self.quiet:
+            print(f"Dictionary cache hit:\n* Keyspace..: {self.base_keyspace * self.amplifier}\n", flush=True)
+        time.sleep(float(self.config["startup_delay"]))
+
+        self.write_restore()
+        self.started = time.time()
+        last_status = last_checkpoint = time.time()
+        last_tick = time.time()
+        step = min(0.25, self.status_timer)
+        failure_point = self.skip + int((self.end - self.skip) * float(self.config["failure_at"]) / 100)
+        status = STATUS_RUNNING
+
+        while True:
+            time.sleep(step)
+            now = time.time()
+            elapsed, last_tick = now - last_tick, now
+
+            if interactive:
+                self.read_keys()
+            if self.aborted:
+                status = STATUS_ABORTED
+                break
+
+            if self.failure == "hang" and self.position >= failure_point:
+                self.speed = 0.0
+            else:
+                jitter = float(self.config["speed_jitter"])
+                self.speed = float(self.config["speed"]) * (1 + jitter * (2 * unit_fraction(self.session, now) - 1))
+                advance = max(1, int(self.speed * elapsed / self.amplifier))
+                self.position = min(self.end, self.position + advance)
+                if self.failure in ("crash", "hang"):
+                    self.position = min(self.position, failure_point)
+
+            while self.pending and self.pending[0][0] < self.position:
+                position, target = self.pending.pop(0)
+                self.emit_crack(target, position)
+
+            if self.failure == "crash" and self.position >= failure_point:
+                self.write_restore()
+                print("Segmentation fault (core dumped)", flush=True)
+                return 139
+
+            if self.targets and self.cracked >= len(self.targets):
+                status = STATUS_CRACKED
+                break
+            if self.position >= self.end:
+                status = STATUS_EXHAUSTED
+                break
+            if self.runtime and now - self.started >= self.runtime:
+                status = STATUS_ABORTED_RUNTIME
+                break
+
+            if now - last_checkpoint >= float(self.config["checkpoint_interval"]):
+                self.write_restore()
+                last_checkpoint = now
+                if self.checkpoint_stop:
+                    status = STATUS_ABORTED_CHECKPOINT
+                    break
+            if self.status_enabled and now - last_status >= self.status_timer:
+                self.print_status(STATUS_RUNNING)
+                last_status = now
+
+        if status in (STATUS_CRACKED, STATUS_EXHAUSTED):
+            # A finished session no longer needs its checkpoint
+            self.remove_restore()
+        else:
+            self.write_restore()
+
+        if status == STATUS_EXHAUSTED and not self.quiet:
+            print("Approaching final keyspace - workload adjusted.\n", flush=True)
+        self.print_status(status)
+        if not self.quiet:
+            print(f"Started: {format_time(self.started)}\nStopped: {format_time(time.time())}", flush=True)
+        return EXIT_CODES[status]
+
+
+def benchmark(mode: str, config: dict) -> int:
+    """Print hashcat's -b output for one hash mode at the configured speed"""
+    name = HASH_MODE_NAMES.get(mode, f"Hash-Mode {mode}")
+    title = f"* Hash-Mode {mode} ({name})"
+    print(f"hashcat ({VERSION}) starting in benchmark mode\n", flush=True)
+    print("* Device #1: Simulated Device, 8192/8192 MB, 64MCU\n")
+    print("-" * (len(title) - 2))
+    print(title)
+    print("-" * (len(title) - 2) + "\n", flush=True)
+    time.sleep(config["startup_delay"])
+    speed = config["speed"] * (1 + config["speed_jitter"] * (2 * unit_fraction(config["seed"], "bench", mode) - 1))
+    print(f"Speed.#1.........: {speed / 1e6:9.1f} MH/s (10.00ms) @ Accel:64 Loops:1024 Thr:256 Vec:1\n")
+    print(f"Started: {datetime.now():%a %b %d %H:%M:%S %Y}")
+    print(f"Stopped: {datetime.now():%a %b %d %H:%M:%S %Y}", flush=True)
+    return 0
+
+
+def main(argv: list) -> int:
+    config = load_config()
+    options, positional = parse_args(argv)
+    try:
+        if "--version" in options or "-V" in options:
+            print(VERSION)
+            return 0
+
+        if "-b" in options or "--benchmark" in options:
+            return benchmark(str(options.get("-m", "0")), config)
+
+        restored_position = None
+        if "--restore" in options:
+            session = options.get("--session") if isinstance(options.get("--session"), str) else "hashcat"
+            restore_file = options.get("--restore-file-path")
+            if not isinstance(restore_file, str):
+                restore_file = f"{session}.restore"
+            if not os.path.exists(restore_file):
+                print(f"{restore_file}: No such file or directory", flush=True)
+                return 255
+            with open(restore_file, "r") as f:
+                state = json.load(f)
+            os.chdir(state.get("cwd") or os.getcwd())
+            argv, restored_position = state["argv"], state["position"]
+            options, positional = parse_args(argv)
+
+        if "--keyspace" in options:
+            if config.get("keyspace"):
+                print(int(float(config["keyspace"])))
+            else:
+                # --keyspace takes no hash file, only the attack's own arguments
+                print(attack_keyspace(str(options.get("-a", "0")), [None] + positional, options)[0])
+            return 0
+
+        simulation = Simulation(argv, config, restored_position)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"hashcat ({VERSION}) starting\n\n{e}", flush=True)
+        return 255
+
+    def abort(signum, frame):
+        simulation.aborted = True
+
+    for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(sig, abort)
+    return simulation.run()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
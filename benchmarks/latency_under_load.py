@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Polling latency while refreshes, uploads and logins are in flight.
+
+Starts the server in-process against a scratch directory and database, with
+the job runner's process checks replaced by a fixed delay that stands in for
+slow tmux/pgrep calls. It then measures GET /api/jobs/{id} latency twice:
+once with only the pollers running, and once while other clients hammer
+POST /api/jobs/{id}/refresh, upload large hash files, and log in (a failed
+attempt, a successful one and a token refresh, so bcrypt and the user
+queries run on every round). If blocking work ran on the event loop, the
+loaded percentiles would jump to roughly the refresh delay or a bcrypt check.
+
+    python benchmarks/latency_under_load.py --seconds 5 --max-p95-ms 100
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+
+import requests
+
+from harness import setup_workdir, start_server, free_port, summarize
+
+AUTH = ("admin", "password")
+
+
+def hammer(stop: threading.Event, action) -> None:
+    session = requests.Session()
+    session.auth = AUTH
+    while not stop.is_set():
+        try:
+            action(session)
+        except requests.RequestException:
+            pass
+
+
+def measure(base_url: str, job_id: str, seconds: float, pollers: int, background=()) -> dict:
+    """Poll a job from several clients while the background actions run"""
+    stop = threading.Event()
+    latencies = []
+    lock = threading.Lock()
+
+    def poll():
+        session = requests.Session()
+        session.auth = AUTH
+        local = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = session.get(f"{base_url}/api/jobs/{job_id}")
+            response.raise_for_status()
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=poll) for _ in range(pollers)]
+    threads += [threading.Thread(target=hammer, args=(stop, action)) for action in background]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    return summarize(latencies)
+
+
+def report(name: str, result: dict) -> None:
+    print(f"{name:<8} {result['requests']:>6} polls  p50 {result['p50_ms']:>8.2f} ms  "
+          f"p95 {result['p95_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms  "
+          f"max {result['max_ms']:>8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure polling latency under refresh, upload and login load")
+    parser.add_argument("--seconds", type=float, default=5, help="Duration of each phase")
+    parser.add_argument("--pollers", type=int, default=4, help="Clients polling job status")
+    parser.add_argument("--refreshers", type=int, default=4, help="Clients forcing job refreshes")
+    parser.add_argument("--uploaders", type=int, default=2, help="Clients uploading hash files")
+    parser.add_argument("--upload-mb", type=float, default=8, help="Size of each upload")
+    parser.add_argument("--logins", type=int, default=2, help="Clients logging in and refreshing sessions")
+    parser.add_argument("--refresh-delay", type=float, default=0.5,
+                        help="Simulated seconds spent in tmux/pgrep per refresh")
+    parser.add_argument("--max-p95-ms", type=float, default=None,
+                        help="Exit with an error if the loaded p95 exceeds this")
+    args = parser.parse_args()
+
+    workdir = setup_workdir("hashcat_latency_")
+    import main as server_main
+
+    runner = server_main.job_runner
+
+    def slow_process_check(job_id, *unused):
+        time.sleep(args.refresh_delay)
+        return True
+
+    runner.refresh_job_output = slow_process_check
+    runner.is_job_running = slow_process_check
+
+    job_id = "00000000-0000-4000-8000-000000000000"
+    os.makedirs("outputs", exist_ok=True)
+    with open(os.path.join("outputs", f"hashcat_{job_id}.txt"), "w") as f:
+        f.write("HASHCAT COMMAND:\n\nStatus...........: Running\n" * 2000)
+    runner.jobs[job_id] = {
+        "id": job_id,
+        "status": "running",
+        "hash_file": "bench.hash",
+        "wordlist": "bench.txt",
+        "hash_mode": "0",
+        "attack_mode": "0",
+        "started_at": "",
+        "output_file": os.path.join("outputs", f"hashcat_{job_id}.txt"),
+    }
+
+    port = free_port()
+    server = start_server(server_main.app, port)
+    base_url = f"http://127.0.0.1:{port}"
+
+    upload_body = b"5f4dcc3b5aa765d61d8327deb882cf99\n" * int(args.upload_mb * 1024 * 1024 / 33)
+
+    def refresh(session):
+        session.post(f"{base_url}/api/jobs/{job_id}/refresh")
+
+    def upload(session):
+        session.post(f"{base_url}/api/upload/hashlist",
+                     files={"hashlist": ("bench.hash", upload_body)})
+
+    def login(session):
+        # Failed logins are never cached, so each one costs a bcrypt check
+        session.post(f"{base_url}/api/auth/login", json={"username": AUTH[0], "password": "wrong"})
+        response = session.post(f"{base_url}/api/auth/login", json={"username": AUTH[0], "password": AUTH[1]})
+        if response.ok:
+            session.post(f"{base_url}/api/auth/refresh",
+                         json={"refresh_token": response.json()["refresh_token"]})
+
+    print(f"Working directory: {workdir}")
+    print(f"{args.pollers} pollers; loaded phase adds {args.refreshers} refreshers "
+          f"({args.refresh_delay}s each), {args.uploaders} uploaders ({args.upload_mb} MB each) "
+          f"and {args.logins} login clients\n")
+
+    # Warm up auth and connections
+    requests.get(f"{base_url}/api/jobs/{job_id}", auth=AUTH).raise_for_status()
+
+    idle = measure(base_url, job_id, args.seconds, args.pollers)
+    report("idle", idle)
+    loaded = measure(base_url, job_id, args.seconds, args.pollers,
+                     [refresh] * args.refreshers + [upload] * args.uploaders + [login] * args.logins)
+    report("loaded", loaded)
+
+    server.should_exit = True
+    if args.max_p95_ms is not None and loaded["p95_ms"] > args.max_p95_ms:
+        print(f"\nFAIL: loaded p95 {loaded['p95_ms']:.2f} ms exceeds {args.max_p95_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the API.
+
+Simulates N dashboard clients that each poll /api/jobs, /api/jobs/status and
+a job's output, plus M clients streaming hash file uploads, against a large
+job history. By default the server runs in-process from a scratch directory
+with a stubbed job runner: no hashcat, tmux or pgrep is ever invoked, and the
+job history is synthetic. Use --url to load an already running server.
+
+Reports per-endpoint p50/p95/p99 latency and throughput, and can write the
+results as JSON and compare them with an earlier run:
+
+    python benchmarks/load_test.py --clients 50 --jobs 2000 --output before.json
+    python benchmarks/load_test.py --clients 50 --jobs 2000 --compare before.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import threading
+import subprocess
+from collections import defaultdict
+from datetime import datetime
+
+import requests
+
+from harness import REPO_DIR, free_port, setup_workdir, start_server, summarize
+
+
+def stub_runner(runner, job_count: int, output_kb: int) -> list:
+    """Replace process checks with no-ops and seed a synthetic job history"""
+    runner.refresh_job_output = lambda job_id: True
+    runner.is_job_running = lambda job_id: False
+    runner._check_queue = lambda: None
+
+    os.makedirs("outputs", exist_ok=True)
+    status_block = (
+        "Session..........: hashcat\n"
+        "Status...........: Running\n"
+        "Hash.Mode........: 0 (MD5)\n"
+        "Speed.#1.........:  1234.5 MH/s\n"
+        "Recovered........: 12/100 (12.00%) Digests\n"
+        "Progress.........: 123456/14344385 (0.86%)\n\n"
+    )
+    output = "HASHCAT COMMAND:\nhashcat -m 0 -a 0 hashes.txt rockyou.txt\n\nOUTPUT:\n"
+    output += status_block * max(1, output_kb * 1024 // len(status_block))
+
+    statuses = ["completed_success", "completed_exhausted", "running", "queued", "error"]
+    job_ids = []
+    for i in range(job_count):
+        job_id = f"00000000-0000-4000-8000-{i:012d}"
+        job_ids.append(job_id)
+        output_file = os.path.join("outputs", f"hashcat_{job_id}.txt")
+        with open(output_file, "w") as f:
+            f.write(output)
+        runner.jobs[job_id] = {
+            "id": job_id,
+            "status": statuses[i % len(statuses)],
+            "hash_file": f"hashes_{i}.txt",
+            "wordlist": "rockyou.txt",
+            "hash_mode": "0",
+            "attack_mode": "0",
+            "options": "",
+            "started_at": datetime.now().isoformat(),
+            "output_file": output_file,
+            "cracked_count": i % 100,
+            "total_hashes": 100,
+            "progress_info": "Progress.........: 123456/14344385 (0.86%)",
+        }
+    return job_ids
+
+
+class Recorder:
+    """Thread-safe per-endpoint latency and error collection"""
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def timed(self, name: str, func):
+        start = time.perf_counter()
+        try:
+            response = func()
+            ok = response.status_code < 400
+            # Read the whole body, as a browser would
+            response.content
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            if ok:
+                self.latencies[name].append(elapsed)
+            else:
+                self.errors[name] += 1
+
+
+def login(base_url: str, auth) -> requests.Session:
+    session = requests.Session()
+    response = session.post(f"{base_url}/api/auth/login", json={"username": auth[0], "password": auth[1]})
+    if response.status_code == 404:
+        # Older servers only support Basic Auth
+        session.auth = auth
+    else:
+        response.raise_for_status()
+    return session
+
+
+def dashboard_client(base_url, auth, job_ids, interval, stop, recorder, seed):
+    """Poll like an open dashboard tab: job list, status summary, one job's output"""
+    rng = random.Random(seed)
+    session = login(base_url, auth)
+    while not stop.is_set():
+        job_id = rng.choice(job_ids)
+        recorder.timed("GET /api/jobs", lambda: session.get(f"{base_url}/api/jobs"))
+        recorder.timed("GET /api/jobs/status", lambda: session.get(f"{base_url}/api/jobs/status"))
+        recorder.timed("GET /api/jobs/{id}/output", lambda: session.get(f"{base_url}/api/jobs/{job_id}/output"))
+        if interval:
+            stop.wait(rng.uniform(0.5, 1.5) * interval)
+
+
+def upload_client(base_url, auth, size_mb, stop, recorder):
+    """Stream hash file uploads back to back"""
+    session = login(base_url, auth)
+    line = b"5f4dcc3b5aa765d61d8327deb882cf99\n"
+    payload = line * max(1, int(size_mb * 1024 * 1024 / len(line)))
+
+    while not stop.is_set():
+        recorder.timed("POST /api/upload/hashlist", lambda: session.post(
+            f"{base_url}/api/upload/hashlist",
+            files={"hashlist": ("load.hash", payload)}
+        ))
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              text=True, check=False).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> bool:
+    """Print per-endpoint changes against a baseline; return False on a p95 regression"""
+    print(f"\nCompared with {baseline['meta'].get('revision') or 'baseline'} "
+          f"({baseline['meta'].get('timestamp', '')}):")
+    ok = True
+    for name, result in current["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if not before:
+            print(f"  {name:<28} (new)")
+            continue
+        p95_change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        tput_change = ((result["throughput"] - before["throughput"]) / before["throughput"] * 100
+                       if before["throughput"] else 0.0)
+        regressed = p95_change > tolerance
+        ok = ok and not regressed
+        print(f"  {name:<28} p95 {before['p95_ms']:>8.2f} -> {result['p95_ms']:>8.2f} ms ({p95_change:+.1f}%)  "
+              f"throughput {tput_change:+.1f}%{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Hashcat Server API")
+    parser.add_argument("--url", help="Test an already running server instead of an in-process one")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--clients", type=int, default=20, help="Simulated dashboard clients")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="Seconds between a client's polls (0 = as fast as possible)")
+    parser.add_argument("--uploaders", type=int, default=2, help="Clients uploading hash files")
+    parser.add_argument("--upload-mb", type=float, default=4, help="Size of each upload")
+    parser.add_argument("--jobs", type=int, default=1000, help="Synthetic job history size (in-process only)")
+    parser.add_argument("--output-kb", type=int, default=16, help="Size of each job's output file")
+    parser.add_argument("--seconds", type=float, default=15, help="Test duration")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for job selection")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Compare with results from an earlier --output")
+    parser.add_argument("--tolerance", type=float, default=10.0,
+                        help="Allowed p95 increase in percent before --compare fails")
+    args = parser.parse_args()
+
+    # Resolve result paths before the in-process server changes directory
+    output_path = os.path.abspath(args.output) if args.output else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+
+    auth = (args.username, args.password)
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+        job_ids = [job["id"] for job in login(base_url, auth).get(f"{base_url}/api/jobs").json()["jobs"]]
+        if not job_ids:
+            parser.error("the server has no jobs to poll")
+    else:
+        workdir = setup_workdir("hashcat_load_")
+        import main as server_main
+        job_ids = stub_runner(server_main.job_runner, args.jobs, args.output_kb)
+        port = free_port()
+        server = start_server(server_main.app, port)
+        base_url = f"http://127.0.0.1:{port}"
+        print(f"In-process server on {base_url} (working directory {workdir})")
+
+    print(f"{args.clients} dashboard clients every {args.interval}s, {args.uploaders} uploaders "
+          f"({args.upload_mb} MB), {len(job_ids)} jobs, {args.seconds}s\n")
+
+    recorder = Recorder()
+    stop = threading.Event()
+    threads = [threading.Thread(target=dashboard_client,
+                                args=(base_url, auth, job_ids, args.interval, stop, recorder, args.seed + i))
+               for i in range(args.clients)]
+    threads += [threading.Thread(target=upload_client, args=(base_url, auth, args.upload_mb, stop, recorder))
+                for _ in range(args.uploaders)]
+
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    if server:
+        server.should_exit = True
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": args.url or "in-process",
+            "config": {key: value for key, value in vars(args).items() if key not in ("password", "output", "compare")},
+        },
+        "endpoints": {}
+    }
+    print(f"{'endpoint':<28} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name in sorted(set(recorder.latencies) | set(recorder.errors)):
+        result = summarize(recorder.latencies[name], recorder.errors[name], elapsed)
+        results["endpoints"][name] = result
+        print(f"{name:<28} {result['requests']:>8} {result['errors']:>6} {result['throughput']:>8.1f} "
+              f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['max_ms']:>8.2f}")
+
+    if output_path:
+        with open(output_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {output_path}")
+
+    if compare_path:
+        with open(compare_path, "r") as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Per-request overhead of the middleware stack.
+
+Drives a small FastAPI app directly through ASGI (no sockets) with three
+stacks: no middleware, the previous BaseHTTPMiddleware stack (proxy headers,
+linear public-route loop, Starlette GZip) and the pure-ASGI stack from
+asgi_middleware.py, including request metrics. Also times the public-route
+matcher on its own.
+
+    python benchmarks/middleware_overhead.py --requests 20000
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from asgi_middleware import (CompressionMiddleware, MetricsMiddleware, PrefixTrie, ProxyHeadersMiddleware,
+                             PublicRouteMiddleware)
+
+PUBLIC_ROUTES = ["/static", "/favicon.ico", "/login", "/check-auth", "/api/check-auth", "/css/", "/js/", "/img/"]
+
+JOBS = [{"id": f"job-{i}", "status": "running", "progress": "42.00%"} for i in range(50)]
+
+
+# --- The previous middleware, kept here for comparison ---
+
+class LegacyProxyHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        if "x-forwarded-proto" in request.headers:
+            request.scope["scheme"] = request.headers["x-forwarded-proto"]
+        if "x-forwarded-host" in request.headers:
+            request.scope["headers"].append((b"host", request.headers["x-forwarded-host"].encode()))
+        return await call_next(request)
+
+
+class LegacyAuthenticationBypassMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        path = request.url.path
+        for public_route in PUBLIC_ROUTES:
+            if path.startswith(public_route):
+                request.state.skip_auth = True
+                return await call_next(request)
+        return await call_next(request)
+
+
+def build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/jobs/status")
+    async def status():
+        return {"has_running_jobs": True, "total_jobs": 50}
+
+    @app.get("/api/jobs")
+    async def jobs():
+        return {"jobs": JOBS}
+
+    if stack == "legacy":
+        app.add_middleware(GZipMiddleware, minimum_size=1000)
+        app.add_middleware(LegacyProxyHeadersMiddleware)
+        app.add_middleware(LegacyAuthenticationBypassMiddleware)
+    elif stack == "asgi":
+        app.add_middleware(CompressionMiddleware, minimum_size=1000)
+        app.add_middleware(PublicRouteMiddleware, prefixes=PUBLIC_ROUTES)
+        app.add_middleware(MetricsMiddleware)
+        app.add_middleware(ProxyHeadersMiddleware)
+    return app
+
+
+async def call(app, path: str) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"accept-encoding", b"gzip, deflate"),
+            (b"x-forwarded-proto", b"https"),
+            (b"x-forwarded-for", b"203.0.113.7"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+    status = 0
+    request_sent = False
+    response_complete = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Like uvicorn, report a disconnect once the response has been sent
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            response_complete.set()
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run_stack(stack: str, path: str, requests: int) -> float:
+    app = build_app(stack)
+    # Warm up (builds the middleware stack)
+    for _ in range(100):
+        assert await call(app, path) == 200
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app, path)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def bench_matcher(iterations: int) -> None:
+    trie = PrefixTrie(PUBLIC_ROUTES)
+    paths = ["/api/jobs/status", "/api/jobs/0b9e/output", "/static/js/app.js", "/login"]
+
+    def linear(path):
+        for public_route in PUBLIC_ROUTES:
+            if path.startswith(public_route):
+                return True
+        return False
+
+    for name, matcher in (("linear startswith", linear), ("prefix trie", trie.matches)):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for path in paths:
+                matcher(path)
+        per_call = (time.perf_counter() - start) / (iterations * len(paths)) * 1e9
+        print(f"  {name:<18} {per_call:>8.0f} ns/path")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure middleware per-request overhead")
+    parser.add_argument("--requests", type=int, default=20000, help="Requests per stack and endpoint")
+    args = parser.parse_args()
+
+    for path, label in (("/api/jobs/status", "small JSON"), ("/api/jobs", "~3 KB JSON, gzipped")):
+        print(f"{path} ({label}), {args.requests} requests")
+        baseline = asyncio.run(run_stack("none", path, args.requests))
+        for stack in ("none", "legacy", "asgi"):
+            per_request = baseline if stack == "none" else asyncio.run(run_stack(stack, path, args.requests))
+            print(f"  {stack:<8} {per_request:>8.1f} us/request  ({per_request - baseline:+.1f} us middleware)")
+        print()
+
+    print("Public route matching")
+    bench_matcher(args.requests * 10)
+
+
+if __name__ == "__main__":
+    main()
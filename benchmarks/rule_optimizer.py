@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Rule optimizer benchmark.
+
+Optimizes a rule file (or a synthetic rule set with many repeated and no-op
+rules), then checks coverage: every candidate the original rules make from a
+sample wordlist must still be made by the optimized rules. Reports the time
+taken and how much the rule attack's keyspace shrinks.
+
+    python benchmarks/rule_optimizer.py --rules best64.rule --wordlist rockyou.txt
+    python benchmarks/rule_optimizer.py --synthetic 20000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rule_engine import apply_rule, optimize_rules, parse_rule
+
+SIMPLE_OPS = [b":", b"l", b"u", b"c", b"C", b"t", b"r", b"d", b"f", b"{", b"}", b"[", b"]", b"q", b"k", b"K"]
+
+
+def synthetic_rules(count: int, rng: random.Random) -> list:
+    """Short random rules in the style of public rule sets, spaced out at random"""
+    rules = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(1, 4)):
+            kind = rng.random()
+            if kind < 0.4:
+                parts.append(rng.choice(SIMPLE_OPS))
+            elif kind < 0.7:
+                parts.append(b"$" + bytes([rng.choice(b"0123456789!@")]))
+            elif kind < 0.85:
+                parts.append(b"^" + bytes([rng.choice(b"0123456789")]))
+            else:
+                parts.append(b"s" + bytes([rng.choice(b"aeios")]) + bytes([rng.choice(b"430!5$")]))
+        rules.append(b" ".join(parts) if rng.random() < 0.3 else b"".join(parts))
+    return rules
+
+
+def candidates(lines: list, words: list) -> set:
+    result = set()
+    for line in lines:
+        rule = parse_rule(line)
+        if rule is None:
+            continue
+        for word in words:
+            out = apply_rule(rule, word)
+            if out is not None:
+                result.add(out)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the rule optimizer's reduction and check its coverage")
+    parser.add_argument("--rules", help="Rule file to optimize")
+    parser.add_argument("--synthetic", type=int, default=10000, help="Synthetic rule count when --rules is not given")
+    parser.add_argument("--wordlist", help="Sample words for the coverage check (default: synthetic words)")
+    parser.add_argument("--sample", type=int, default=500, help="Words used for the coverage check")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.rules:
+        with open(args.rules, "rb") as f:
+            lines = f.read().splitlines()
+    else:
+        lines = synthetic_rules(args.synthetic, rng)
+
+    if args.wordlist:
+        with open(args.wordlist, "rb") as f:
+            words = [line.rstrip(b"\r\n") for _, line in zip(range(args.sample), f)]
+    else:
+        letters = b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!@#$ "
+        words = [bytes(rng.choice(letters) for _ in range(rng.randint(1, 16))) for _ in range(args.sample)]
+
+    start = time.perf_counter()
+    kept, report = optimize_rules(lines)
+    elapsed = time.perf_counter() - start
+
+    before = candidates(lines, words)
+    after = candidates(kept, words)
+    missing = before - after
+
+    print(f"{report['rules']} rules -> {report['kept']} kept in {elapsed:.2f}s "
+          f"({report['duplicates']} duplicate, {report['noops']} no-op, {report['unparsed']} unparsed)")
+    print(f"Keyspace per word: {report['rules']} -> {report['kept']} "
+          f"({100 * (1 - report['kept'] / max(report['rules'], 1)):.1f}% smaller)")
+    print(f"Coverage on {len(words)} words: {len(before)} distinct candidates before, {len(after)} after, "
+          f"{len(missing)} missing")
+    sys.exit(1 if missing else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+End-to-end job runner benchmark using the hashcat simulator.
+
+Runs the real HashcatJobRunner (tmux/screen/nohup sessions, output capture,
+monitors, outfile ingestion, potfile merging) from a scratch directory with
+benchmarks/hashcat_simulator.py as the hashcat binary, starts many jobs at
+once and waits for all of them to finish. Because the simulator decides
+deterministically which hashes crack, every job's final cracked count and
+status can be checked against what the simulator will do.
+
+Reports how long after the simulated attack finished each job was marked
+complete, job statuses, and any jobs whose results disagree:
+
+    python benchmarks/runner_e2e.py --jobs 200 --hashes 100 --words 1000000 --speed 2e5
+    python benchmarks/runner_e2e.py --jobs 50 --failure crash --failure-rate 0.2
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from collections import Counter
+
+from harness import REPO_DIR, percentile, setup_workdir
+
+import hashcat_simulator
+
+SIMULATOR = os.path.join(REPO_DIR, "benchmarks", "hashcat_simulator.py")
+
+
+def expected_outcome(job_id: str, targets: list, keyspace: int, config: dict) -> tuple:
+    """Status and cracked count the runner should end up with for a job"""
+    session = f"hashcat_{job_id}"
+    failure = config.get("failure")
+    if failure and hashcat_simulator.unit_fraction(config["seed"], "failure", session) >= config["failure_rate"]:
+        failure = None
+    positions = [hashcat_simulator.crack_position(t, keyspace, config) for t in targets]
+    positions = [p for p in positions if p is not None]
+    if failure == "startup":
+        return "failed", 0
+    if failure in ("crash", "hang"):
+        cutoff = int(keyspace * config["failure_at"] / 100)
+        return None, sum(1 for p in positions if p < cutoff)
+    if len(positions) == len(targets):
+        return "completed_success", len(positions)
+    return "completed_exhausted", len(positions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the job runner end to end with the hashcat simulator")
+    parser.add_argument("--jobs", type=int, default=50, help="Jobs started at once")
+    parser.add_argument("--hashes", type=int, default=100, help="Hashes per job")
+    parser.add_argument("--words", type=int, default=500000, help="Wordlist size")
+    parser.add_argument("--speed", type=float, default=1e5, help="Simulated hashes per second per job")
+    parser.add_argument("--crack-rate", type=float, default=0.5, help="Fraction of hashes that crack")
+    parser.add_argument("--failure", choices=["startup", "crash", "hang"], help="Failure mode to inject")
+    parser.add_argument("--failure-rate", type=float, default=0.1, help="Fraction of jobs the failure hits")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=600, help="Give up waiting after this many seconds")
+    args = parser.parse_args()
+
+    workdir = setup_workdir("hashcat_e2e_")
+    config = dict(hashcat_simulator.DEFAULT_CONFIG, speed=args.speed, crack_rate=args.crack_rate,
+                  seed=args.seed, failure=args.failure, failure_rate=args.failure_rate)
+    config_path = os.path.join(workdir, "hashcat_simulator.json")
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+    os.environ["HASHCAT_SIM_CONFIG"] = config_path
+    os.environ["HASHCAT_BINARY"] = SIMULATOR
+
+    from job_runner import HashcatJobRunner
+    runner = HashcatJobRunner()
+
+    rng = random.Random(args.seed)
+    wordlist = os.path.join(workdir, "wordlists", "bench.txt")
+    with open(wordlist, "w") as f:
+        f.write("\n".join(f"word{i}" for i in range(args.words)) + "\n")
+
+    hash_files = []
+    for i in range(args.jobs):
+        path = os.path.join(workdir, "hashes", f"bench_{i}.txt")
+        targets = [f"{rng.getrandbits(128):032x}" for _ in range(args.hashes)]
+        with open(path, "w") as f:
+            f.write("\n".join(targets) + "\n")
+        hash_files.append((path, targets))
+
+    simulated_runtime = args.words / args.speed + config["startup_delay"]
+    print(f"Working directory: {workdir}")
+    print(f"{args.jobs} jobs x {args.hashes} hashes, {args.words} words at {args.speed:g} H/s "
+          f"(~{simulated_runtime:.1f}s of simulated cracking each)\n")
+
+    started = time.time()
+    jobs = {}
+    for path, targets in hash_files:
+        result = runner.start_job("0", "0", path, wordlist)
+        jobs[result["job_id"]] = {"submitted": time.time(), "targets": targets}
+    print(f"Submitted {len(jobs)} jobs in {time.time() - started:.2f}s")
+
+    finished = {}
+    while len(finished) < len(jobs) and time.time() - started < args.timeout:
+        now = time.time()
+        for job_id in jobs:
+            if job_id not in finished and runner.jobs[job_id]["status"] not in ("starting", "running"):
+                finished[job_id] = now
+        time.sleep(0.5)
+    elapsed = time.time() - started
+
+    # Stop anything still running (hung sessions, or a timeout)
+    unfinished = [job_id for job_id in jobs if job_id not in finished]
+    for job_id in unfinished:
+        runner.delete_job(job_id)
+
+    lags = sorted(finished[job_id] - (jobs[job_id]["submitted"] + simulated_runtime) for job_id in finished)
+    statuses = Counter(runner.jobs[job_id]["status"] for job_id in finished)
+    mismatches = []
+    for job_id in finished:
+        job = runner.jobs[job_id]
+        status, cracked = expected_outcome(job_id, jobs[job_id]["targets"], args.words, config)
+        if (status and job["status"] != status) or job.get("cracked_count", 0) != cracked:
+            mismatches.append((job_id, job["status"], status, job.get("cracked_count", 0), cracked))
+
+    cpu = os.times()
+    print(f"\nAll jobs settled in {elapsed:.1f}s ({len(unfinished)} still running and stopped)")
+    print(f"Server process CPU: {cpu.user + cpu.system:.1f}s")
+    print("Statuses: " + ", ".join(f"{status} {count}" for status, count in sorted(statuses.items())))
+    if lags:
+        print(f"Completion lag after the simulated attack: p50 {percentile(lags, 0.5):.1f}s  "
+              f"p95 {percentile(lags, 0.95):.1f}s  max {lags[-1]:.1f}s")
+    print(f"Jobs with unexpected status or cracked count: {len(mismatches)}")
+    for job_id, status, expected_status, cracked, expected_cracked in mismatches[:10]:
+        print(f"  {job_id}: {status} (expected {expected_status or 'any'}), "
+              f"cracked {cracked} (expected {expected_cracked})")
+
+    if mismatches or (unfinished and args.failure != "hang"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Queue policy simulation.
+
+Replays a job trace through each queue policy in scheduling.py with a
+discrete-event simulation of the job runner (jobs wait in the queue while
+every slot is busy; when a slot frees up the policy picks the next job), and
+compares turnaround time, queue wait, slowdown and deadline misses.
+
+The trace is either the runner's own jobs.json, using each finished job's
+queue time and measured runtime, or a synthetic mix of many short targeted
+jobs and a few multi-day brute-force runs:
+
+    python benchmarks/scheduler_sim.py --trace jobs.json
+    python benchmarks/scheduler_sim.py --jobs 2000 --load 0.9 --estimate-error 0.5
+"""
+import os
+import sys
+import json
+import math
+import random
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness import percentile
+from scheduling import POLICIES, create_queue_policy
+
+EPOCH = datetime(2026, 1, 1)
+
+
+def load_trace(path: str) -> list:
+    """Finished jobs from a jobs.json as (arrival, runtime, estimate, deadline) seconds"""
+    with open(path, "r") as f:
+        jobs = json.load(f)
+    trace = []
+    for job in jobs.values():
+        try:
+            started = datetime.fromisoformat(job["started_at"])
+            completed = datetime.fromisoformat(job["completed_at"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        arrival = datetime.fromisoformat(job["queued_at"]) if job.get("queued_at") else started
+        deadline = datetime.fromisoformat(job["deadline"]) if job.get("deadline") else None
+        trace.append({
+            "arrival": arrival.timestamp(),
+            "runtime": max((completed - started).total_seconds(), 1.0),
+            "estimate": job.get("estimated_seconds"),
+            "deadline": deadline.timestamp() if deadline else None,
+        })
+    if not trace:
+        raise SystemExit(f"No finished jobs with start and completion times in {path}")
+    start = min(job["arrival"] for job in trace)
+    for job in trace:
+        job["arrival"] -= start
+        if job["deadline"] is not None:
+            job["deadline"] -= start
+    return sorted(trace, key=lambda job: job["arrival"])
+
+
+def synthetic_trace(count: int, load: float, slots: int, rng: random.Random) -> list:
+    """
+    Mostly short jobs (minutes) with a heavy tail of long ones (hours to days),
+    arriving as a Poisson process at the given utilisation of the slots.
+    """
+    runtimes = []
+    for _ in range(count):
+        if rng.random() < 0.8:
+            runtimes.append(rng.uniform(30, 1800))
+        elif rng.random() < 0.85:
+            runtimes.append(rng.uniform(3600, 12 * 3600))
+        else:
+            runtimes.append(rng.uniform(86400, 5 * 86400))
+    mean_gap = sum(runtimes) / count / (load * slots)
+    trace, clock = [], 0.0
+    for runtime in runtimes:
+        clock += rng.expovariate(1 / mean_gap)
+        trace.append({"arrival": clock, "runtime": runtime, "estimate": None, "deadline": None})
+    return trace
+
+
+def prepare(trace: list, estimate_error: float, deadline_fraction: float, deadline_slack: float,
+            rng: random.Random) -> None:
+    """Fill in missing estimates (runtime with log-normal error) and synthetic deadlines"""
+    for job in trace:
+        if job["estimate"] is None:
+            job["estimate"] = job["runtime"] * math.exp(rng.gauss(0, estimate_error)) if estimate_error else job["runtime"]
+        if job["deadline"] is None and rng.random() < deadline_fraction:
+            job["deadline"] = job["arrival"] + job["runtime"] * rng.uniform(1, deadline_slack)
+
+
+def simulate(trace: list, policy, slots: int) -> list:
+    """Run the trace through a policy; returns (job, start, finish) per job"""
+    pending = [dict(job, id=str(i)) for i, job in enumerate(trace)]
+    queue, running, results = [], [], []
+    clock, index = 0.0, 0
+    while index < len(pending) or queue or running:
+        # Next event: an arrival or the earliest completion
+        next_arrival = pending[index]["arrival"] if index < len(pending) else math.inf
+        next_finish = min((finish for finish, _ in running), default=math.inf)
+        clock = min(next_arrival, next_finish)
+        running = [(finish, job) for finish, job in running if finish > clock]
+        while index < len(pending) and pending[index]["arrival"] <= clock:
+            job = pending[index]
+            queue.append(dict(job, due=job["deadline"], queued_at=(EPOCH + timedelta(seconds=job["arrival"])).isoformat(),
+                              estimated_seconds=job["estimate"],
+                              deadline=(EPOCH + timedelta(seconds=job["deadline"])).isoformat()
+                              if job["deadline"] is not None else None))
+            index += 1
+        # Fill free slots as the runner's _check_queue would
+        while queue and len(running) < slots:
+            job = policy.select(queue, EPOCH + timedelta(seconds=clock))
+            queue.remove(job)
+            running.append((clock + job["runtime"], job))
+            results.append((job, clock, clock + job["runtime"]))
+    return results
+
+
+def report(name: str, results: list) -> dict:
+    turnaround = sorted(finish - job["arrival"] for job, start, finish in results)
+    waits = [start - job["arrival"] for job, start, finish in results]
+    slowdown = [(finish - job["arrival"]) / job["runtime"] for job, start, finish in results]
+    with_deadline = [(job, finish) for job, start, finish in results if job["due"] is not None]
+    missed = sum(1 for job, finish in with_deadline if finish > job["due"])
+    return {
+        "policy": name,
+        "mean_turnaround_h": sum(turnaround) / len(turnaround) / 3600,
+        "p50_turnaround_h": percentile(turnaround, 0.5) / 3600,
+        "p95_turnaround_h": percentile(turnaround, 0.95) / 3600,
+        "max_turnaround_h": turnaround[-1] / 3600,
+        "mean_wait_h": sum(waits) / len(waits) / 3600,
+        "mean_slowdown": sum(slowdown) / len(slowdown),
+        "deadline_jobs": len(with_deadline),
+        "deadline_misses": missed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare queue policies on a job trace")
+    parser.add_argument("--trace", help="Replay finished jobs from a jobs.json instead of a synthetic trace")
+    parser.add_argument("--jobs", type=int, default=1000, help="Synthetic trace size")
+    parser.add_argument("--load", type=float, default=0.85, help="Synthetic utilisation of the slots")
+    parser.add_argument("--slots", type=int, default=1, help="Jobs run at once")
+    parser.add_argument("--estimate-error", type=float, default=0.3,
+                        help="Log-normal sigma of runtime estimates for jobs without one")
+    parser.add_argument("--deadline-fraction", type=float, default=0.2, help="Share of jobs given a deadline")
+    parser.add_argument("--deadline-slack", type=float, default=4.0,
+                        help="Deadlines fall between 1x and this many times a job's runtime after arrival")
+    parser.add_argument("--aging-factor", type=float, default=1.0, help="Aging for the sjf policy")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    trace = load_trace(args.trace) if args.trace else synthetic_trace(args.jobs, args.load, args.slots, rng)
+    prepare(trace, args.estimate_error, args.deadline_fraction, args.deadline_slack, rng)
+    print(f"{len(trace)} jobs over {trace[-1]['arrival'] / 86400:.1f} days, {args.slots} slot(s), "
+          f"{sum(job['runtime'] for job in trace) / 3600:.0f}h of work\n")
+
+    results = []
+    print(f"{'policy':<8} {'mean h':>9} {'p50 h':>9} {'p95 h':>9} {'max h':>9} {'wait h':>9} "
+          f"{'slowdown':>9} {'missed':>10}")
+    for name in POLICIES:
+        policy = create_queue_policy(name, args.aging_factor)
+        result = report(name, simulate(trace, policy, args.slots))
+        results.append(result)
+        print(f"{name:<8} {result['mean_turnaround_h']:>9.2f} {result['p50_turnaround_h']:>9.2f} "
+              f"{result['p95_turnaround_h']:>9.2f} {result['max_turnaround_h']:>9.2f} {result['mean_wait_h']:>9.2f} "
+              f"{result['mean_slowdown']:>9.1f} {result['deadline_misses']:>5}/{result['deadline_jobs']:<4}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
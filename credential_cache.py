@@ -0,0 +1,234 @@
+import os
+import hmac
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Any
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+
+from models import User, get_db_session
+
+
+class CredentialCache:
+    """
+    Bounded TTL cache of successful credential verifications.
+
+    Verifying a bcrypt hash costs tens of milliseconds of CPU, and the
+    dashboard re-sends Basic credentials on every poll. Entries are keyed by
+    an HMAC of the username and password under a per-process random key, so
+    plaintext passwords are never held in memory and cache keys are useless
+    outside this process. Entries are dropped when a user's password, role,
+    active flag or username changes, or when the user is deleted.
+
+    Each invalidation also bumps the username's generation. A caller reads
+    the generation before it queries the database and passes it to put(), so
+    a verification that was in flight during a change is not cached.
+    """
+    def __init__(self, ttl: float = 300, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._key = os.urandom(32)
+        # credential digest -> (expires_at, identity)
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        # username -> credential digests cached for it
+        self._by_username: Dict[str, set] = {}
+        # username -> invalidation count
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _digest(self, username: str, password: str) -> bytes:
+        message = username.encode("utf-8") + b"\0" + password.encode("utf-8")
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def get(self, username: str, password: str) -> Optional[Dict[str, Any]]:
+        """Return the cached identity for these credentials, if verified recently"""
+        digest = self._digest(username, password)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            expires_at, identity = entry
+            if expires_at < time.monotonic():
+                self._remove(digest, username)
+                return None
+            self._entries.move_to_end(digest)
+            return identity
+
+    def generation(self, username: str) -> int:
+        """The username's generation, to be read before verifying against the database"""
+        with self._lock:
+            return self._generations.get(username, 0)
+
+    def put(self, username: str, password: str, identity: Dict[str, Any],
+            generation: Optional[int] = None) -> None:
+        """Remember a successful verification, unless the user changed since generation was read"""
+        digest = self._digest(username, password)
+        with self._lock:
+            if generation is not None and self._generations.get(username, 0) != generation:
+                return
+            self._entries[digest] = (time.monotonic() + self.ttl, identity)
+            self._entries.move_to_end(digest)
+            self._by_username.setdefault(username, set()).add(digest)
+            while len(self._entries) > self.max_entries:
+                oldest, (_, oldest_identity) = self._entries.popitem(last=False)
+                digests = self._by_username.get(oldest_identity["username"])
+                if digests:
+                    digests.discard(oldest)
+                    if not digests:
+                        del self._by_username[oldest_identity["username"]]
+
+    def invalidate(self, username: Optional[str]) -> None:
+        """Drop every cached verification for a user"""
+        if not username:
+            return
+        with self._lock:
+            self._generations[username] = self._generations.get(username, 0) + 1
+            for digest in self._by_username.pop(username, set()):
+                self._entries.pop(digest, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_username.clear()
+
+    def _remove(self, digest: bytes, username: str) -> None:
+        self._entries.pop(digest, None)
+        digests = self._by_username.get(username)
+        if digests:
+            digests.discard(digest)
+            if not digests:
+                del self._by_username[username]
+
+
+class LastLoginWriter:
+    """
+    Debounced, batched writer for User.last_login.
+
+    Authenticated requests only record the time in memory; a background
+    thread writes the pending timestamps in a single transaction every
+    flush_interval seconds, and a user's last_login is not rewritten more
+    often than once per debounce_seconds.
+    """
+    def __init__(self, flush_interval: float = 30, debounce_seconds: float = 60):
+        self.flush_interval = flush_interval
+        self.debounce = timedelta(seconds=debounce_seconds)
+        # user_id -> last_login waiting to be written
+        self._pending: Dict[int, datetime] = {}
+        # user_id -> last_login most recently recorded
+        self._recorded: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    def record(self, user_id: Optional[int]) -> None:
+        """Note a login for a user, to be written with the next batch"""
+        if user_id is None:
+            return
+        now = datetime.utcnow()
+        with self._lock:
+            last = self._recorded.get(user_id)
+            if last and now - last < self.debounce:
+                return
+            self._recorded[user_id] = now
+            self._pending[user_id] = now
+
+    def flush(self) -> int:
+        """Write all pending last_login timestamps, returning the number of users updated"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        db = get_db_session()
+        try:
+            for user_id, last_login in pending.items():
+                db.query(User).filter(User.id == user_id).update(
+                    {User.last_login: last_login}, synchronize_session=False
+                )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error writing last login times: {str(e)}")
+            # Keep the timestamps for the next attempt unless newer ones arrived
+            with self._lock:
+                for user_id, last_login in pending.items():
+                    self._pending.setdefault(user_id, last_login)
+            return 0
+        finally:
+            db.close()
+        return len(pending)
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+_credential_cache = None
+_last_login_writer = None
+_cache_lock = threading.Lock()
+
+
+def get_credential_cache() -> CredentialCache:
+    """Get the process-wide credential cache"""
+    global _credential_cache
+    if _credential_cache is None:
+        with _cache_lock:
+            if _credential_cache is None:
+                from settings import get_settings_manager
+                settings = get_settings_manager()
+                _credential_cache = CredentialCache(
+                    ttl=settings.get_setting("security", "credential_cache_ttl", 300),
+                    max_entries=settings.get_setting("security", "credential_cache_size", 1024)
+                )
+    return _credential_cache
+
+
+def get_last_login_writer() -> LastLoginWriter:
+    """Get the process-wide last_login writer"""
+    global _last_login_writer
+    if _last_login_writer is None:
+        with _cache_lock:
+            if _last_login_writer is None:
+                _last_login_writer = LastLoginWriter()
+    return _last_login_writer
+
+
+# Invalidate cached verifications whenever the attributes they depend on change
+
+def _invalidate(target, username: str) -> None:
+    """Invalidate a user's cached verifications now and again once the change commits"""
+    cache = get_credential_cache()
+    cache.invalidate(username)
+    # A check that starts before the commit still reads the old row
+    session = object_session(target)
+    if session is not None:
+        event.listen(session, "after_commit", lambda session: cache.invalidate(username), once=True)
+
+
+def _invalidate_on_change(target, value, oldvalue, initiator):
+    # Users built in memory (new rows, cached identities) have nothing cached yet
+    if not inspect(target).has_identity or value == oldvalue:
+        return
+    _invalidate(target, target.username)
+
+
+def _invalidate_on_rename(target, value, oldvalue, initiator):
+    if not inspect(target).has_identity or value == oldvalue:
+        return
+    if isinstance(oldvalue, str):
+        _invalidate(target, oldvalue)
+    _invalidate(target, value)
+
+
+def _invalidate_on_delete(mapper, connection, target):
+    _invalidate(target, target.username)
+
+
+for _attribute in (User.password_hash, User.is_admin, User.is_active):
+    event.listen(_attribute, "set", _invalidate_on_change)
+event.listen(User.username, "set", _invalidate_on_rename)
+event.listen(User, "after_delete", _invalidate_on_delete)
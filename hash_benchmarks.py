@@ -0,0 +1,266 @@
+import os
+import re
+import json
+import time
+import socket
+import threading
+import subprocess
+import queue
+from typing import Callable, Dict, Optional, Any
+from datetime import datetime, timedelta
+
+from job_timeseries import SPEED_PATTERN, SPEED_UNITS
+from settings import get_settings_manager
+
+# Hash modes benchmarked when nothing else has been requested
+DEFAULT_BENCHMARK_MODES = ["0", "100", "1000", "1800", "3200"]
+
+# "* Device #1: NVIDIA GeForce RTX 3090, 23336/24268 MB, 82MCU"
+DEVICE_PATTERN = re.compile(r"^\* Device #(\d+): ([^,]+)")
+# "* Hash-Mode 0 (MD5)" (hashcat 6) or "Hashmode: 0 - MD5" (hashcat 5)
+MODE_PATTERNS = [
+    re.compile(r"^\*?\s*Hash-Mode (\d+) \((.+)\)"),
+    re.compile(r"^Hashmode: (\d+) - (.+)$"),
+]
+
+BENCHMARK_OK = "ok"
+BENCHMARK_FAILED = "failed"
+
+
+def parse_benchmark_output(output: str) -> Dict[str, Any]:
+    """
+    Parse `hashcat -b` output into the mode name, total speed and per-device
+    speeds and names. Speeds are in hashes per second.
+    """
+    result: Dict[str, Any] = {"name": None, "speed": None, "devices": {}}
+    device_names = {}
+    for raw in output.splitlines():
+        line = raw.strip()
+        device = DEVICE_PATTERN.match(line)
+        if device:
+            if "skipped" not in line.lower():
+                device_names[device.group(1)] = device.group(2).strip()
+            continue
+        for pattern in MODE_PATTERNS:
+            mode = pattern.match(line)
+            if mode:
+                result["name"] = mode.group(2).strip()
+                break
+        speed = SPEED_PATTERN.match(line)
+        if speed:
+            device_id, value, unit = speed.groups()
+            rate = float(value) * SPEED_UNITS.get(unit, 1)
+            if device_id == "*":
+                result["speed"] = rate
+            else:
+                result["devices"][device_id] = {"name": device_names.get(device_id), "speed": rate}
+    if result["speed"] is None and result["devices"]:
+        result["speed"] = sum(d["speed"] for d in result["devices"].values())
+    return result
+
+
+class HashBenchmarkRegistry:
+    """
+    Measured hashcat speeds per host, hash mode and device.
+
+    Modes are benchmarked with `hashcat -b` in the background while the
+    scheduler is idle, so the measurements never compete with real jobs.
+    Results are kept per host in hash_benchmarks.json and go stale after
+    jobs.benchmark_max_age_days or when the hashcat version changes.
+    """
+    def __init__(self, base_dir: str, is_idle: Optional[Callable[[], bool]] = None,
+                 hashcat_bin: str = "hashcat"):
+        self.results_file = os.path.join(base_dir, "hash_benchmarks.json")
+        self.is_idle = is_idle or (lambda: True)
+        self.hashcat_bin = hashcat_bin
+        self.host = socket.gethostname()
+        self.idle_poll_interval = 5
+        self.timeout = 600
+
+        self.results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pending: set = set()
+        self._running: Optional[str] = None
+        self._version: Optional[str] = None
+        self._load_results()
+
+        threading.Thread(target=self._benchmark_loop, daemon=True).start()
+
+    def _load_results(self):
+        """Load benchmark results from file"""
+        if os.path.exists(self.results_file):
+            try:
+                with open(self.results_file, "r") as f:
+                    self.results = json.load(f)
+            except (json.JSONDecodeError, PermissionError) as e:
+                print(f"Warning: Error reading hash benchmarks: {str(e)}. Starting fresh.")
+                self.results = {}
+
+    def _save_results(self):
+        """Save benchmark results to file"""
+        try:
+            with open(self.results_file, "w") as f:
+                json.dump(self.results, f, indent=2)
+        except PermissionError:
+            print(f"Error: Permission denied writing to hash benchmarks: {self.results_file}")
+
+    def hashcat_version(self) -> Optional[str]:
+        """The hashcat version, asked once per process"""
+        if self._version is None:
+            try:
+                result = subprocess.run([self.hashcat_bin, "--version"], stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, text=True, timeout=30, check=False)
+                self._version = result.stdout.strip() or ""
+            except (OSError, subprocess.SubprocessError):
+                self._version = ""
+        return self._version or None
+
+    def get(self, mode: str, host: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The latest result for a hash mode on a host (this one by default)"""
+        with self._lock:
+            entry = self.results.get(host or self.host, {}).get(str(mode))
+            return dict(entry) if entry else None
+
+    def get_speed(self, mode: str) -> Optional[float]:
+        """Measured hashes per second for a mode on this host, or None if never measured"""
+        entry = self.get(mode)
+        if entry and entry.get("status") == BENCHMARK_OK:
+            return entry.get("speed")
+        return None
+
+    def list(self) -> Dict[str, Any]:
+        """All results by host, plus what is queued or running"""
+        with self._lock:
+            results = {host: [dict(entry) for entry in modes.values()] for host, modes in self.results.items()}
+            pending = sorted(self._pending, key=lambda mode: (len(mode), mode))
+            return {"host": self.host, "results": results, "pending": pending, "running": self._running}
+
+    def _too_old(self, entry: Dict[str, Any]) -> bool:
+        max_age = get_settings_manager().get_setting("jobs", "benchmark_max_age_days", 30)
+        try:
+            return datetime.now() - datetime.fromisoformat(entry["measured_at"]) > timedelta(days=max_age)
+        except (KeyError, TypeError, ValueError):
+            return True
+
+    def is_stale(self, entry: Optional[Dict[str, Any]]) -> bool:
+        """Whether a result is missing, too old or from another hashcat version"""
+        if not entry or self._too_old(entry):
+            return True
+        version = self.hashcat_version()
+        return bool(version and entry.get("hashcat_version") and entry["hashcat_version"] != version)
+
+    def ensure(self, mode: str) -> bool:
+        """Queue a mode for benchmarking unless it has a current result; returns True if queued"""
+        mode = str(mode)
+        entry = self.get(mode)
+        # Failed modes are only retried on request or once too old, not on every job
+        if entry and entry.get("status") == BENCHMARK_FAILED and not self._too_old(entry):
+            return False
+        if not self.is_stale(entry):
+            return False
+        return self.enqueue(mode)
+
+    def enqueue(self, mode: str) -> bool:
+        """Queue a mode for benchmarking; returns False if it is already queued"""
+        mode = str(mode)
+        with self._lock:
+            if mode in self._pending:
+                return False
+            self._pending.add(mode)
+        self._queue.put(mode)
+        return True
+
+    def _store(self, mode: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.results.setdefault(self.host, {})[mode] = entry
+            self._save_results()
+
+    def _benchmark_loop(self) -> None:
+        """Benchmark queued modes one at a time, only while no jobs are running"""
+        # Checked here rather than at startup, since it asks hashcat for its version
+        for mode in get_settings_manager().get_setting("jobs", "benchmark_modes", DEFAULT_BENCHMARK_MODES):
+            self.ensure(str(mode))
+
+        while True:
+            mode = self._queue.get()
+            # Use idle scheduler capacity only
+            while not self.is_idle():
+                time.sleep(self.idle_poll_interval)
+
+            with self._lock:
+                self._running = mode
+            try:
+                measured = self._benchmark(mode)
+            except Exception as e:
+                print(f"Error benchmarking hash mode {mode}: {str(e)}")
+                measured = True
+            finally:
+                with self._lock:
+                    self._running = None
+                    self._pending.discard(mode)
+
+            # A job that started meanwhile shared the devices; measure again later
+            if not measured:
+                self.enqueue(mode)
+
+    def _benchmark(self, mode: str) -> bool:
+        """
+        Run `hashcat -b` for one mode and store the result. Returns False if a
+        job started during the run, which makes the measurement unreliable.
+        """
+        print(f"Benchmarking hash mode {mode}")
+        start = time.time()
+        cmd = [self.hashcat_bin, "-b", "-m", mode]
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    text=True, timeout=self.timeout, check=False)
+            output, returncode = result.stdout or "", result.returncode
+        except subprocess.TimeoutExpired as e:
+            output, returncode = e.stdout or "", None
+            if isinstance(output, bytes):
+                output = output.decode("utf-8", "replace")
+
+        if not self.is_idle():
+            print(f"A job started while benchmarking hash mode {mode}; discarding the result")
+            return False
+
+        parsed = parse_benchmark_output(output)
+        entry = {
+            "mode": mode,
+            "name": parsed["name"],
+            "host": self.host,
+            "speed": parsed["speed"],
+            "devices": parsed["devices"],
+            "measured_at": datetime.now().isoformat(),
+            "duration": round(time.time() - start, 2),
+            "hashcat_version": self.hashcat_version(),
+            "status": BENCHMARK_OK,
+            "error": None
+        }
+        if returncode != 0 or not parsed["speed"]:
+            lines = output.strip().splitlines()
+            if returncode is None:
+                error = f"timed out after {self.timeout}s"
+            else:
+                error = lines[-1] if lines else f"hashcat exited with code {returncode}"
+            entry.update(status=BENCHMARK_FAILED, speed=None, error=error)
+            print(f"Failed to benchmark hash mode {mode}: {error}")
+        else:
+            print(f"Hash mode {mode} benchmarked at {parsed['speed']:.0f} H/s")
+        self._store(mode, entry)
+        return True
+
+
+_registry: Optional[HashBenchmarkRegistry] = None
+
+
+def get_benchmark_registry(**kwargs) -> HashBenchmarkRegistry:
+    """
+    The process-wide benchmark registry. The job runner creates it with its
+    idle check and hashcat binary; later callers get the same instance.
+    """
+    global _registry
+    if _registry is None:
+        _registry = HashBenchmarkRegistry(os.path.dirname(os.path.abspath(__file__)), **kwargs)
+    return _registry
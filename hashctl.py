@@ -34,21 +34,95 @@ class HashcatClient:
             response.raise_for_status()
             return response.json()
     
+    def upload_rules(self, file_path: str) -> Dict[str, Any]:
+        """Upload a rule file"""
+        url = f"{self.base_url}/api/upload/rules"
+        with open(file_path, "rb") as f:
+            files = {"rules": (os.path.basename(file_path), f)}
+            response = requests.post(url, files=files, auth=self.auth)
+            response.raise_for_status()
+            return response.json()
+    
+    def upload_masks(self, file_path: str) -> Dict[str, Any]:
+        """Upload an .hcmask file"""
+        url = f"{self.base_url}/api/upload/masks"
+        with open(file_path, "rb") as f:
+            files = {"masks": (os.path.basename(file_path), f)}
+            response = requests.post(url, files=files, auth=self.auth)
+            response.raise_for_status()
+            return response.json()
+    
+    def list_rules(self) -> List[Dict[str, Any]]:
+        """List catalogued rule files"""
+        url = f"{self.base_url}/api/rules"
+        response = requests.get(url, auth=self.auth)
+        response.raise_for_status()
+        return response.json()["rules"]
+    
+    def optimize_rules(self, filename: str, probe_wordlist: str = "") -> Dict[str, Any]:
+        """Write a copy of a rule file without duplicate and no-op rules"""
+        url = f"{self.base_url}/api/rules/{filename}/optimize"
+        response = requests.post(url, json={"probe_wordlist": probe_wordlist or None}, auth=self.auth)
+        response.raise_for_status()
+        return response.json()
+    
     def run_hashcat(self, hash_mode: str, attack_mode: str, hash_file: str, 
-                   wordlist: str, options: str = "") -> Dict[str, Any]:
-        """Start a hashcat job"""
+                   wordlist: str, options: str = "", dry_run: bool = False,
+                   deadline: str = "", priority: int = 0, queue_if_busy: bool = False,
+                   rule_file: str = "", mask: str = "", increment: bool = False,
+                   increment_min: int = 0, increment_max: int = 0, split_masks: bool = True) -> Dict[str, Any]:
+        """Start a hashcat job, or only estimate it with dry_run"""
         url = f"{self.base_url}/api/run/hashcat"
         data = {
             "hash_mode": hash_mode,
             "attack_mode": attack_mode,
             "hash_file": hash_file,
             "wordlist": wordlist,
-            "options": options
+            "options": options,
+            "dry_run": dry_run,
+            "deadline": deadline,
+            "priority": priority,
+            "queue_if_busy": queue_if_busy,
+            "rule_file": rule_file,
+            "mask": mask,
+            "increment": increment,
+            "increment_min": increment_min,
+            "increment_max": increment_max,
+            "split_masks": split_masks
         }
         response = requests.post(url, data=data, auth=self.auth)
         response.raise_for_status()
         return response.json()
     
+    def run_pipeline(self, hash_mode: str, hash_file: str, stages: List[Dict[str, str]],
+                     priority: int = 0, deadline: str = "") -> Dict[str, Any]:
+        """Start a multi-stage pipeline"""
+        url = f"{self.base_url}/api/pipelines"
+        data = {
+            "hash_mode": hash_mode,
+            "hash_file": hash_file,
+            "stages": stages,
+            "priority": priority,
+            "deadline": deadline or None
+        }
+        response = requests.post(url, json=data, auth=self.auth)
+        response.raise_for_status()
+        return response.json()
+    
+    def get_pipeline(self, pipeline_id: str) -> Dict[str, Any]:
+        """Get pipeline details"""
+        url = f"{self.base_url}/api/pipelines/{pipeline_id}"
+        response = requests.get(url, auth=self.auth)
+        response.raise_for_status()
+        return response.json()["pipeline"]
+    
+    def get_job_group(self, group_id: str) -> Dict[str, Any]:
+        """Get the jobs of a split brute-force attack"""
+        url = f"{self.base_url}/api/job-groups/{group_id}"
+        response = requests.get(url, auth=self.auth)
+        response.raise_for_status()
+        return response.json()["group"]
+    
     def list_jobs(self) -> List[Dict[str, Any]]:
         """List all jobs"""
         url = f"{self.base_url}/api/jobs"
@@ -76,6 +150,20 @@ class HashcatClient:
         else:
             return response.text
     
+    def pause_job(self, job_id: str) -> Dict[str, Any]:
+        """Stop a running job at its next checkpoint"""
+        url = f"{self.base_url}/api/jobs/{job_id}/pause"
+        response = requests.post(url, auth=self.auth)
+        response.raise_for_status()
+        return response.json()
+    
+    def resume_job(self, job_id: str) -> Dict[str, Any]:
+        """Resume a paused or interrupted job from its checkpoint"""
+        url = f"{self.base_url}/api/jobs/{job_id}/resume"
+        response = requests.post(url, auth=self.auth)
+        response.raise_for_status()
+        return response.json()
+    
     def delete_job(self, job_id: str) -> Dict[str, Any]:
         """Delete a job"""
         url = f"{self.base_url}/api/jobs/{job_id}"
@@ -102,13 +190,47 @@ def main():
     upload_wordlist_parser = subparsers.add_parser("upload-wordlist", help="Upload a wordlist file")
     upload_wordlist_parser.add_argument("file", help="Path to wordlist file")
     
+    # Rule file commands
+    upload_rules_parser = subparsers.add_parser("upload-rules", help="Upload a rule file")
+    upload_rules_parser.add_argument("file", help="Path to rule file")
+    upload_masks_parser = subparsers.add_parser("upload-masks", help="Upload an .hcmask file")
+    upload_masks_parser.add_argument("file", help="Path to .hcmask file")
+    subparsers.add_parser("rules", help="List rule files")
+    optimize_parser = subparsers.add_parser("optimize-rules", help="Remove duplicate and no-op rules from a rule file")
+    optimize_parser.add_argument("filename", help="Rule file name (already uploaded)")
+    optimize_parser.add_argument("--probe-wordlist", default="", help="Also compare rules on the start of this wordlist")
+    
     # Run hashcat command
     run_parser = subparsers.add_parser("run", help="Run a hashcat job")
     run_parser.add_argument("--hash-mode", "-m", required=True, help="Hash mode")
     run_parser.add_argument("--attack-mode", "-a", required=True, help="Attack mode")
     run_parser.add_argument("--hash-file", required=True, help="Hash file name (already uploaded)")
-    run_parser.add_argument("--wordlist", required=True, help="Wordlist file name (already uploaded)")
+    run_parser.add_argument("--wordlist", default="", help="Wordlist file name (already uploaded); not used by -a 3")
+    run_parser.add_argument("--mask", default="", help="Mask (e.g. ?u?l?l?l?d?d) or .hcmask file name (already uploaded) for -a 3, 6 and 7")
+    run_parser.add_argument("--increment", action="store_true", help="Also try the mask's shorter lengths")
+    run_parser.add_argument("--increment-min", type=int, default=0, help="Shortest length tried with --increment")
+    run_parser.add_argument("--increment-max", type=int, default=0, help="Longest length tried with --increment")
+    run_parser.add_argument("--no-split", action="store_true", help="Run a long brute-force attack as one job")
     run_parser.add_argument("--options", default="", help="Additional hashcat options")
+    run_parser.add_argument("--rules", default="", help="Rule file name (already uploaded)")
+    run_parser.add_argument("--dry-run", action="store_true", help="Only estimate keyspace and runtime")
+    run_parser.add_argument("--deadline", default="", help="Finish-by time (ISO 8601) for the deadline queue policy")
+    run_parser.add_argument("--priority", type=int, default=0, help="Higher priority jobs run first and may preempt lower ones")
+    run_parser.add_argument("--queue", action="store_true", help="Queue the job if another job is running")
+    
+    # Pipeline commands
+    pipeline_parser = subparsers.add_parser("pipeline", help="Run attack stages in order over the hashes still uncracked")
+    pipeline_parser.add_argument("--hash-mode", "-m", required=True, help="Hash mode")
+    pipeline_parser.add_argument("--hash-file", required=True, help="Hash file name (already uploaded)")
+    pipeline_parser.add_argument("--stage", "-s", action="append", required=True,
+                                 help="ATTACK_MODE:WORDLIST[:OPTIONS] (a mask or .hcmask file instead of the wordlist "
+                                      "for -a 3), repeat for each stage in order")
+    pipeline_parser.add_argument("--deadline", default="", help="Finish-by time (ISO 8601) for the deadline queue policy")
+    pipeline_parser.add_argument("--priority", type=int, default=0, help="Priority of every stage job")
+    pipeline_get_parser = subparsers.add_parser("pipeline-get", help="Get pipeline progress")
+    pipeline_get_parser.add_argument("pipeline_id", help="Pipeline ID")
+    group_parser = subparsers.add_parser("group", help="Get the jobs of a split brute-force attack")
+    group_parser.add_argument("group_id", help="Job group ID")
     
     # List jobs command
     list_parser = subparsers.add_parser("list", help="List all jobs")
@@ -122,6 +244,12 @@ def main():
     output_parser.add_argument("job_id", help="Job ID")
     output_parser.add_argument("--output", "-o", help="Output file path")
     
+    # Pause and resume commands
+    pause_parser = subparsers.add_parser("pause", help="Pause a running job at its next checkpoint")
+    pause_parser.add_argument("job_id", help="Job ID")
+    resume_parser = subparsers.add_parser("resume", help="Resume a paused job")
+    resume_parser.add_argument("job_id", help="Job ID")
+    
     # Delete job command
     delete_parser = subparsers.add_parser("delete", help="Delete a job")
     delete_parser.add_argument("job_id", help="Job ID")
@@ -142,15 +270,89 @@ def main():
             result = client.upload_wordlist(args.file)
             print(f"Uploaded wordlist as: {result['filename']}")
         
+        elif args.command == "upload-rules":
+            result = client.upload_rules(args.file)
+            print(f"Uploaded rule file as: {result['filename']} ({result['rule_count']} rules)")
+        
+        elif args.command == "upload-masks":
+            result = client.upload_masks(args.file)
+            print(f"Uploaded mask file as: {result['filename']} ({result['mask_count']} masks)")
+        
+        elif args.command == "rules":
+            for entry in client.list_rules():
+                line = f"{entry['filename']}: {entry['rule_count']} rules"
+                if entry.get("optimized_from"):
+                    line += f" (optimized from {entry['optimized_from']})"
+                print(line)
+        
+        elif args.command == "optimize-rules":
+            result = client.optimize_rules(args.filename, args.probe_wordlist)
+            report = result["optimization"]
+            print(f"Wrote {result['filename']}: {report['rules']} -> {report['kept']} rules "
+                  f"({report['duplicates']} duplicate, {report['noops']} no-op, {report['unparsed']} kept unparsed)")
+        
         elif args.command == "run":
             result = client.run_hashcat(
                 args.hash_mode, 
                 args.attack_mode, 
                 args.hash_file, 
                 args.wordlist, 
-                args.options
+                args.options,
+                args.dry_run,
+                args.deadline,
+                args.priority,
+                args.queue,
+                args.rules,
+                args.mask,
+                args.increment,
+                args.increment_min,
+                args.increment_max,
+                not args.no_split
             )
-            print(f"Started job {result['job_id']} with status: {result['status']}")
+            estimate = result.get("estimate") or {}
+            if estimate:
+                print(f"Keyspace: {estimate['candidates'] or '?'} candidates, "
+                      f"estimated runtime: {estimate['estimated_runtime']}")
+            for number, shard in enumerate(result.get("shards") or [], 1):
+                span = f" --skip={shard['skip']} --limit={shard['limit']}" if shard["skip"] is not None else ""
+                print(f"  Job {number}: {len(shard['masks'])} mask(s) from {shard['masks'][0]}{span}, "
+                      f"{shard['candidates']} candidates, {shard['estimated_runtime']}")
+            if not args.dry_run:
+                print(f"Started job {result['job_id']} with status: {result['status']}")
+                if result.get("group_id"):
+                    print(f"Split into {len(result['job_ids'])} jobs, group {result['group_id']}")
+        
+        elif args.command == "pipeline":
+            stages = []
+            for spec in args.stage:
+                parts = spec.split(":", 2)
+                if len(parts) < 2:
+                    parser.error(f"Stage must be ATTACK_MODE:WORDLIST[:OPTIONS], got {spec}")
+                stage = {"attack_mode": parts[0], "options": parts[2] if len(parts) > 2 else ""}
+                stage["mask" if parts[0] == "3" else "wordlist"] = parts[1]
+                stages.append(stage)
+            result = client.run_pipeline(args.hash_mode, args.hash_file, stages, args.priority, args.deadline)
+            print(f"Started pipeline {result['pipeline_id']} with {len(stages)} stage(s)")
+        
+        elif args.command == "pipeline-get":
+            pipeline = client.get_pipeline(args.pipeline_id)
+            print(f"Pipeline ID: {pipeline['id']}")
+            print(f"Status: {pipeline['status']}")
+            print(f"Cracked: {pipeline['cracked_count']} / {pipeline['total_hashes']}")
+            for number, stage in enumerate(pipeline["stages"], 1):
+                attack = " ".join(part for part in (stage["wordlist"], stage.get("mask")) if part)
+                print(f"  Stage {number}: -a {stage['attack_mode']} {attack} {stage['options']}".rstrip())
+                print(f"    Status: {stage['status']}, cracked {stage['cracked_count']} of {stage['hashes']} remaining"
+                      + (f" (job {stage['job_id']})" if stage.get("job_id") else ""))
+        
+        elif args.command == "group":
+            group = client.get_job_group(args.group_id)
+            print(f"Group ID: {group['id']}")
+            print(f"Status: {group['status']}")
+            print(f"Jobs finished: {group['finished']} / {group['shards']}")
+            print(f"Cracked: {group['cracked_count']} / {group['total_hashes']}")
+            for job in group["jobs"]:
+                print(f"  {job['id']}: {job['status']} {job['wordlist']} {job['options']}".rstrip())
         
         elif args.command == "list":
             jobs = client.list_jobs()
@@ -188,6 +390,14 @@ def main():
             else:
                 print(output)  # This will be the success message
         
+        elif args.command == "pause":
+            client.pause_job(args.job_id)
+            print(f"Job {args.job_id} will pause at its next checkpoint")
+        
+        elif args.command == "resume":
+            result = client.resume_job(args.job_id)
+            print(f"Resumed job {args.job_id} with status: {result['status']}")
+        
         elif args.command == "delete":
             result = client.delete_job(args.job_id)
             print(f"Deleted job {args.job_id}")
@@ -197,7 +407,14 @@ def main():
             sys.exit(1)
     
     except requests.exceptions.RequestException as e:
-        print(f"Error: {str(e)}", file=sys.stderr)
+        # Show the server's reason, e.g. a job refused for exceeding the runtime budget
+        detail = None
+        if e.response is not None:
+            try:
+                detail = e.response.json().get("detail")
+            except ValueError:
+                pass
+        print(f"Error: {detail or str(e)}", file=sys.stderr)
         sys.exit(1)
 
 if __name__ == "__main__":
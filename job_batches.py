@@ -0,0 +1,54 @@
+import os
+from typing import Dict, List, Any
+
+from potfile_manager import normalize_hash, read_hash_lines
+
+# Queued jobs can share one hashcat run when all of these match: hashcat then
+# makes a single pass over the candidates for the union of their hashlists
+BATCH_KEYS = ("hash_mode", "attack_mode", "wordlist_path", "mask", "options")
+
+
+def batch_key(job: Dict[str, Any]) -> tuple:
+    """What a job's hashcat invocation looks like apart from its hashlist"""
+    return tuple((job.get(key) or "").strip() for key in BATCH_KEYS)
+
+
+def select_batch(lead: Dict[str, Any], queued: List[Dict[str, Any]], max_jobs: int) -> List[Dict[str, Any]]:
+    """
+    Queued jobs that can join the lead's run, in the order given. Jobs with
+    a checkpoint resume their own run and are never batched.
+    """
+    key = batch_key(lead)
+    members = []
+    for job in queued:
+        if len(members) + 1 >= max_jobs:
+            break
+        if job is lead or job.get("checkpointed") or batch_key(job) != key:
+            continue
+        members.append(job)
+    return members
+
+
+def build_route(jobs: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Normalized hash -> ids of the jobs whose hashlists contain it"""
+    route: Dict[str, List[str]] = {}
+    for job in jobs:
+        for value in read_hash_lines(job.get("hash_file_path")):
+            owners = route.setdefault(normalize_hash(value), [])
+            if job["id"] not in owners:
+                owners.append(job["id"])
+    return route
+
+
+def write_batch_hashlist(path: str, jobs: List[Dict[str, Any]]) -> int:
+    """Write the deduplicated union of the jobs' hashlists; returns the hash count"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    seen = set()
+    with open(path, "w") as f:
+        for job in jobs:
+            for value in read_hash_lines(job.get("hash_file_path")):
+                key = normalize_hash(value)
+                if key not in seen:
+                    seen.add(key)
+                    f.write(value + "\n")
+    return len(seen)
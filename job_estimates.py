@@ -0,0 +1,225 @@
+import os
+import shlex
+import threading
+import subprocess
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
+
+from settings import get_settings_manager
+from wordlist_catalog import count_lines
+from mask_attacks import expand_masks, increment_range
+
+# Modes where every hash carries its own salt: hashcat's -b speed is for a
+# single salt, so the attack takes roughly one full pass per hash
+SALTED_MODES = {
+    "10", "20", "110", "120", "400", "500", "1410", "1420", "1710", "1720", "1800",
+    "2500", "2611", "3200", "5500", "5600", "7400", "7500", "10000", "11600",
+    "12500", "13100", "13400", "15700", "16800", "18200", "22000", "22001",
+}
+
+# Units for human-readable runtimes, largest first
+DURATION_UNITS = (("y", 365 * 86400), ("d", 86400), ("h", 3600), ("m", 60), ("s", 1))
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Two most significant units of a duration, e.g. "40d 2h" or "3m 12s" """
+    if seconds is None:
+        return "unknown"
+    seconds = int(round(seconds))
+    parts = []
+    for suffix, size in DURATION_UNITS:
+        if seconds >= size or (suffix == "s" and not parts):
+            parts.append(f"{seconds // size}{suffix}")
+            seconds %= size
+        if len(parts) == 2:
+            break
+    return " ".join(parts)
+
+
+def rule_files(options: str) -> List[str]:
+    """Rule files passed with -r/--rules-file in a hashcat option string"""
+    try:
+        tokens = shlex.split(options or "")
+    except ValueError:
+        return []
+    files = []
+    for i, token in enumerate(tokens):
+        if token in ("-r", "--rules-file") and i + 1 < len(tokens):
+            files.append(tokens[i + 1])
+        elif token.startswith("--rules-file="):
+            files.append(token.split("=", 1)[1])
+        elif token.startswith("-r") and len(token) > 2 and not token.startswith("--"):
+            files.append(token[2:])
+    return files
+
+
+def count_rules(path: str) -> int:
+    """Rules in a rule file, ignoring blank lines and comments"""
+    count = 0
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                count += 1
+    return count
+
+
+class JobEstimator:
+    """
+    Keyspace and runtime estimates for a job before it is submitted.
+
+    The base keyspace comes from `hashcat --keyspace` (falling back to the
+    wordlist's line count for straight attacks), multiplied by the rule count
+    of each -r file. Runtime is the candidate count over the hash mode's
+    measured benchmark speed, times the number of hashes for salted modes.
+    Mask candidates are counted per mask from the charsets, since hashcat's
+    keyspace for masks is only the part it splits work on.
+    Keyspaces are cached per attack, wordlist version and options.
+    """
+    def __init__(self, base_dir: str, hashcat_bin: str = "hashcat", benchmarks=None, wordlist_catalog=None):
+        self.base_dir = base_dir
+        self.hashcat_bin = hashcat_bin
+        self.benchmarks = benchmarks
+        self.wordlist_catalog = wordlist_catalog
+        self.timeout = 60
+        self.cache_size = 256
+        self._keyspaces: "OrderedDict[tuple, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _resolve(self, path: str) -> str:
+        return path if os.path.isabs(path) else os.path.join(self.base_dir, path)
+
+    def keyspace(self, hash_mode: str, attack_mode: str, wordlist_abs: str, options: str = "") -> Tuple[Optional[int], Optional[str]]:
+        """Base keyspace of an attack and an error message if it could not be determined"""
+        try:
+            stat = os.stat(wordlist_abs)
+        except OSError as e:
+            return None, str(e)
+        key = (str(attack_mode), wordlist_abs, stat.st_size, stat.st_mtime, options or "")
+        with self._lock:
+            if key in self._keyspaces:
+                self._keyspaces.move_to_end(key)
+                return self._keyspaces[key], None
+
+        keyspace, error = self._hashcat_keyspace(hash_mode, attack_mode, wordlist_abs, options)
+        if keyspace is None and str(attack_mode) == "0":
+            # Straight attacks try every line, so the line count is a close bound
+            entry = self.wordlist_catalog.get(os.path.basename(wordlist_abs)) if self.wordlist_catalog else None
+            keyspace = entry.get("line_count") if entry else None
+            if keyspace is None:
+                keyspace = count_lines(wordlist_abs)
+            error = None
+
+        if keyspace is not None:
+            with self._lock:
+                self._keyspaces[key] = keyspace
+                while len(self._keyspaces) > self.cache_size:
+                    self._keyspaces.popitem(last=False)
+        return keyspace, error
+
+    def mask_keyspace(self, hash_mode: str, mask: str, options: str = "") -> Tuple[Optional[int], Optional[str]]:
+        """hashcat's base keyspace of a single brute-force mask, the range --skip/--limit count in"""
+        key = ("3", mask, None, None, options or "")
+        with self._lock:
+            if key in self._keyspaces:
+                self._keyspaces.move_to_end(key)
+                return self._keyspaces[key], None
+        keyspace, error = self._hashcat_keyspace(hash_mode, "3", mask, options)
+        if keyspace is not None:
+            with self._lock:
+                self._keyspaces[key] = keyspace
+                while len(self._keyspaces) > self.cache_size:
+                    self._keyspaces.popitem(last=False)
+        return keyspace, error
+
+    def _hashcat_keyspace(self, hash_mode: str, attack_mode: str, wordlist_abs: str,
+                          options: str) -> Tuple[Optional[int], Optional[str]]:
+        try:
+            extra = shlex.split(options or "")
+        except ValueError as e:
+            return None, f"Invalid options: {str(e)}"
+        cmd = [self.hashcat_bin, "--keyspace", "--quiet", "-m", str(hash_mode), "-a", str(attack_mode),
+               wordlist_abs] + extra
+        try:
+            result = subprocess.run(cmd, cwd=self.base_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    text=True, timeout=self.timeout, check=False)
+        except subprocess.TimeoutExpired:
+            return None, f"hashcat --keyspace timed out after {self.timeout}s"
+        except OSError as e:
+            return None, str(e)
+        lines = (result.stdout or "").strip().splitlines()
+        # The keyspace is the last line; anything else is a warning or an error
+        if result.returncode == 0 and lines and lines[-1].strip().isdigit():
+            return int(lines[-1].strip()), None
+        return None, lines[-1] if lines else f"hashcat exited with code {result.returncode}"
+
+    def estimate(self, hash_mode: str, attack_mode: str, hash_file_abs: str, wordlist_abs: str,
+                 options: str = "", mask: Optional[str] = None) -> Dict[str, Any]:
+        """Keyspace, speed and estimated runtime of a job, and whether it exceeds the runtime budget"""
+        hash_mode, attack_mode = str(hash_mode), str(attack_mode)
+        estimate: Dict[str, Any] = {
+            "keyspace": None,
+            "rules": 1,
+            "candidates": None,
+            "hash_count": None,
+            "salted": hash_mode in SALTED_MODES,
+            "speed": None,
+            "estimated_seconds": None,
+            "estimated_runtime": "unknown",
+            "budget_seconds": None,
+            "over_budget": False,
+            "error": None
+        }
+
+        if mask:
+            # Brute force is the masks alone; hybrid attacks pair each word with every mask candidate
+            increment = increment_range(options)
+            try:
+                entries = expand_masks(mask, options, bool(increment), *(increment or (1, 0)))
+            except OSError as e:
+                entries = []
+                estimate["error"] = f"Cannot read mask file: {str(e)}"
+            estimate["masks"] = len(entries)
+            estimate["mask_candidates"] = sum(entry["candidates"] for entry in entries)
+            if attack_mode == "3":
+                keyspace = estimate["mask_candidates"]
+            else:
+                keyspace, error = self.keyspace(hash_mode, "0", wordlist_abs)
+                estimate["error"] = estimate["error"] or error
+                if keyspace is not None:
+                    keyspace *= estimate["mask_candidates"]
+        else:
+            keyspace, error = self.keyspace(hash_mode, attack_mode, wordlist_abs, options)
+            estimate["error"] = error
+        estimate["keyspace"] = keyspace
+
+        for path in rule_files(options):
+            try:
+                estimate["rules"] *= max(count_rules(self._resolve(path)), 1)
+            except OSError as e:
+                estimate["error"] = f"Cannot read rule file {path}: {str(e)}"
+        if keyspace is not None:
+            estimate["candidates"] = keyspace * estimate["rules"]
+
+        try:
+            estimate["hash_count"] = count_lines(hash_file_abs)
+        except OSError:
+            pass
+
+        if self.benchmarks is not None:
+            estimate["speed"] = self.benchmarks.get_speed(hash_mode)
+            if estimate["speed"] is None:
+                # Measure it for next time
+                self.benchmarks.ensure(hash_mode)
+
+        if estimate["candidates"] is not None and estimate["speed"]:
+            passes = max(estimate["hash_count"] or 1, 1) if estimate["salted"] else 1
+            estimate["estimated_seconds"] = round(estimate["candidates"] * passes / estimate["speed"], 3)
+            estimate["estimated_runtime"] = format_duration(estimate["estimated_seconds"])
+
+        budget_hours = get_settings_manager().get_setting("jobs", "max_estimated_runtime_hours", 0)
+        if budget_hours:
+            estimate["budget_seconds"] = budget_hours * 3600
+            estimate["over_budget"] = (estimate["estimated_seconds"] is not None
+                                       and estimate["estimated_seconds"] > estimate["budget_seconds"])
+        return estimate
@@ -0,0 +1,379 @@
+import os
+import re
+import json
+import time
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from job_timeseries import FIELD_PATTERN
+
+# Lines of hashcat's status screen, e.g. "Speed.#1.........: 1234.5 MH/s"
+STATUS_LINE_PATTERN = re.compile(r"^[A-Za-z][A-Za-z0-9.#*]*\.{2,}:")
+
+# The prompt hashcat redraws after each status screen
+PROMPT_PREFIX = "[s]tatus [p]ause"
+
+# nohup output is written through split(1) into chunks of this many lines,
+# <output>.log.aaaaaa, <output>.log.aaaaab, ...; a chunk is complete once the next exists
+LOG_CHUNK_LINES = 20000
+LOG_CHUNK_SUFFIX = re.compile(r"^\.[a-z]{6}(\.gz)?$")
+
+
+def log_chunks(path: str, compressed: bool = False) -> List[str]:
+    """
+    A nohup log's chunk files in order, after the log itself if it was written
+    whole. With compressed, chunks the retention service gzipped are included.
+    """
+    directory, name = os.path.split(path)
+    try:
+        names = os.listdir(directory or ".")
+    except OSError:
+        return []
+    chunks = sorted(os.path.join(directory, entry) for entry in names
+                    if entry.startswith(name) and LOG_CHUNK_SUFFIX.match(entry[len(name):])
+                    and (compressed or not entry.endswith(".gz")))
+    return ([path] if os.path.isfile(path) else []) + chunks
+
+
+def is_status_line(line: str) -> bool:
+    """Whether a line belongs to a status screen rather than being a message worth keeping"""
+    stripped = line.strip()
+    return (bool(STATUS_LINE_PATTERN.match(stripped)) or stripped.startswith(PROMPT_PREFIX)
+            or (stripped.startswith("{") and '"progress"' in stripped))
+
+
+def status_fields(block: List[str]) -> Dict[str, str]:
+    """A status block as {field: value}, e.g. {"Status": "Running", "Speed.#1": "1234.5 MH/s"}"""
+    fields = {}
+    for line in block:
+        stripped = line.strip()
+        if stripped.startswith("{"):
+            try:
+                return {key: json.dumps(value) if isinstance(value, (list, dict)) else str(value)
+                        for key, value in json.loads(stripped).items()}
+            except ValueError:
+                continue
+        match = FIELD_PATTERN.match(stripped)
+        if match:
+            fields[match.group(1)] = match.group(2).strip()
+    return fields
+
+
+def split_output(lines: List[str]) -> Tuple[List[str], List[List[str]]]:
+    """
+    Split hashcat output into the lines worth keeping and its status blocks.
+
+    A status block starts at a "Session" field (or is a single --status-json
+    line) and runs over the status fields that follow. Blank lines and the
+    interactive prompt are dropped.
+    """
+    messages: List[str] = []
+    blocks: List[List[str]] = []
+    current: Optional[List[str]] = None
+    for raw in lines:
+        line = raw.rstrip()
+        stripped = line.strip()
+        if not stripped:
+            current = None
+            continue
+        if stripped.startswith("{") and '"progress"' in stripped:
+            blocks.append([stripped])
+            current = None
+        elif stripped.startswith(PROMPT_PREFIX):
+            current = None
+        elif STATUS_LINE_PATTERN.match(stripped):
+            if stripped.startswith("Session.") or current is None:
+                current = []
+                blocks.append(current)
+            current.append(line)
+        else:
+            current = None
+            messages.append(line)
+    return messages, blocks
+
+
+class JobOutputLog:
+    """
+    Bounded, structured record of one job's console output.
+
+    Keeps the latest status block, a downsampled history of status blocks
+    (every `stride`-th block; when the history fills, every other entry is
+    dropped and the stride doubles, so it spans the whole run at an even
+    resolution) and every other line hashcat printed: warnings, errors,
+    cracks and start/stop messages. Past max_lines, the first half is kept
+    and the rest is a window of the most recent lines.
+    """
+    def __init__(self, history_capacity: int = 120, max_lines: int = 2000):
+        self.history_capacity = max(2, history_capacity)
+        self.max_lines = max(2, max_lines)
+        self.latest: List[str] = []
+        self.history: List[Dict[str, Any]] = []
+        self.stride = 1
+        self.blocks_seen = 0
+        self.lines: List[str] = []
+        self.omitted = 0
+        # What was last seen of the console: the screen of a tmux/screen
+        # session, or the nohup log chunk being read, the offset in it and
+        # its unfinished line
+        self.run = None
+        self.screen: List[str] = []
+        self.chunk: Optional[str] = None
+        self.offset = 0
+        self.partial = ""
+        # What the last feed added: its new lines and the latest status block
+        self.recent: List[str] = []
+
+    def _add_lines(self, lines: List[str]) -> None:
+        self.lines.extend(lines)
+        head = self.max_lines // 2
+        if len(self.lines) > self.max_lines:
+            excess = len(self.lines) - self.max_lines
+            del self.lines[head:head + excess]
+            self.omitted += excess
+
+    def _add_block(self, block: List[str]) -> None:
+        if block == self.latest:
+            return
+        self.latest = list(block)
+        if self.blocks_seen % self.stride == 0:
+            self.history.append({"t": round(time.time(), 1), "fields": status_fields(block)})
+            if len(self.history) >= self.history_capacity:
+                self.history = self.history[::2]
+                self.stride *= 2
+        self.blocks_seen += 1
+
+    def _new_run(self, run: Any) -> None:
+        if run != self.run:
+            self.run = run
+            self.screen = []
+
+    def feed_screen(self, lines: List[str], run: Any = None) -> None:
+        """
+        Take a capture of a session's screen. Lines that were already on the
+        previous capture are not added again; hashcat's redrawn status screen
+        only updates the latest block and the history.
+        """
+        self._new_run(run)
+        messages, blocks = split_output(lines)
+        seen = Counter(split_output(self.screen)[0])
+        new = []
+        for line in messages:
+            if seen[line] > 0:
+                seen[line] -= 1
+            else:
+                new.append(line)
+        self._add_lines(new)
+        if blocks:
+            # The bottom block may have been captured while hashcat was still printing it
+            latest = blocks[-1]
+            if len(blocks) > 1 and len(latest) < len(blocks[-2]):
+                latest = blocks[-2]
+            self._add_block(latest)
+        self.screen = list(lines)
+        self.recent = new + self.latest
+
+    def feed_log(self, path: str, run: Any = None) -> None:
+        """
+        Read what a nohup log gained since the last call. Chunks that split(1)
+        has finished with (a later one exists) are read to the end and deleted,
+        so the log on disk stays within a chunk or two; nothing is truncated
+        while it is still being written.
+        """
+        self._new_run(run)
+        lines: List[str] = []
+        while True:
+            chunks = log_chunks(path)
+            if not chunks:
+                break
+            if self.chunk not in chunks:
+                # First read, or the chunk is gone: carry on with the next one
+                later = [chunk for chunk in chunks if self.chunk is None or chunk > self.chunk]
+                self.chunk, self.offset = (later or chunks)[0], 0
+            if os.path.getsize(self.chunk) < self.offset:
+                # Replaced: start over
+                self.offset, self.partial = 0, ""
+            with open(self.chunk, "rb") as f:
+                f.seek(self.offset)
+                data = f.read()
+            self.offset += len(data)
+            text = self.partial + data.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+            lines += text.split("\n")
+            self.partial = lines.pop()
+            index = chunks.index(self.chunk)
+            if index == len(chunks) - 1 or self.chunk == path:
+                break
+            # split only opens the next chunk once this one is full, so it is complete
+            os.remove(self.chunk)
+            self.chunk, self.offset = chunks[index + 1], 0
+
+        # Hold back the unfinished last line, and a status block hashcat has
+        # not finished printing (blocks end with a blank line)
+        lines.append(self.partial)
+        held = len(lines) - 1
+        while held > 0 and is_status_line(lines[held - 1]) and not lines[held - 1].strip().startswith("{"):
+            held -= 1
+        self.partial = "\n".join(lines[held:])
+        lines = lines[:held]
+        messages, blocks = split_output(lines)
+        self._add_lines(messages)
+        for block in blocks:
+            self._add_block(block)
+        self.recent = messages + (blocks[-1] if blocks else [])
+
+    def render(self) -> List[str]:
+        """The kept lines followed by the latest status block, as the job's output shows them"""
+        rendered = list(self.lines)
+        if self.omitted:
+            head = self.max_lines // 2
+            rendered.insert(head, f"[... {self.omitted} lines omitted ...]")
+        if self.latest:
+            rendered += [""] + self.latest
+        if self.partial.strip() and not is_status_line(self.partial.split("\n")[0]):
+            rendered.append(self.partial)
+        return rendered
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "latest": status_fields(self.latest),
+            "latest_block": self.latest,
+            "history": self.history,
+            "stride": self.stride,
+            "blocks_seen": self.blocks_seen,
+            "lines": self.lines,
+            "omitted": self.omitted,
+            "run": self.run,
+            "screen": self.screen,
+            "chunk": self.chunk,
+            "offset": self.offset,
+            "partial": self.partial,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], history_capacity: int = 120, max_lines: int = 2000) -> "JobOutputLog":
+        log = cls(history_capacity, max_lines)
+        log.latest = data.get("latest_block", [])
+        log.history = data.get("history", [])[-(log.history_capacity - 1):]
+        log.stride = data.get("stride", 1)
+        log.blocks_seen = data.get("blocks_seen", 0)
+        log.lines = data.get("lines", [])
+        log.omitted = data.get("omitted", 0)
+        log.run = data.get("run")
+        log.screen = data.get("screen", [])
+        log.chunk = data.get("chunk")
+        log.offset = data.get("offset", 0)
+        log.partial = data.get("partial", "")
+        return log
+
+
+class JobOutputStore:
+    """
+    Per-job JobOutputLogs for running jobs.
+
+    The monitor feeds each capture into the job's log and writes the rendered
+    view to the job's output file, so the file stays the same size however
+    long the job runs. The structured record is saved next to it as
+    outputs/hashcat_<job_id>.status.json, at most every save_interval seconds
+    while the job runs and again when it stops.
+    """
+    def __init__(self, base_dir: str, history_capacity: int = 120, max_lines: int = 2000):
+        self.output_dir = os.path.join(base_dir, "outputs")
+        self.history_capacity = history_capacity
+        self.max_lines = max_lines
+        self.save_interval = 30
+        self._logs: Dict[str, JobOutputLog] = {}
+        self._saved: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def path(self, job_id: str) -> str:
+        return os.path.join(self.output_dir, f"hashcat_{job_id}.status.json")
+
+    def _load(self, job_id: str) -> JobOutputLog:
+        """A job's log, continuing its saved record after a restart or resume"""
+        log = self._logs.get(job_id)
+        if log is not None:
+            return log
+        data = self._read(job_id)
+        log = JobOutputLog.from_dict(data, self.history_capacity, self.max_lines) if data \
+            else JobOutputLog(self.history_capacity, self.max_lines)
+        self._logs[job_id] = log
+        return log
+
+    def _read(self, job_id: str) -> Optional[Dict[str, Any]]:
+        path = self.path(job_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading status log for job {job_id}: {str(e)}")
+            return None
+
+    def _save(self, job_id: str, log: JobOutputLog, force: bool = False) -> None:
+        now = time.time()
+        if not force and now - self._saved.get(job_id, 0) < self.save_interval:
+            return
+        self._saved[job_id] = now
+        path = self.path(job_id)
+        try:
+            with open(f"{path}.tmp", "w") as f:
+                json.dump(log.to_dict(), f, separators=(",", ":"))
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            print(f"Error saving status log for job {job_id}: {str(e)}")
+
+    def record_screen(self, job_id: str, lines: List[str], run: Any = None) -> Tuple[List[str], List[str]]:
+        """Add a tmux/screen capture, returning the rendered output and what the capture added"""
+        with self._lock:
+            log = self._load(job_id)
+            log.feed_screen(lines, run)
+            self._save(job_id, log)
+            return log.render(), log.recent
+
+    def record_log(self, job_id: str, path: str, run: Any = None) -> Tuple[List[str], List[str]]:
+        """Add what a nohup log gained, returning the rendered output and the new lines"""
+        with self._lock:
+            log = self._load(job_id)
+            try:
+                log.feed_log(path, run)
+            except OSError as e:
+                print(f"Error reading nohup log: {str(e)}")
+                log.recent = []
+            self._save(job_id, log)
+            return log.render(), log.recent
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        """The job's latest status, status history and kept lines"""
+        with self._lock:
+            log = self._logs.get(job_id)
+            data = log.to_dict() if log is not None else self._read(job_id)
+        data = data or JobOutputLog().to_dict()
+        return {
+            "job_id": job_id,
+            "live": log is not None,
+            "latest": data["latest"],
+            "latest_block": data["latest_block"],
+            "stride": data["stride"],
+            "blocks_seen": data["blocks_seen"],
+            "history": data["history"],
+            "lines": data["lines"],
+            "omitted": data["omitted"],
+        }
+
+    def finalize(self, job_id: str) -> None:
+        """Save a stopped job's record and free its log"""
+        with self._lock:
+            log = self._logs.pop(job_id, None)
+            if log is not None:
+                self._save(job_id, log, force=True)
+            self._saved.pop(job_id, None)
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._logs.pop(job_id, None)
+            self._saved.pop(job_id, None)
+        try:
+            os.remove(self.path(job_id))
+        except OSError:
+            pass
@@ -1,14 +1,91 @@
 import os
+import re
 import json
 import uuid
 import time
 import subprocess
 import shlex
+import signal
 import threading
 import platform
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 
+from potfile_manager import PotfileManager, normalize_hash, read_hash_lines, split_pot_line
+from results_store import ResultsStore, OUTFILE_FORMAT
+from wordlist_catalog import WordlistCatalog
+from rule_catalog import RuleCatalog
+from job_timeseries import JobTimeSeriesStore
+from job_output import JobOutputStore, LOG_CHUNK_LINES, log_chunks
+from hash_benchmarks import get_benchmark_registry
+from job_estimates import JobEstimator, format_duration
+from scheduling import get_queue_policy, job_priority
+from job_batches import build_route, select_batch, write_batch_hashlist
+from pipelines import PipelineManager
+from output_retention import OutputRetention, compressed_path, open_output, output_exists
+from mask_attacks import (
+    charset_options, expand_masks, hcmask_line, increment_range, plan_shards, quote_arg, strip_mask_options
+)
+from settings import get_settings_manager
+from metrics import (
+    JOBS, JOB_TRANSITIONS, JOB_QUEUE_WAIT_SECONDS, JOB_RUN_SECONDS, JOB_COMPLETION_PARSE_SECONDS,
+    JOBS_SAVE_SECONDS, MONITORS_ACTIVE, MONITOR_LAG_SECONDS, SUBPROCESS_SPAWNS, SUBPROCESS_SECONDS,
+    LIVENESS_CHECKS, LIVENESS_CHECK_SECONDS, PROCESS_SCAN_SECONDS
+)
+
+# Job IDs appear in hashcat command lines as the session name and in output paths
+JOB_ID_PATTERN = re.compile(r"hashcat_([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})")
+
+# Status screen fields like "Time.Started.....: Mon Oct 19 12:00:01 2026"
+STATUS_FIELD_PATTERN = re.compile(r"^[A-Za-z][A-Za-z0-9.#]*\.{2,}:")
+
+# Scrollback taken with each tmux capture, so lines printed between checks are not missed
+CAPTURE_HISTORY_LINES = 200
+
+# The status hashcat reports once a run is over, or the time it stopped
+FINAL_STATUS_PATTERN = re.compile(
+    r"^(Status\.*:\s*(Cracked|Exhausted|Aborted|Quit|Bypass)|Stopped:)", re.MULTILINE)
+
+# The status of a run that got to the end of its keyspace or hashlist
+FINISHED_STATUS_PATTERN = re.compile(r"^Status\.*:\s*(Cracked|Exhausted)", re.MULTILINE)
+
+# Interpreters whose first argument is the script being run (e.g. the simulator)
+SCRIPT_INTERPRETERS = (b"python", b"perl", b"bash", b"sh")
+
+
+# Job statuses after which a job no longer runs
+ACTIVE_STATUSES = ("queued", "starting", "running", "interrupted", "paused", "batched")
+
+# Why a running job was asked to stop at its next checkpoint. Paused jobs wait
+# for a resume; preempted and time-sliced jobs go back into the queue.
+PAUSE_USER = "user"
+PAUSE_PREEMPTED = "preempted"
+PAUSE_TIME_SLICE = "time_slice"
+
+# Seconds a stopping nohup job waits for hashcat's next restore point (written
+# every 60 seconds) before it is sent SIGINT regardless
+RESTORE_POINT_WAIT = 90
+
+# Statuses of jobs that exist but have no hashcat process of their own
+# (a batched job is cracked by its batch lead's run)
+PARKED_STATUSES = ("queued", "paused", "interrupted", "batched")
+
+
+def run_subprocess(cmd, **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run, counted and timed per program"""
+    program = os.path.basename(cmd.split(None, 1)[0] if isinstance(cmd, str) else cmd[0])
+    SUBPROCESS_SPAWNS.labels(program).inc()
+    start = time.perf_counter()
+    try:
+        return subprocess.run(cmd, **kwargs)
+    finally:
+        SUBPROCESS_SECONDS.labels(program).observe(time.perf_counter() - start)
+
+
+def get_hashcat_binary() -> str:
+    """The hashcat executable: $HASHCAT_BINARY, the jobs.hashcat_binary setting, or hashcat on the PATH"""
+    return os.environ.get("HASHCAT_BINARY") or get_settings_manager().get_setting("jobs", "hashcat_binary", "hashcat")
+
 class HashcatJobRunner:
     """
     Class for managing hashcat jobs in a tmux/screen session
@@ -18,10 +95,15 @@ class HashcatJobRunner:
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
         self.jobs_file = os.path.join(self.base_dir, "jobs.json")
         self.jobs: Dict[str, Dict[str, Any]] = {}
+        # Serializes writes of jobs.json from the monitor, queue, results and retention threads
+        self._save_lock = threading.Lock()
         self._load_jobs()
         
+        # Real hashcat, or a stand-in such as benchmarks/hashcat_simulator.py
+        self.hashcat_binary = get_hashcat_binary()
+        
         # Create necessary directories with absolute paths
-        for dir_name in ["uploads", "hashes", "wordlists", "outputs", "potfiles"]:
+        for dir_name in ["uploads", "hashes", "wordlists", "outputs", "potfiles", "restore", "batches", "pipelines", "rules", "masks"]:
             dir_path = os.path.join(self.base_dir, dir_name)
             try:
                 os.makedirs(dir_path, exist_ok=True)
@@ -29,6 +111,36 @@ class HashcatJobRunner:
                 print(f"WARNING: Permission denied creating directory: {dir_path}")
                 print(f"The application may not function correctly without write permissions.")
         
+        # Per-job potfiles and the single writer of the global potfile
+        self.potfile_manager = PotfileManager(self.base_dir)
+        
+        # Indexed store of cracked results, fed from each job's outfile
+        self.results_store = ResultsStore(on_ingest=self._on_results_ingested)
+        
+        # Per-job speed/progress history, compacted to disk when a job finishes
+        self.timeseries = JobTimeSeriesStore(
+            self.base_dir, capacity=get_settings_manager().get_setting("jobs", "timeseries_samples", 720))
+        
+        # Bounded console output: latest status block, sampled status history and every other line
+        self.output_logs = JobOutputStore(
+            self.base_dir,
+            history_capacity=get_settings_manager().get_setting("jobs", "status_history_blocks", 120),
+            max_lines=get_settings_manager().get_setting("jobs", "output_max_lines", 2000))
+        
+        # Wordlist metadata and background dictstat warming on idle capacity
+        self.wordlist_catalog = WordlistCatalog(self.base_dir, is_idle=self.is_idle,
+                                                hashcat_bin=self.hashcat_binary)
+        
+        # Uploaded rule files, and optimized copies without duplicate or no-op rules
+        self.rule_catalog = RuleCatalog(self.base_dir)
+        
+        # Measured hashcat -b speeds per hash mode, taken while idle
+        self.hash_benchmarks = get_benchmark_registry(is_idle=self.is_idle, hashcat_bin=self.hashcat_binary)
+        
+        # Keyspace and runtime estimates from hashcat --keyspace and the measured speeds
+        self.estimator = JobEstimator(self.base_dir, hashcat_bin=self.hashcat_binary,
+                                      benchmarks=self.hash_benchmarks, wordlist_catalog=self.wordlist_catalog)
+        
         # Use current user's home directory for hashcat cache
         try:
             # Get current user's home directory
@@ -47,6 +159,21 @@ class HashcatJobRunner:
         except Exception as e:
             print(f"Error setting up hashcat cache directories: {str(e)}")
             print("Dictionary cache may not work correctly.")
+        
+        # Multi-stage attacks, each stage a job over the hashes still uncracked
+        self.pipelines = PipelineManager(self)
+        
+        # Serializes starting queued jobs when several slots free up at once
+        self._queue_lock = threading.RLock()
+        
+        # Compresses finished jobs' logs and enforces the age and size limits on outputs/
+        self.retention = OutputRetention(self)
+        
+        # Jobs by status, computed when /metrics is scraped
+        JOBS.set_function(self._count_jobs_by_status)
+        
+        # Reattach, resume or finalize jobs that were running when the server last stopped
+        self._reconcile_jobs()
     
     def _load_jobs(self):
         """Load jobs from file"""
@@ -64,13 +191,58 @@ class HashcatJobRunner:
             self.jobs = {}
     
     def _save_jobs(self):
-        """Save jobs to file"""
+        """
+        Save jobs to file. The jobs are serialized first and written to a
+        temporary file that replaces jobs.json, so a save that fails or races
+        another thread never leaves a truncated file behind.
+        """
+        tmp_path = f"{self.jobs_file}.tmp"
         try:
-            with open(self.jobs_file, "w") as f:
-                json.dump(self.jobs, f, indent=2)
+            with self._save_lock, JOBS_SAVE_SECONDS.time():
+                for attempt in range(3):
+                    try:
+                        data = json.dumps(self.jobs, indent=2)
+                        break
+                    except RuntimeError:
+                        # Another thread added or removed a job or field mid-dump
+                        if attempt == 2:
+                            raise
+                with open(tmp_path, "w") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.jobs_file)
         except PermissionError:
             print(f"Error: Permission denied writing to jobs file: {self.jobs_file}")
             print(f"Job status will not be persisted. Check file permissions.")
+        except (OSError, RuntimeError) as e:
+            print(f"Error saving jobs file: {str(e)}")
+    
+    def _count_jobs_by_status(self) -> Dict[tuple, int]:
+        """Job counts keyed by status, for the hashcat_jobs gauge"""
+        counts: Dict[tuple, int] = {}
+        for job in list(self.jobs.values()):
+            key = (job.get("status", "unknown"),)
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+    
+    def _record_transition(self, job: Dict[str, Any], old_status: Optional[str], new_status: str):
+        """Count a status change and observe queue wait and run duration"""
+        if old_status == new_status:
+            return
+        JOB_TRANSITIONS.labels(old_status or "new", new_status).inc()
+        try:
+            if old_status == "queued" and new_status == "starting" and job.get("queued_at"):
+                waited = datetime.now() - datetime.fromisoformat(job["queued_at"])
+                JOB_QUEUE_WAIT_SECONDS.observe(waited.total_seconds())
+            elif old_status in ("starting", "running") and new_status not in ACTIVE_STATUSES and job.get("started_at"):
+                ran = datetime.now() - datetime.fromisoformat(job["started_at"])
+                JOB_RUN_SECONDS.labels(new_status).observe(ran.total_seconds())
+        except (TypeError, ValueError):
+            pass
+        if old_status in ("starting", "running") and new_status not in ("starting", "running") and job.get("id"):
+            self.timeseries.finalize(job["id"])
+            self.output_logs.finalize(job["id"])
+        if job.get("batch_members") and new_status not in ACTIVE_STATUSES:
+            self._finish_batch(job, new_status)
     
     def has_running_jobs(self) -> bool:
         """Check if there are any running jobs"""
@@ -78,23 +250,69 @@ class HashcatJobRunner:
             if job["status"] == "starting" or job["status"] == "running":
                 return True
         return False
+    
+    def slots(self) -> int:
+        """How many hashcat runs may go at once (general.max_concurrent_jobs)"""
+        try:
+            return max(1, int(get_settings_manager().get_setting("general", "max_concurrent_jobs", 1)))
+        except (TypeError, ValueError):
+            return 1
+    
+    def has_free_slot(self) -> bool:
+        """Check if another job can start without waiting for a running one"""
+        running = sum(1 for job in list(self.jobs.values()) if job["status"] in ("starting", "running"))
+        return running < self.slots()
+        
+    def is_idle(self) -> bool:
+        """Check if the scheduler has nothing running or waiting"""
+        for job in list(self.jobs.values()):
+            if job["status"] in ("starting", "running", "queued", "batched"):
+                return False
+        return True
         
-    def start_job(self, hash_mode: str, attack_mode: str, hash_file: str, wordlist: str, 
-                  options: str = "", auto_delete_hash: bool = False, queue_if_busy: bool = False) -> Dict[str, Any]:
-        """Start a new hashcat job or queue it if requested and another job is running"""
+    def estimate_job(self, hash_mode: str, attack_mode: str, hash_file: str, wordlist: Optional[str],
+                     options: str = "", mask: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Estimate a job's keyspace and runtime without starting it. A hashlist the
+        potfile already cracks in full needs no run (see start_job), so it is not
+        measured with hashcat --keyspace nor held to the runtime budget.
+        """
+        known = self._lookup_all_known(os.path.abspath(hash_file))
+        if known:
+            return {
+                "keyspace": 0, "rules": 1, "candidates": 0, "hash_count": len(known),
+                "salted": False, "speed": None, "estimated_seconds": 0,
+                "estimated_runtime": format_duration(0), "budget_seconds": None,
+                "over_budget": False, "error": None, "potfile_only": True
+            }
+        return self.estimator.estimate(hash_mode, attack_mode, os.path.abspath(hash_file),
+                                       os.path.abspath(wordlist) if wordlist else "", options, mask)
+    
+    def start_job(self, hash_mode: str, attack_mode: str, hash_file: str, wordlist: Optional[str], 
+                  options: str = "", auto_delete_hash: bool = False, queue_if_busy: bool = False,
+                  estimate: Optional[Dict[str, Any]] = None, deadline: Optional[str] = None,
+                  priority: int = 0, pipeline_id: Optional[str] = None,
+                  pipeline_stage: Optional[int] = None, mask: Optional[str] = None,
+                  shard_group: Optional[str] = None, shard_index: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Start a new hashcat job, or queue it if requested and every slot is
+        busy. mask is the brute-force mask or .hcmask file of -a 3, 6 and 7.
+        """
         job_id = str(uuid.uuid4())
         
         # Ensure we're using absolute paths
         output_dir = os.path.join(self.base_dir, "outputs")
         os.makedirs(output_dir, exist_ok=True)
         output_file = os.path.join(output_dir, f"hashcat_{job_id}.txt")
+        cracked_file = self._cracked_file_path(job_id)
         
         # Store the full paths in variables for the run_job function
         hash_file_abs = os.path.abspath(hash_file)
-        wordlist_abs = os.path.abspath(wordlist)
+        wordlist_abs = os.path.abspath(wordlist) if wordlist else None
+        mask_file = mask and os.path.isfile(mask)
         
-        # Check if any jobs are currently running
-        jobs_running = self.has_running_jobs()
+        # Check if every slot is taken
+        jobs_running = not self.has_free_slot()
         
         # Create job record
         job = {
@@ -102,24 +320,46 @@ class HashcatJobRunner:
             "status": "queued" if (jobs_running and queue_if_busy) else "starting",
             "hash_file": os.path.basename(hash_file),
             "hash_file_path": hash_file_abs,  # Store full path for easier reference
-            "wordlist": os.path.basename(wordlist),
+            "wordlist": os.path.basename(wordlist) if wordlist else (os.path.basename(mask) if mask_file else mask),
             "wordlist_path": wordlist_abs,    # Store full path for easier reference
+            "mask": os.path.abspath(mask) if mask_file else mask,
             "hash_mode": hash_mode,
             "attack_mode": attack_mode,
             "options": options,
             "output_file": output_file,
+            "cracked_file": cracked_file,
             "started_at": datetime.now().isoformat() if not (jobs_running and queue_if_busy) else None,
             "queued_at": datetime.now().isoformat() if (jobs_running and queue_if_busy) else None,
             "completed_at": None,
             "cracked_count": 0,
             "total_hashes": 0,
-            "auto_delete_hash": auto_delete_hash
+            "auto_delete_hash": auto_delete_hash,
+            "keyspace": estimate.get("candidates") if estimate else None,
+            "estimated_seconds": estimate.get("estimated_seconds") if estimate else None,
+            "deadline": deadline,
+            "priority": priority
         }
+        if pipeline_id:
+            job["pipeline_id"] = pipeline_id
+            job["pipeline_stage"] = pipeline_stage
+        if shard_group:
+            job["shard_group"] = shard_group
+            job["shard_index"] = shard_index
+        
+        # Fast path: if the potfile already knows every target hash, complete the
+        # job right away with its results attached and never spawn hashcat
+        known = self._lookup_all_known(hash_file_abs)
+        if known:
+            return self._complete_from_potfile(job, known)
         
         # Add job to record
         self.jobs[job_id] = job
+        self._record_transition(job, None, job["status"])
         self._save_jobs()
         
+        # Measure this hash mode's speed the next time the scheduler is idle
+        self.hash_benchmarks.ensure(hash_mode)
+        
         # If we're not queueing or no jobs are running, start immediately
         if not jobs_running or not queue_if_busy:
             # Start job in a separate thread
@@ -133,83 +373,241 @@ class HashcatJobRunner:
             # Job is queued for later execution
             return {"job_id": job_id, "status": "queued"}
             
+    def _lookup_all_known(self, hash_file: str) -> Dict[str, str]:
+        """Return the potfile entries for a hashlist, or {} unless every hash is known"""
+        # Don't hold up submission while the potfile index is still loading
+        if not self.potfile_manager.wait_until_ready(timeout=0):
+            return {}
+        try:
+            targets = read_hash_lines(hash_file)
+            if not targets:
+                return {}
+            known = self.potfile_manager.lookup(targets)
+            return known if len(known) == len(targets) else {}
+        except Exception as e:
+            print(f"Error checking potfile for {hash_file}: {str(e)}")
+            return {}
+    
+    def _complete_from_potfile(self, job: Dict[str, Any], known: Dict[str, str]) -> Dict[str, Any]:
+        """Complete a job synchronously from potfile entries alone"""
+        job_id = job["id"]
+        now = datetime.now().isoformat()
+        job.update({
+            "status": "completed_success",
+            "started_at": now,
+            "queued_at": None,
+            "completed_at": now,
+            "cracked_count": len(known),
+            "total_hashes": len(known),
+            "potfile_only": True
+        })
+        self.jobs[job_id] = job
+        self._record_transition(job, None, "completed_success")
+        self.results_store.add_results(job_id, known.items())
+        
+        with open(job["output_file"], "w") as f:
+            f.write("HASHCAT COMMAND:\n")
+            f.write("(not run)\n\n")
+            f.write("OUTPUT:\n")
+            f.write(f"All {len(known)} hashes were already cracked and found in the potfile.\n")
+            f.write("Hashcat was not started; results are attached to this job.\n")
+        
+        if job.get("auto_delete_hash", False) and os.path.exists(job["hash_file_path"]):
+            try:
+                os.remove(job["hash_file_path"])
+                print(f"Auto-deleted hash file: {job['hash_file_path']}")
+                job["hash_file_deleted"] = True
+            except Exception as e:
+                print(f"Failed to auto-delete hash file: {str(e)}")
+        
+        self._save_jobs()
+        return {"job_id": job_id, "status": "completed"}
+    
     def _check_queue(self) -> None:
-        """Check if there are any queued jobs that can be started"""
-        # If there are any running jobs, don't start new ones
-        if self.has_running_jobs():
-            return
-            
-        # Find the oldest queued job
+        """Start queued jobs while there are free slots"""
+        with self._queue_lock:
+            while self.has_free_slot() and self._start_next_queued():
+                pass
+    
+    def _start_next_queued(self) -> bool:
+        """Start the queued job the policy picks; False if nothing is queued"""
+        # Let the configured policy (FIFO, shortest-estimated-first or earliest deadline) pick
         queued_jobs = [job for job in self.jobs.values() if job["status"] == "queued"]
         if not queued_jobs:
-            return
+            return False
             
-        # Sort by queued_at time
-        queued_jobs.sort(key=lambda j: j.get("queued_at") or "")
-        next_job = queued_jobs[0]
+        policy = get_queue_policy()
+        next_job = policy.select(queued_jobs)
+        
+        # Compatible queued jobs ride along in the same hashcat run
+        settings = get_settings_manager()
+        if not next_job.get("checkpointed") and settings.get_setting("jobs", "coalesce_jobs", True):
+            members = select_batch(next_job, policy.order(queued_jobs),
+                                   settings.get_setting("jobs", "coalesce_max_jobs", 16))
+            if members:
+                self._start_batch(next_job, members)
         
         # Update job status
         job_id = next_job["id"]
         hash_mode = next_job["hash_mode"]
         attack_mode = next_job["attack_mode"]
-        hash_file = next_job["hash_file_path"]
+        hash_file = next_job.get("batch_hash_file") or next_job["hash_file_path"]
         wordlist = next_job["wordlist_path"]
         options = next_job["options"]
         output_file = next_job["output_file"]
         
         # Update job status
+        self._record_transition(next_job, "queued", "starting")
         self.jobs[job_id]["status"] = "starting"
-        self.jobs[job_id]["started_at"] = datetime.now().isoformat()
+        restore = bool(next_job.get("checkpointed"))
+        if restore:
+            # A preempted job carries on from its checkpoint
+            next_job.update(checkpointed=False, resumed_at=datetime.now().isoformat(),
+                            resume_count=next_job.get("resume_count", 0) + 1)
+        else:
+            self.jobs[job_id]["started_at"] = datetime.now().isoformat()
         self._save_jobs()
         
         # Start job in a separate thread
         threading.Thread(
             target=self._run_job,
             args=(job_id, hash_mode, attack_mode, hash_file, wordlist, options, output_file),
+            kwargs={"restore": restore},
             daemon=True
         ).start()
+        return True
+    
+    def _start_batch(self, lead: Dict[str, Any], members: List[Dict[str, Any]]) -> None:
+        """
+        Attach queued jobs to the lead's run: hashcat attacks the union of their
+        hashlists once and each crack is credited to every job listing the hash
+        """
+        path = os.path.join(self.base_dir, "batches", f"batch_{lead['id']}.txt")
+        try:
+            count = write_batch_hashlist(path, [lead] + members)
+        except Exception as e:
+            print(f"Error writing batch hashlist, starting job {lead['id']} alone: {str(e)}")
+            return
+        now = datetime.now().isoformat()
+        for member in members:
+            self._record_transition(member, member.get("status"), "batched")
+            member.update(status="batched", batch_lead=lead["id"], started_at=now)
+        lead.update(batch_members=[member["id"] for member in members], batch_hash_file=path,
+                    batch_total_hashes=count)
+        print(f"Job {lead['id']} runs as a batch with {len(members)} queued job(s), {count} unique hashes")
+    
+    def _route_batch_results(self, job_id: str) -> None:
+        """Send a batch lead's cracks to each member job whose hashlist has the hash"""
+        job = self.jobs.get(job_id)
+        if not job or not job.get("batch_members"):
+            self.results_store.set_route(job_id, None)
+            return
+        jobs = [job] + [self.jobs[member] for member in job["batch_members"] if member in self.jobs]
+        self.results_store.set_route(job_id, build_route(jobs))
+    
+    def _finish_batch(self, lead: Dict[str, Any], status: str) -> None:
+        """
+        Give each member of a finished batch its own result: completed_success
+        if all of its hashes cracked, otherwise the outcome of the shared run
+        """
+        lead_id = lead["id"]
+        members = [self.jobs[member] for member in lead.pop("batch_members", []) if member in self.jobs]
+        lead["batched_jobs"] = [member["id"] for member in members]
+        # Flush the outfile through the route before dropping it
+        self.results_store.unwatch(lead_id)
+        self.results_store.set_route(lead_id, None)
+        
+        now = datetime.now().isoformat()
+        for member in members:
+            cracked = self.results_store.count(member["id"])
+            total = len(read_hash_lines(member.get("hash_file_path", "")))
+            fields = {"completed_at": now, "cracked_count": cracked, "total_hashes": total}
+            if total and cracked >= total:
+                member_status = "completed_success"
+            elif status in ("completed_success", "completed_exhausted"):
+                member_status = "completed_exhausted"
+            else:
+                member_status = status
+                if status in ("error", "failed"):
+                    fields["error_message"] = f"Batch run of job {lead_id} ended with status {status}"
+            self._update_job_status(member["id"], member_status, **fields)
+            
+            if member.get("auto_delete_hash", False):
+                hash_file = member.get("hash_file_path", "")
+                if hash_file and os.path.exists(hash_file):
+                    try:
+                        os.remove(hash_file)
+                        member["hash_file_deleted"] = True
+                    except Exception as e:
+                        print(f"Failed to auto-delete hash file: {str(e)}")
+        
+        batch_file = lead.get("batch_hash_file")
+        if batch_file and os.path.exists(batch_file):
+            try:
+                os.remove(batch_file)
+            except OSError as e:
+                print(f"Failed to remove batch hashlist {batch_file}: {str(e)}")
+        print(f"Batch of job {lead_id} finished ({status}) for {len(members)} batched job(s)")
     
     def _run_job(self, job_id: str, hash_mode: str, attack_mode: str, hash_file: str, 
-                 wordlist: str, options: str, output_file: str):
-        """Run hashcat job in a background process"""
+                 wordlist: str, options: str, output_file: str, restore: bool = False):
+        """Run hashcat job in a background process, or resume it from its restore file"""
         # Detect platform for terminal command choice
         is_windows = platform.system().lower() == "windows"
         
         # Use absolute paths for files
         hash_file_abs = os.path.abspath(hash_file)
-        wordlist_abs = os.path.abspath(wordlist)
+        attack_args = self._attack_args(self.jobs.get(job_id, {}), attack_mode, wordlist)
         output_file_abs = os.path.abspath(output_file)
+        cracked_file_abs = os.path.abspath(
+            self.jobs.get(job_id, {}).get("cracked_file") or self._cracked_file_path(job_id)
+        )
         
-        # Construct hashcat command
-        base_cmd = "hashcat"
-        # Use potfile for better cache efficiency and configure status output
-        potfile_dir = os.path.join(self.base_dir, "potfiles")
-        potfile_path = os.path.join(potfile_dir, "hashcat.pot")
+        # Named hashcat session with its own restore file, so progress survives
+        # server restarts. Hashcat checkpoints the restore file every 60 seconds.
+        hashcat_session = f"hashcat_{job_id}"
+        restore_file = self._restore_file_path(job_id)
+        if job_id in self.jobs:
+            self.jobs[job_id]["hashcat_session"] = hashcat_session
+            self.jobs[job_id]["restore_file"] = restore_file
+        session_options = f"--session={hashcat_session} --restore-file-path=\"{restore_file}\""
         
-        # Ensure potfile directory exists and has proper permissions
-        try:
-            os.makedirs(potfile_dir, exist_ok=True)
-            # Create empty potfile if it doesn't exist
-            if not os.path.exists(potfile_path):
-                with open(potfile_path, 'a'):  # 'a' mode creates file if it doesn't exist
-                    pass
-            # Make sure file is readable and writable
-            os.chmod(potfile_path, 0o666)  # rw-rw-rw- permission
-        except Exception as e:
-            print(f"Warning: Could not prepare potfile: {str(e)}")
-            # Fall back to potfile-disable if we can't manage the potfile
-            hashcat_options = f"-m {hash_mode} -a {attack_mode} --status --status-timer=1 --potfile-disable"
+        # A batch lead's results belong to the jobs whose hashes were cracked
+        self._route_batch_results(job_id)
+        
+        # Construct hashcat command
+        base_cmd = f'"{self.hashcat_binary}"' if " " in self.hashcat_binary else self.hashcat_binary
+        if restore:
+            # Attack, potfile and outfile are all read back from the restore file
+            hashcat_args = f"{session_options} --restore"
         else:
-            hashcat_options = f"-m {hash_mode} -a {attack_mode} --status --status-timer=1 --potfile-path=\"{potfile_path}\""
+            # Give each job its own potfile, seeded with only the known entries for its
+            # hashlist. The global potfile is written solely by the potfile manager.
+            try:
+                potfile_path, seeded = self.potfile_manager.seed_job_potfile(job_id, hash_file_abs)
+                if job_id in self.jobs:
+                    self.jobs[job_id]["potfile_path"] = potfile_path
+                    self.jobs[job_id]["potfile_seeded"] = len(seeded)
+                # Hashcat skips potfile hits without writing them to the outfile,
+                # so record the seeded entries as results up front
+                self.results_store.add_results(job_id, seeded.items())
+            except Exception as e:
+                print(f"Warning: Could not prepare potfile: {str(e)}")
+                # Fall back to potfile-disable if we can't manage the potfile
+                hashcat_options = f"-m {hash_mode} -a {attack_mode} --status --status-timer=1 --potfile-disable"
+            else:
+                hashcat_options = f"-m {hash_mode} -a {attack_mode} --status --status-timer=1 --potfile-path=\"{potfile_path}\""
+            
+            hashcat_args = f'{hashcat_options} {session_options} "{hash_file_abs}" {attack_args} -o "{cracked_file_abs}" --outfile-format={OUTFILE_FORMAT} {options}'
         
         if is_windows:
             # For Windows, use direct command with better output
-            cmd = f'{base_cmd} {hashcat_options} "{hash_file_abs}" "{wordlist_abs}" -o "{output_file_abs}" {options}'
+            cmd = f'{base_cmd} {hashcat_args}'
             shell = True
         else:
             # For Linux/Mac, try different approaches
             session_name = f"hashcat_{job_id}"
-            hashcat_cmd = f'{base_cmd} {hashcat_options} "{hash_file_abs}" "{wordlist_abs}" -o "{output_file_abs}" {options}'
+            hashcat_cmd = f'{base_cmd} {hashcat_args}'
             
             # Try multiple background execution methods in order of preference
             # First check if tmux is available
@@ -218,12 +616,12 @@ class HashcatJobRunner:
             
             try:
                 # Check for tmux
-                tmux_check = subprocess.run(["which", "tmux"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                tmux_check = run_subprocess(["which", "tmux"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
                 tmux_available = tmux_check.returncode == 0
                 
                 # Check for screen if tmux is not available
                 if not tmux_available:
-                    screen_check = subprocess.run(["which", "screen"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                    screen_check = run_subprocess(["which", "screen"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
                     screen_available = screen_check.returncode == 0
             except Exception as e:
                 print(f"Error checking for tmux/screen: {str(e)}")
@@ -247,7 +645,8 @@ class HashcatJobRunner:
                 print(f"Using screen for background execution: {cmd}")
             else:
                 # Last resort: use background execution with nohup - add a 10 second delay at the end
-                cmd = f"nohup bash -c '{env_vars} {hashcat_cmd}; echo \"\\n[Job Complete] Waiting 10 seconds to capture final status...\"; sleep 10; echo \"[Job Complete] Terminal session closing.\"' > {output_file_abs}.log 2>&1 &"
+                # The log is written in chunks by split so finished chunks can be dropped while hashcat runs
+                cmd = f"nohup bash -c '{env_vars} {hashcat_cmd}; echo \"\\n[Job Complete] Waiting 10 seconds to capture final status...\"; sleep 10; echo \"[Job Complete] Terminal session closing.\"' 2>&1 | nohup split -l {LOG_CHUNK_LINES} -a 6 - \"{output_file_abs}.log.\" > /dev/null 2>&1 &"
                 print(f"Using nohup for background execution: {cmd}")
             
             shell = True
@@ -255,6 +654,9 @@ class HashcatJobRunner:
         # Update job status
         self._update_job_status(job_id, "running")
         
+        # Tail cracked results into the results store as hashcat writes them
+        self.results_store.watch(job_id, cracked_file_abs)
+        
         try:
             # Run the command
             if is_windows:
@@ -283,7 +685,7 @@ class HashcatJobRunner:
                 # For Linux/Mac, execute the command (tmux, screen, or nohup) but DON'T wait for completion
                 try:
                     print(f"Executing command: {cmd}")
-                    process = subprocess.run(cmd, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                    process = run_subprocess(cmd, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
                     exit_code = process.returncode
                     
                     # Capture any immediate output
@@ -317,7 +719,7 @@ class HashcatJobRunner:
                         try:
                             # Try to capture initial output from tmux session
                             print(f"Attempting to capture output from tmux session: {session_name}")
-                            tmux_output = subprocess.run(
+                            tmux_output = run_subprocess(
                                 ["tmux", "capture-pane", "-p", "-t", session_name],
                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
                             )
@@ -327,7 +729,7 @@ class HashcatJobRunner:
                                 # Save PID for monitoring if we can find it
                                 try:
                                     pid_cmd = f"tmux list-panes -a -F '#{{pane_pid}} #{{session_name}}' | grep {session_name} | awk '{{print $1}}'"
-                                    pid_result = subprocess.run(pid_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                                    pid_result = run_subprocess(pid_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
                                     if pid_result.stdout.strip():
                                         with open(f"{output_file}.pid", "w") as pid_file:
                                             pid_file.write(pid_result.stdout.strip())
@@ -343,18 +745,18 @@ class HashcatJobRunner:
                         try:
                             # Try to get PID of screen session
                             pid_cmd = f"screen -ls | grep {session_name} | awk '{{print $1}}' | cut -d. -f1"
-                            pid_result = subprocess.run(pid_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                            pid_result = run_subprocess(pid_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
                             if pid_result.stdout.strip():
                                 with open(f"{output_file}.pid", "w") as pid_file:
                                     pid_file.write(pid_result.stdout.strip())
                         except:
                             pass
                     else:
-                        # For nohup, check if the log file exists
-                        log_file = f"{output_file}.log"
-                        if os.path.exists(log_file):
+                        # For nohup, check if the log has been written yet
+                        log_chunk = log_chunks(f"{output_file}.log")[-1:]
+                        if log_chunk:
                             try:
-                                with open(log_file, "r") as f:
+                                with open(log_chunk[0], "r") as f:
                                     log_content = f.read()
                                 initial_content.append(f"Background process started. Current log:\n{log_content}")
                             except Exception as e:
@@ -365,7 +767,7 @@ class HashcatJobRunner:
                         # Try to find PID for background process
                         try:
                             pid_cmd = f"pgrep -f 'hashcat.*{job_id}'"
-                            pid_result = subprocess.run(pid_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                            pid_result = run_subprocess(pid_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
                             if pid_result.stdout.strip():
                                 with open(f"{output_file}.pid", "w") as pid_file:
                                     pid_file.write(pid_result.stdout.strip())
@@ -414,13 +816,15 @@ class HashcatJobRunner:
                                 parts = line.split()
                                 if len(parts) >= 3:
                                     try:
-                                        cracked = parts[1].split("/")[0]
                                         total = parts[1].split("/")[1]
-                                        cracked_count = int(cracked)
                                         total_hashes = int(total)
                                     except (IndexError, ValueError):
                                         pass
                 
+                # Exact cracked count from the job's outfile
+                self.results_store.unwatch(job_id)
+                cracked_count = self.results_store.count(job_id)
+                
                 # Set status based on cracking results and exit code
                 if cracked_count > 0:
                     status = "completed_success"
@@ -439,6 +843,9 @@ class HashcatJobRunner:
                     cracked_count=cracked_count,
                     total_hashes=total_hashes
                 )
+                
+                # Merge the job's new potfile entries into the global potfile
+                self.potfile_manager.finalize_job(job_id, remove=True)
             else:
                 # For Linux, we just create the initial output file and register a background monitor
                 # The job status will be updated asynchronously by the monitor_linux_job method
@@ -473,13 +880,587 @@ class HashcatJobRunner:
                 completed_at=datetime.now().isoformat()
             )
     
+    @staticmethod
+    def _attack_args(job: Dict[str, Any], attack_mode: str, wordlist: Optional[str]) -> str:
+        """The attack's positional arguments: wordlist, mask, or both for hybrid attacks"""
+        mask = job.get("mask")
+        if not mask:
+            return f'"{os.path.abspath(wordlist)}"'
+        if str(attack_mode) == "3" or not wordlist:
+            return quote_arg(mask)
+        if str(attack_mode) == "7":
+            return f'{quote_arg(mask)} "{os.path.abspath(wordlist)}"'
+        return f'"{os.path.abspath(wordlist)}" {quote_arg(mask)}'
+    
+    def _restore_file_path(self, job_id: str) -> str:
+        """Get the hashcat restore file for a job's session"""
+        return os.path.join(self.base_dir, "restore", f"hashcat_{job_id}.restore")
+    
+    def _scan_hashcat_processes(self) -> Optional[Dict[str, int]]:
+        """
+        Map job IDs to live hashcat PIDs with a single pass over /proc.
+        Returns None where /proc is not available.
+        """
+        if not os.path.isdir("/proc"):
+            return None
+        
+        scan_start = time.perf_counter()
+        binary_name = os.path.basename(self.hashcat_binary).encode()
+        live = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/cmdline", "rb") as f:
+                    raw = f.read()
+            except OSError:
+                continue
+            if not raw:
+                continue
+            argv = raw.rstrip(b"\0").split(b"\0")
+            if not self._is_hashcat_argv(argv, binary_name):
+                continue
+            match = JOB_ID_PATTERN.search(b" ".join(argv).decode("utf-8", errors="replace"))
+            if match:
+                live[match.group(1)] = int(entry)
+        PROCESS_SCAN_SECONDS.observe(time.perf_counter() - scan_start)
+        return live
+    
+    @staticmethod
+    def _is_hashcat_argv(argv: List[bytes], binary_name: bytes) -> bool:
+        """
+        Whether a command line is the hashcat process itself, not one of the
+        tmux/screen/shell wrappers whose command lines also mention it.
+        Script binaries show up as "python3 /path/script", so look past the interpreter.
+        """
+        program = os.path.basename(argv[0])
+        if program.startswith(SCRIPT_INTERPRETERS) and len(argv) > 1 and not argv[1].startswith(b"-"):
+            program = os.path.basename(argv[1])
+        return program.startswith(b"hashcat") or program == binary_name
+    
+    def _reconcile_jobs(self):
+        """
+        Reconcile persisted jobs with what is actually running after a restart.
+        
+        Jobs still running (tmux/screen sessions outlive the server) get their
+        monitors reattached, interrupted jobs with a checkpoint are resumed or
+        marked resumable, and jobs that finished while the server was down are
+        finalized from their outfiles. Work beyond the startup budget is finished
+        in the background, and the queue is restarted afterwards.
+        """
+        start = time.time()
+        budget = get_settings_manager().get_setting("jobs", "startup_budget_seconds", 5)
+        live = self._scan_hashcat_processes()
+        
+        deferred = []
+        for job in list(self.jobs.values()):
+            if job.get("status") not in ("starting", "running"):
+                continue
+            if time.time() - start > budget:
+                deferred.append(job["id"])
+                continue
+            self._reconcile_job(job["id"], live)
+        
+        if deferred:
+            print(f"Startup budget of {budget}s used, reconciling {len(deferred)} remaining job(s) in the background")
+        threading.Thread(target=self._finish_reconciliation, args=(deferred, live), daemon=True).start()
+    
+    def _finish_reconciliation(self, job_ids: List[str], live: Optional[Dict[str, int]]):
+        """Reconcile jobs deferred past the startup budget, then drain the queue"""
+        for job_id in job_ids:
+            if job_id in self.jobs:
+                self._reconcile_job(job_id, live)
+        self._check_queue()
+    
+    def _reconcile_job(self, job_id: str, live: Optional[Dict[str, int]]):
+        """Reattach, resume or finalize a single job persisted as running"""
+        job = self.jobs[job_id]
+        output_file = job.get("output_file", "")
+        
+        try:
+            if live is None:
+                pid = None
+                alive = self.is_job_running(job_id)
+            else:
+                pid = live.get(job_id)
+                alive = pid is not None
+            
+            if alive:
+                print(f"Job {job_id} is still running, reattaching monitor")
+                if pid:
+                    pid_file = f"{output_file}.pid"
+                    with open(pid_file, "w") as f:
+                        f.write(str(pid))
+                    job["pid_file"] = pid_file
+                self._route_batch_results(job_id)
+                self.results_store.watch(job_id, job.get("cracked_file") or self._cracked_file_path(job_id))
+                self._update_job_status(job_id, "running", reattached_at=datetime.now().isoformat())
+                threading.Thread(
+                    target=self._monitor_linux_job,
+                    args=(job_id, output_file),
+                    daemon=True
+                ).start()
+                return
+            
+            restore_file = job.get("restore_file")
+            if restore_file and os.path.exists(restore_file) and job.get("pause_requested"):
+                # It was stopping at a checkpoint when the server went down
+                self._finish_pause(job_id)
+                return
+            if restore_file and os.path.exists(restore_file):
+                print(f"Job {job_id} was interrupted, checkpoint found at {restore_file}")
+                self._update_job_status(
+                    job_id,
+                    "interrupted",
+                    resumable=True,
+                    interrupted_at=datetime.now().isoformat()
+                )
+                if get_settings_manager().get_setting("jobs", "auto_resume_interrupted", True):
+                    self.resume_job(job_id)
+                return
+            
+            if self._finished_while_down(job):
+                # Hashcat removes its restore file when a session ends normally,
+                # so the job finished while the server was down
+                print(f"Job {job_id} finished while the server was down, processing results")
+                if not os.path.exists(output_file):
+                    with open(output_file, "w") as f:
+                        f.write("HASHCAT COMMAND:\n\nOUTPUT:\nJob finished while the server was down.\n")
+                # Completion counts what the outfile holds once it is unwatched
+                self.results_store.watch(job_id, job.get("cracked_file") or self._cracked_file_path(job_id))
+                self._process_job_completion(job_id, output_file, settle_delay=0, check_queue=False)
+                return
+            
+            # It died before its first checkpoint: keep whatever it cracked
+            self.results_store.ingest_outfile(job_id, job.get("cracked_file"))
+            self._update_job_status(
+                job_id,
+                "error",
+                error_message="Job was interrupted by a server restart and has no checkpoint",
+                completed_at=datetime.now().isoformat()
+            )
+        except Exception as e:
+            print(f"Error reconciling job {job_id}: {str(e)}")
+    
+    def _finished_while_down(self, job: Dict[str, Any]) -> bool:
+        """
+        Whether a job that is no longer running got to the end of its hashcat
+        run: the session's completion marker or a final status in its output or
+        nohup log, or an outfile holding every hash. The output file itself
+        proves nothing; start_job creates it before hashcat runs.
+        """
+        output_file = job.get("output_file", "")
+        # The final status may straddle the last two nohup log chunks
+        for path in [output_file] + log_chunks(f"{output_file}.log")[-2:]:
+            if not output_exists(path):
+                continue
+            try:
+                content = read_output_tail(path)
+            except OSError:
+                continue
+            if "[Job Complete]" in content or FINAL_STATUS_PATTERN.search(content):
+                return True
+        
+        cracked_file = job.get("cracked_file")
+        hash_file = job.get("hash_file_path")
+        if cracked_file and os.path.exists(cracked_file) and hash_file and os.path.exists(hash_file):
+            try:
+                targets = {normalize_hash(value) for value in read_hash_lines(hash_file)}
+                with open(cracked_file, "r", errors="replace") as f:
+                    cracked = {normalize_hash(entry[0]) for entry in map(split_pot_line, f) if entry}
+                return bool(targets) and targets <= cracked
+            except OSError:
+                pass
+        return False
+    
+    def pause_job(self, job_id: str, reason: str = PAUSE_USER) -> bool:
+        """
+        Ask a running job to stop at its next hashcat checkpoint. Its restore
+        file, outfile and potfile are kept, so it carries on later from where it
+        stopped; a paused job waits for resume_job, a preempted one is requeued.
+        """
+        job = self.jobs.get(job_id)
+        if job and reason == PAUSE_USER and self.in_batch(job):
+            # Its hashcat run is shared with the other jobs of the batch
+            return False
+        if not job or job.get("status") != "running":
+            return False
+        if job.get("pause_requested"):
+            # Already stopping; a user pause keeps it from being requeued
+            if reason == PAUSE_USER:
+                self._update_job_status(job_id, "running", pause_requested=reason)
+            return True
+        if not self._has_terminal(job) and not (job.get("restore_file") and os.path.exists(job["restore_file"])):
+            # SIGINT stops hashcat at its last restore point; before the first one the whole run would be lost
+            return False
+        
+        # Flag first: hashcat can reach its checkpoint before the keypress call returns
+        self._update_job_status(job_id, "running", pause_requested=reason,
+                                pause_requested_at=datetime.now().isoformat(), pause_signalled=False)
+        if not self._request_checkpoint(job):
+            self._update_job_status(job_id, "running", pause_requested=None)
+            return False
+        print(f"Job {job_id} will stop at its next checkpoint ({reason})")
+        return True
+    
+    def in_batch(self, job: Dict[str, Any]) -> bool:
+        """Whether a job shares its hashcat run with other jobs, as their lead or as a member"""
+        if job.get("status") == "batched":
+            return job.get("batch_lead") in self.jobs
+        return any(member in self.jobs for member in job.get("batch_members") or [])
+    
+    def _has_terminal(self, job: Dict[str, Any]) -> bool:
+        """Whether a job's hashcat runs in a tmux/screen session that can be sent keys"""
+        return job.get("session_type") in ("tmux", "screen") and bool(job.get("session_name"))
+    
+    def _request_checkpoint(self, job: Dict[str, Any]) -> bool:
+        """Tell a job's hashcat to quit at its next checkpoint"""
+        session_name = job.get("session_name")
+        session_type = job.get("session_type")
+        try:
+            # [c]heckpoint at hashcat's interactive prompt
+            if session_type == "tmux" and session_name:
+                result = run_subprocess(["tmux", "send-keys", "-t", session_name, "c"],
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+                return result.returncode == 0
+            if session_type == "screen" and session_name:
+                result = run_subprocess(["screen", "-S", session_name, "-X", "stuff", "c"],
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+                return result.returncode == 0
+            # No terminal to type into: the monitor sends SIGINT after the next restore point
+            return bool((self._scan_hashcat_processes() or {}).get(job["id"]))
+        except Exception as e:
+            print(f"Error requesting a checkpoint for job {job['id']}: {str(e)}")
+        return False
+    
+    def _signal_checkpoint(self, job: Dict[str, Any]) -> None:
+        """
+        Send SIGINT to a stopping job without a terminal once hashcat has
+        written a restore point since the pause was requested. Hashcat quits at
+        its last restore point on SIGINT, so signalling right after a fresh one
+        keeps the work redone on resume to a monitor interval.
+        """
+        if not job.get("pause_requested") or job.get("pause_signalled") or self._has_terminal(job):
+            return
+        try:
+            requested = datetime.fromisoformat(job["pause_requested_at"]).timestamp()
+            written = os.path.getmtime(job["restore_file"])
+        except (KeyError, TypeError, ValueError, OSError):
+            return
+        if written < requested and time.time() - requested < RESTORE_POINT_WAIT:
+            return
+        pid = (self._scan_hashcat_processes() or {}).get(job["id"])
+        if not pid:
+            return
+        try:
+            os.kill(pid, signal.SIGINT)
+            self._update_job_status(job["id"], "running", pause_signalled=True)
+        except OSError as e:
+            print(f"Error signalling job {job['id']} to stop: {str(e)}")
+    
+    def _close_session(self, job: Dict[str, Any]) -> None:
+        """Close the tmux/screen session left waiting after hashcat exited"""
+        session_name = job.get("session_name")
+        session_type = job.get("session_type")
+        if not session_name:
+            return
+        if session_type == "tmux":
+            cmd = ["tmux", "kill-session", "-t", session_name]
+        elif session_type == "screen":
+            cmd = ["screen", "-X", "-S", session_name, "quit"]
+        else:
+            return
+        try:
+            run_subprocess(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+        except Exception as e:
+            print(f"Error closing session {session_name}: {str(e)}")
+    
+    def _finish_pause(self, job_id: str) -> None:
+        """
+        A job stopped at its checkpoint: mark it paused, or requeue it if it
+        was preempted. A job that stopped before hashcat wrote a restore point
+        is requeued to run again from the start.
+        """
+        job = self.jobs[job_id]
+        reason = job.get("pause_requested")
+        self.results_store.unwatch(job_id)
+        # Publish its cracks now; the job potfile itself stays for the restore
+        self.potfile_manager.submit(job_id)
+        # The same session name is used again when the job resumes
+        self._close_session(job)
+        
+        now = datetime.now().isoformat()
+        checkpointed = bool(job.get("restore_file") and os.path.exists(job["restore_file"]))
+        fields = {
+            "pause_requested": None,
+            "pause_signalled": None,
+            "pause_reason": reason,
+            "paused_at": now,
+            "pause_count": job.get("pause_count", 0) + 1,
+            "checkpointed": checkpointed,
+            "cracked_count": self.results_store.count(job_id)
+        }
+        if not checkpointed:
+            # Its cracks are kept in the job potfile, so hashcat skips those hashes
+            self._update_job_status(job_id, "queued", queued_at=now, **fields)
+            print(f"Job {job_id} stopped before its first restore point and is queued to run again")
+            return
+        if reason == PAUSE_USER:
+            self._update_job_status(job_id, "paused", resumable=True, **fields)
+        else:
+            self._update_job_status(job_id, "queued", queued_at=now, **fields)
+        print(f"Job {job_id} stopped at its checkpoint and is {job['status']}")
+    
+    def _preemption_reason(self, job_id: str) -> Optional[str]:
+        """
+        Why a running job should make way for queued work: a queued job with
+        higher priority (jobs.preemption), or the end of its time slice while
+        jobs of the same priority wait (jobs.time_slice_minutes). None if it
+        should keep running.
+        """
+        job = self.jobs.get(job_id)
+        if not job or job.get("status") != "running" or job.get("pause_requested"):
+            return None
+        queued = [other for other in list(self.jobs.values()) if other.get("status") == "queued"]
+        if not queued or self.has_free_slot():
+            return None
+        try:
+            ran = (datetime.now() - datetime.fromisoformat(job.get("resumed_at") or job["started_at"])).total_seconds()
+        except (KeyError, TypeError, ValueError):
+            return None
+        
+        # With several slots busy, only the lowest-priority, longest-running run makes way
+        def standing(other):
+            started = other.get("resumed_at") or other.get("started_at") or ""
+            return job_priority(other), started
+        running = [other for other in list(self.jobs.values())
+                   if other.get("status") == "running" and not other.get("pause_requested")]
+        if running and min(running, key=standing)["id"] != job_id:
+            return None
+        
+        settings = get_settings_manager()
+        # Every run gets to make progress past a checkpoint before it can be stopped
+        if ran < settings.get_setting("jobs", "preempt_min_runtime_minutes", 5) * 60:
+            return None
+        priority = job_priority(job)
+        highest = max(job_priority(other) for other in queued)
+        if highest > priority and settings.get_setting("jobs", "preemption", True):
+            return PAUSE_PREEMPTED
+        time_slice = settings.get_setting("jobs", "time_slice_minutes", 0)
+        if time_slice and ran >= time_slice * 60 and highest >= priority:
+            return PAUSE_TIME_SLICE
+        return None
+    
+    def resume_job(self, job_id: str) -> bool:
+        """Resume an interrupted or paused job from its hashcat checkpoint"""
+        job = self.jobs.get(job_id)
+        if job and job.get("status") == "batched" and job.get("batch_lead") in self.jobs:
+            return self.resume_job(job["batch_lead"])
+        if not job or job.get("status") not in ("interrupted", "paused"):
+            return False
+        restore_file = job.get("restore_file")
+        if not restore_file or not os.path.exists(restore_file):
+            return False
+        
+        if job["status"] == "paused" and not self.has_free_slot():
+            # Wait for a slot like any other queued job
+            self._update_job_status(job_id, "queued", resumable=False, queued_at=datetime.now().isoformat())
+            return True
+        
+        self._update_job_status(
+            job_id,
+            "starting",
+            resumable=False,
+            checkpointed=False,
+            resumed_at=datetime.now().isoformat(),
+            resume_count=job.get("resume_count", 0) + 1
+        )
+        threading.Thread(
+            target=self._run_job,
+            args=(job_id, job["hash_mode"], job["attack_mode"], job["hash_file_path"],
+                  job["wordlist_path"], job["options"], job["output_file"]),
+            kwargs={"restore": True},
+            daemon=True
+        ).start()
+        return True
+    
+    def plan_mask_attack(self, hash_mode: str, mask: str, options: str = "",
+                         estimate: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Split a brute-force attack into jobs of about jobs.mask_chunk_minutes
+        each (see mask_attacks.plan_shards). --increment is expanded into one
+        mask per length, since hashcat allows --skip/--limit with neither
+        increments nor mask files.
+        """
+        settings = get_settings_manager()
+        increment = increment_range(options)
+        entries = expand_masks(mask, options, bool(increment), *(increment or (1, 0)))
+        seconds_per_candidate = None
+        if estimate and estimate.get("estimated_seconds") and estimate.get("candidates"):
+            seconds_per_candidate = estimate["estimated_seconds"] / estimate["candidates"]
+        
+        def base_keyspace(entry):
+            charsets = " ".join(f"{flag} {shlex.quote(charset)}" for flag, charset in charset_options(entry["charsets"]))
+            keyspace, error = self.estimator.mask_keyspace(hash_mode, entry["mask"], charsets)
+            if keyspace is None:
+                print(f"Could not get the keyspace of mask {entry['mask']}, not splitting it: {error}")
+            return keyspace
+        
+        return plan_shards(entries, seconds_per_candidate,
+                           settings.get_setting("jobs", "mask_chunk_minutes", 60) * 60, self.slots(),
+                           settings.get_setting("jobs", "mask_max_chunks", 64), base_keyspace)
+    
+    def start_mask_attack(self, hash_mode: str, hash_file: str, mask: str, options: str = "",
+                          auto_delete_hash: bool = False, queue_if_busy: bool = False,
+                          estimate: Optional[Dict[str, Any]] = None, deadline: Optional[str] = None,
+                          priority: int = 0, split: bool = True) -> Dict[str, Any]:
+        """
+        Start a brute-force (-a 3) attack. An attack that fits one chunk runs as
+        a single job; a longer one becomes a group of queued jobs sharing the
+        hashlist, which the scheduler spreads over the free slots.
+        """
+        # A hashlist the potfile fully cracks is completed by start_job without planning shards
+        if split and estimate and "potfile_only" in estimate:
+            split = not estimate["potfile_only"]
+        elif split and self._lookup_all_known(os.path.abspath(hash_file)):
+            split = False
+        shards = self.plan_mask_attack(hash_mode, mask, options, estimate) if split else []
+        if len(shards) <= 1 or not all(shard["entries"] for shard in shards):
+            return self.start_job(hash_mode, "3", hash_file, None, options, auto_delete_hash, queue_if_busy,
+                                  estimate, deadline, priority, mask=mask)
+        
+        group_id = str(uuid.uuid4())
+        base_options = strip_mask_options(options)
+        shard_dir = os.path.join(self.base_dir, "masks", "shards")
+        os.makedirs(shard_dir, exist_ok=True)
+        job_ids, first = [], None
+        for index, shard in enumerate(shards):
+            if len(shard["entries"]) == 1:
+                entry = shard["entries"][0]
+                shard_mask = entry["mask"]
+                extra = [f"{flag} {quote_arg(charset)}" for flag, charset in charset_options(entry["charsets"])]
+                if shard["skip"] is not None:
+                    extra.append(f"--skip={shard['skip']} --limit={shard['limit']}")
+                shard_options = " ".join([base_options] + extra).strip()
+            else:
+                shard_mask = os.path.join(shard_dir, f"{group_id}_{index + 1}.hcmask")
+                with open(shard_mask, "w") as f:
+                    f.write("\n".join(hcmask_line(entry) for entry in shard["entries"]) + "\n")
+                shard_options = base_options
+            
+            # Every shard waits its turn; the queue starts as many as there are free slots
+            result = self.start_job(
+                hash_mode, "3", hash_file, None, shard_options, queue_if_busy=True,
+                estimate={"candidates": shard["candidates"], "estimated_seconds": shard["estimated_seconds"]},
+                deadline=deadline, priority=priority, mask=shard_mask, shard_group=group_id, shard_index=index
+            )
+            job_ids.append(result["job_id"])
+            first = first or result
+            if result["status"] == "completed":
+                # The potfile had every hash: the rest of the attack has nothing left to do
+                break
+        
+        # The hashlist is shared, so it is removed only once every shard has finished
+        for job_id in job_ids:
+            if job_id in self.jobs:
+                self.jobs[job_id]["group_auto_delete_hash"] = auto_delete_hash
+        self._save_jobs()
+        print(f"Mask attack {group_id} split into {len(job_ids)} job(s) over {self.slots()} slot(s)")
+        self._finish_shard_group(group_id)
+        threading.Thread(target=self._check_queue, daemon=True).start()
+        
+        return {**first, "group_id": group_id, "job_ids": job_ids}
+    
+    def _group_jobs(self, group_id: str) -> List[Dict[str, Any]]:
+        jobs = [job for job in list(self.jobs.values()) if job.get("shard_group") == group_id]
+        return sorted(jobs, key=lambda job: job.get("shard_index") or 0)
+    
+    def _finish_shard_group(self, group_id: str) -> None:
+        """Once every job of a mask attack has finished, auto-delete the shared hashlist if asked"""
+        jobs = self._group_jobs(group_id)
+        if not jobs or any(job.get("status") in ACTIVE_STATUSES for job in jobs):
+            return
+        if not jobs[0].get("group_auto_delete_hash"):
+            return
+        hash_file = jobs[0].get("hash_file_path", "")
+        if hash_file and os.path.exists(hash_file):
+            try:
+                os.remove(hash_file)
+                print(f"Auto-deleted hash file of mask attack {group_id}: {hash_file}")
+            except Exception as e:
+                print(f"Failed to auto-delete hash file: {str(e)}")
+                return
+        for job in jobs:
+            job.update(hash_file_deleted=True, group_auto_delete_hash=False)
+        self._save_jobs()
+    
+    def get_job_group(self, group_id: str) -> Optional[Dict[str, Any]]:
+        """The jobs of a split mask attack with their combined status and cracked count"""
+        jobs = self._group_jobs(group_id)
+        if not jobs:
+            return None
+        statuses = [job.get("status") for job in jobs]
+        cracked = set()
+        for job in jobs:
+            cracked.update(normalize_hash(result["hash"]) for result in self.results_store.iter_results(job["id"]))
+        total = max(job.get("total_hashes") or 0 for job in jobs) or len(read_hash_lines(jobs[0].get("hash_file_path", "")))
+        
+        if total and len(cracked) >= total:
+            status = "completed_success"
+        elif any(status in ("starting", "running") for status in statuses):
+            status = "running"
+        elif any(status in ACTIVE_STATUSES for status in statuses):
+            status = "queued"
+        elif any(status in ("error", "failed") for status in statuses):
+            status = "failed"
+        else:
+            status = "completed_exhausted"
+        candidates = [job.get("keyspace") for job in jobs]
+        return {
+            "id": group_id,
+            "status": status,
+            "hash_file": jobs[0].get("hash_file"),
+            "jobs": [{key: job.get(key) for key in ("id", "status", "shard_index", "wordlist", "options",
+                                                     "keyspace", "estimated_seconds", "cracked_count")}
+                     for job in jobs],
+            "shards": len(jobs),
+            "finished": sum(1 for status in statuses if status not in ACTIVE_STATUSES),
+            "candidates": sum(candidates) if all(c is not None for c in candidates) else None,
+            "cracked_count": len(cracked),
+            "total_hashes": total
+        }
+    
+    def _cracked_file_path(self, job_id: str) -> str:
+        """Get the dedicated outfile hashcat writes cracked hashes to"""
+        return os.path.join(self.base_dir, "outputs", f"hashcat_{job_id}.cracked")
+    
+    def _on_results_ingested(self, job_id: str, cracked_count: int):
+        """Keep the job's cracked count in step with the results store"""
+        if job_id in self.jobs and self.jobs[job_id].get("cracked_count") != cracked_count:
+            self.jobs[job_id]["cracked_count"] = cracked_count
+            self._save_jobs()
+    
     def _update_job_status(self, job_id: str, status: str, **kwargs):
         """Update job status and additional fields"""
         if job_id in self.jobs:
+            self._record_transition(self.jobs[job_id], self.jobs[job_id].get("status"), status)
             self.jobs[job_id]["status"] = status
             for key, value in kwargs.items():
                 self.jobs[job_id][key] = value
             self._save_jobs()
+            self._notify_job_finished(self.jobs[job_id])
+    
+    def _notify_job_finished(self, job: Dict[str, Any]) -> None:
+        """Move a pipeline on once its stage job has finished, and tidy up after a finished mask attack"""
+        if job.get("status") in ACTIVE_STATUSES:
+            return
+        if job.get("pipeline_id"):
+            try:
+                self.pipelines.job_finished(job)
+            except Exception as e:
+                print(f"Error advancing pipeline {job['pipeline_id']}: {str(e)}")
+        if job.get("shard_group"):
+            self._finish_shard_group(job["shard_group"])
     
     def _monitor_linux_job(self, job_id: str, output_file: str):
         """
@@ -494,6 +1475,8 @@ class HashcatJobRunner:
         session_name = job.get("session_name")
         session_type = job.get("session_type", "unknown")
         pid_file = job.get("pid_file")
+        # Each resume from a checkpoint starts a new hashcat run with its own monitor
+        run = job.get("resume_count", 0)
         
         # Get the PID if available
         pid = None
@@ -517,16 +1500,28 @@ class HashcatJobRunner:
         highest_progress = 0.0
         
         print(f"Starting monitoring for job {job_id} ({session_type})")
+        MONITORS_ACTIVE.inc()
+        last_iteration = None
         
         try:
             # Main monitoring loop
             while True:
+                # Lag: how far this check runs behind its schedule, including the
+                # time the previous iteration spent on subprocesses and parsing
+                now = time.time()
+                if last_iteration is not None:
+                    MONITOR_LAG_SECONDS.observe(max(0.0, now - last_iteration - check_interval))
+                last_iteration = now
+                
                 # Check if job has been marked as completed by another process
                 if job_id in self.jobs:
                     current_status = self.jobs[job_id]["status"]
                     if current_status not in ["starting", "running"]:
                         print(f"Job {job_id} already marked as {current_status}, stopping monitor")
                         break
+                    if self.jobs[job_id].get("resume_count", 0) != run:
+                        print(f"Job {job_id} was resumed since this monitor started, stopping monitor")
+                        break
                 else:
                     print(f"Job {job_id} no longer exists, stopping monitor")
                     break
@@ -542,16 +1537,18 @@ class HashcatJobRunner:
                 
                 # Get latest output based on session type
                 latest_output = []
+                rendered_output = []
                 
                 if session_type == "tmux" and session_name:
                     # Get output from tmux session
                     try:
-                        tmux_output = subprocess.run(
-                            ["tmux", "capture-pane", "-p", "-t", session_name],
+                        tmux_output = run_subprocess(
+                            ["tmux", "capture-pane", "-p", "-S", f"-{CAPTURE_HISTORY_LINES}", "-t", session_name],
                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False
                         )
                         if tmux_output.returncode == 0 and tmux_output.stdout:
                             latest_output = tmux_output.stdout.splitlines()
+                            rendered_output, _ = self.output_logs.record_screen(job_id, latest_output, run)
                     except Exception as e:
                         print(f"Error capturing tmux output: {str(e)}")
                 
@@ -560,7 +1557,7 @@ class HashcatJobRunner:
                     try:
                         # screen -S session_name -X hardcopy /tmp/screen_output
                         screen_file = f"/tmp/screen_{job_id}.txt"
-                        subprocess.run(
+                        run_subprocess(
                             ["screen", "-S", session_name, "-X", "hardcopy", screen_file],
                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
                         )
@@ -569,18 +1566,15 @@ class HashcatJobRunner:
                                 latest_output = f.read().splitlines()
                             # Clean up temp file
                             os.remove(screen_file)
+                            rendered_output, _ = self.output_logs.record_screen(job_id, latest_output, run)
                     except Exception as e:
                         print(f"Error capturing screen output: {str(e)}")
                 
                 elif session_type == "nohup":
-                    # For nohup, check the log file
+                    # For nohup, read what the log gained; only new lines are checked below
                     log_file = f"{output_file}.log"
-                    if os.path.exists(log_file):
-                        try:
-                            with open(log_file, "r") as f:
-                                latest_output = f.read().splitlines()
-                        except Exception as e:
-                            print(f"Error reading nohup log: {str(e)}")
+                    if log_chunks(log_file):
+                        rendered_output, latest_output = self.output_logs.record_log(job_id, log_file, run)
                 
                 # Check if process is still running
                 process_running = False
@@ -596,7 +1590,7 @@ class HashcatJobRunner:
                     # Check by session name
                     if session_type == "tmux":
                         try:
-                            tmux_check = subprocess.run(
+                            tmux_check = run_subprocess(
                                 ["tmux", "has-session", "-t", session_name],
                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
                             )
@@ -605,7 +1599,7 @@ class HashcatJobRunner:
                             process_running = False
                     elif session_type == "screen":
                         try:
-                            screen_check = subprocess.run(
+                            screen_check = run_subprocess(
                                 ["screen", "-list", session_name],
                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False
                             )
@@ -615,7 +1609,7 @@ class HashcatJobRunner:
                 else:
                     # Last resort: check by pattern in process list
                     try:
-                        ps_check = subprocess.run(
+                        ps_check = run_subprocess(
                             ["pgrep", "-f", f"hashcat.*{job_id}"],
                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
                         )
@@ -624,7 +1618,7 @@ class HashcatJobRunner:
                         process_running = False
                 
                 # Update output file if we have new data
-                if latest_output:
+                if rendered_output:
                     # Keep the original command and initial info
                     if current_output:
                         # Extract the command part from existing output
@@ -634,8 +1628,8 @@ class HashcatJobRunner:
                             if line == "":  # Find the first empty line after "HASHCAT COMMAND:"
                                 break
                             
-                        # Build new output with command part and latest output
-                        new_output = cmd_part + "\n".join(latest_output)
+                        # Build new output with command part and the bounded status log
+                        new_output = cmd_part + "\n".join(rendered_output)
                         
                         # Write updated output
                         if new_output != last_output_content:
@@ -666,7 +1660,7 @@ class HashcatJobRunner:
                     if not second_check and session_name:
                         if session_type == "tmux":
                             try:
-                                tmux_check = subprocess.run(
+                                tmux_check = run_subprocess(
                                     ["tmux", "has-session", "-t", session_name],
                                     stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
                                 )
@@ -677,7 +1671,7 @@ class HashcatJobRunner:
                     # Last resort check by pattern again
                     if not second_check:
                         try:
-                            ps_check = subprocess.run(
+                            ps_check = run_subprocess(
                                 ["pgrep", "-f", f"hashcat.*{job_id}"],
                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
                             )
@@ -709,16 +1703,14 @@ class HashcatJobRunner:
                             parts = line.split()
                             if len(parts) >= 3:
                                 try:
-                                    cracked = parts[1].split("/")[0]
                                     total = parts[1].split("/")[1]
-                                    cracked_count = int(cracked)
                                     total_hashes = int(total)
                                     
-                                    # Update job with progress information
+                                    # Update job with progress information; the cracked
+                                    # count is kept exact by the results store
                                     self._update_job_status(
                                         job_id,
                                         "running",
-                                        cracked_count=cracked_count,
                                         total_hashes=total_hashes,
                                         progress_info=progress_info
                                     )
@@ -767,7 +1759,9 @@ class HashcatJobRunner:
                             break
                         
                         # Check for cracked hash indicators - common pattern for cracked hash output
-                        if ":" in line and (line.strip().count(":") >= 3) and not line.startswith("#"):
+                        # (status fields like Time.Started and --status-json lines also contain colons)
+                        if (":" in line and (line.strip().count(":") >= 3) and not line.startswith("#")
+                                and not STATUS_FIELD_PATTERN.match(line) and not line.startswith("{")):
                             print(f"Detected potential cracked hash for job {job_id}")
                             # Give it a little more time to finish output
                             time.sleep(2)
@@ -790,6 +1784,22 @@ class HashcatJobRunner:
                     self._process_job_completion(job_id, output_file)
                     break
                 
+                # Sample speed, progress and recovered counts from the status screen
+                if latest_output:
+                    self.timeseries.record(job_id, latest_output)
+                
+                # Make new cracks visible in the global potfile while the job runs
+                self.potfile_manager.submit(job_id)
+                
+                # A stopping job without a terminal is signalled after hashcat's next restore point
+                if job_id in self.jobs:
+                    self._signal_checkpoint(self.jobs[job_id])
+                
+                # Make way for higher-priority or long-waiting work at the next checkpoint
+                reason = self._preemption_reason(job_id)
+                if reason:
+                    self.pause_job(job_id, reason)
+                
                 # Sleep before next check
                 time.sleep(check_interval)
                 
@@ -803,24 +1813,40 @@ class HashcatJobRunner:
                     error_message=f"Error monitoring job: {str(e)}",
                     completed_at=datetime.now().isoformat()
                 )
+        finally:
+            MONITORS_ACTIVE.dec()
     
-    def _process_job_completion(self, job_id: str, output_file: str):
+    def _process_job_completion(self, job_id: str, output_file: str,
+                                settle_delay: float = 2, check_queue: bool = True):
         """Process job completion based on output file contents"""
         if not os.path.exists(output_file) or job_id not in self.jobs:
             return
         
         try:
             # Wait a moment for any final output to be written
-            time.sleep(2)
+            if settle_delay:
+                time.sleep(settle_delay)
+            parse_start = time.perf_counter()
             
             with open(output_file, "r") as f:
                 content = f.read()
             
+            # The final status screen closes the job's time series
+            self.timeseries.record(job_id, content.splitlines()[-200:])
+            
+            # Stopped at a checkpoint on request rather than finished; without a
+            # restore point it runs again instead of being finalized
+            job = self.jobs[job_id]
+            if job.get("pause_requested") and not FINISHED_STATUS_PATTERN.search(content):
+                self._finish_pause(job_id)
+                if check_queue:
+                    threading.Thread(target=self._check_queue, daemon=True).start()
+                return
+            
             # Parse output to determine completion status
             cracked_count = 0
             total_hashes = 0
             exhaust_check = False
-            cracked_found = False
             status = "completed"
             
             # First, look for specific Status line from hashcat
@@ -835,7 +1861,6 @@ class HashcatJobRunner:
                     # Check for any form of "Status....: Cracked" with variable dots
                     if "cracked" in line_lower:
                         status_cracked = True
-                        cracked_found = True
                         break
                     # Check for any form of "Status....: Exhausted" with variable dots
                     elif "exhausted" in line_lower:
@@ -880,27 +1905,12 @@ class HashcatJobRunner:
                 if "progress" in content_lower and "100%" in content_lower and "stopped" in content_lower:
                     exhaust_check = True
             
-            # Check for actual cracked hashes in the output (they typically contain ":" character)
-            if not status_cracked:  # Only do this if we didn't already find "Status: Cracked"
-                for line in content.split("\n"):
-                    # More strict checking for cracked hashes
-                    # Lines with cracked passwords typically look like "hash:password"
-                    # We'll check for lines with at least one colon that aren't comments or headers
-                    if (":" in line and 
-                        not line.startswith("#") and 
-                        not line.startswith("Session") and 
-                        not line.startswith("Status") and
-                        not line.startswith("Recovered") and
-                        not "Progress" in line and
-                        not "Time" in line and
-                        not "Speed" in line):
-                            
-                        # Additional check to avoid counting system messages
-                        if line.strip().count(":") >= 1 and len(line.strip()) > 10:
-                            cracked_found = True
-                            cracked_count += 1
+            # Cracked results are ingested from the job's dedicated outfile, so the
+            # count is exact rather than guessed from the status screen
+            self.results_store.unwatch(job_id)
+            cracked_count = self.results_store.count(job_id)
             
-            # Parse recovered hashes info from status lines
+            # Total comes from the last "Recovered" status line, or the hashlist itself
             for line in content.split("\n"):
                 if "Recovered" in line and ":" in line:  # Make sure it's the right format
                     parts = line.split(":")
@@ -909,22 +1919,15 @@ class HashcatJobRunner:
                         if "/" in value_part:
                             try:
                                 fraction_part = value_part.split()[0]  # Get the first part which should be like "1/1"
-                                cracked = fraction_part.split("/")[0]
-                                total = fraction_part.split("/")[1]
-                                parsed_cracked = int(cracked)
-                                total_hashes = int(total)
-                                
-                                # Only update if we haven't found actual cracked hashes
-                                # or if the parsed count is higher
-                                if not cracked_found or parsed_cracked > cracked_count:
-                                    cracked_count = parsed_cracked
-                                    cracked_found = True
-                                    
-                                # If all hashes are cracked, set status_cracked
-                                if parsed_cracked == total_hashes and total_hashes > 0:
-                                    status_cracked = True
+                                total_hashes = int(fraction_part.split("/")[1])
                             except (IndexError, ValueError):
                                 pass
+            if not total_hashes or job.get("batch_members"):
+                # A batch lead's status screen counts the whole batch
+                total_hashes = len(read_hash_lines(self.jobs[job_id].get("hash_file_path", "")))
+            
+            if cracked_count > 0 and cracked_count >= total_hashes:
+                status_cracked = True
             
             # Set status based on cracking results
             if status_cracked or (cracked_count > 0 and cracked_count == total_hashes and total_hashes > 0):
@@ -935,6 +1938,7 @@ class HashcatJobRunner:
                 status = "failed"
             else:
                 status = "completed"
+            JOB_COMPLETION_PARSE_SECONDS.observe(time.perf_counter() - parse_start)
             
             # Update job with results
             self._update_job_status(
@@ -942,9 +1946,14 @@ class HashcatJobRunner:
                 status,
                 completed_at=datetime.now().isoformat(),
                 cracked_count=cracked_count,
-                total_hashes=total_hashes
+                total_hashes=total_hashes,
+                pause_requested=None,
+                pause_signalled=None
             )
             
+            # Merge the job's new potfile entries into the global potfile
+            self.potfile_manager.finalize_job(job_id, remove=True)
+            
             # Auto-delete hash file if enabled
             job = self.jobs[job_id]
             if job.get("auto_delete_hash", False):
@@ -958,7 +1967,8 @@ class HashcatJobRunner:
                         print(f"Failed to auto-delete hash file: {str(e)}")
                         
             # Check if there are any queued jobs that can now be started
-            threading.Thread(target=self._check_queue, daemon=True).start()
+            if check_queue:
+                threading.Thread(target=self._check_queue, daemon=True).start()
                         
         except Exception as e:
             print(f"Error processing job completion for {job_id}: {str(e)}")
@@ -986,18 +1996,27 @@ class HashcatJobRunner:
         job = self.jobs[job_id]
         
         # Update status
+        self._record_transition(job, job.get("status"), status)
         job["status"] = status
         
         # If status starts with 'completed' and no completed_at time, set it
         if status.startswith("completed") and not job.get("completed_at"):
-            job["completed_at"] = datetime.datetime.now().isoformat()
+            job["completed_at"] = datetime.now().isoformat()
             
         # Save jobs
         self._save_jobs()
+        self._notify_job_finished(job)
         return True
     
     def is_job_running(self, job_id: str) -> bool:
         """Check if a job is still running"""
+        with LIVENESS_CHECK_SECONDS.time():
+            running = self._check_job_running(job_id)
+        LIVENESS_CHECKS.labels("running" if running else "not_running").inc()
+        return running
+    
+    def _check_job_running(self, job_id: str) -> bool:
+        """Check the job's session and processes"""
         if job_id not in self.jobs:
             return False
             
@@ -1031,7 +2050,7 @@ class HashcatJobRunner:
         if session_name:
             if session_type == "tmux":
                 try:
-                    tmux_check = subprocess.run(
+                    tmux_check = run_subprocess(
                         ["tmux", "has-session", "-t", session_name],
                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
                     )
@@ -1040,7 +2059,7 @@ class HashcatJobRunner:
                     process_running = False
             elif session_type == "screen":
                 try:
-                    screen_check = subprocess.run(
+                    screen_check = run_subprocess(
                         ["screen", "-list", session_name],
                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False
                     )
@@ -1051,7 +2070,7 @@ class HashcatJobRunner:
         # Last resort check by pattern
         if not process_running:
             try:
-                ps_check = subprocess.run(
+                ps_check = run_subprocess(
                     ["pgrep", "-f", f"hashcat.*{job_id}"],
                     stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
                 )
@@ -1067,6 +2086,8 @@ class HashcatJobRunner:
             return False
             
         job = self.jobs[job_id]
+        if job.get("status") in PARKED_STATUSES:
+            return True
         output_file = job.get("output_file")
         session_name = job.get("session_name")
         session_type = job.get("session_type", "unknown")
@@ -1078,7 +2099,7 @@ class HashcatJobRunner:
         if session_name:
             if session_type == "tmux":
                 try:
-                    tmux_check = subprocess.run(
+                    tmux_check = run_subprocess(
                         ["tmux", "has-session", "-t", session_name],
                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
                     )
@@ -1087,7 +2108,7 @@ class HashcatJobRunner:
                     process_running = False
             elif session_type == "screen":
                 try:
-                    screen_check = subprocess.run(
+                    screen_check = run_subprocess(
                         ["screen", "-list", session_name],
                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False
                     )
@@ -1098,7 +2119,7 @@ class HashcatJobRunner:
         # Last resort check by pattern
         if not process_running:
             try:
-                ps_check = subprocess.run(
+                ps_check = run_subprocess(
                     ["pgrep", "-f", f"hashcat.*{job_id}"],
                     stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
                 )
@@ -1107,20 +2128,22 @@ class HashcatJobRunner:
                 process_running = False
                 
         # If job is still running and we're in tmux or screen, fetch latest output
-        if process_running and session_name and (session_type == "tmux" or session_type == "screen"):
+        # (a finished job's status log is already saved)
+        if process_running and session_name and (session_type == "tmux" or session_type == "screen") \
+                and job.get("status") in ("starting", "running"):
             try:
                 latest_output = []
                 
                 if session_type == "tmux":
-                    tmux_output = subprocess.run(
-                        ["tmux", "capture-pane", "-p", "-t", session_name],
+                    tmux_output = run_subprocess(
+                        ["tmux", "capture-pane", "-p", "-S", f"-{CAPTURE_HISTORY_LINES}", "-t", session_name],
                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False
                     )
                     if tmux_output.returncode == 0 and tmux_output.stdout:
                         latest_output = tmux_output.stdout.splitlines()
                 elif session_type == "screen":
                     screen_file = f"/tmp/screen_{job_id}.txt"
-                    subprocess.run(
+                    run_subprocess(
                         ["screen", "-S", session_name, "-X", "hardcopy", screen_file],
                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
                     )
@@ -1131,6 +2154,9 @@ class HashcatJobRunner:
                         os.remove(screen_file)
                 
                 if latest_output and output_file:
+                    latest_output, _ = self.output_logs.record_screen(job_id, latest_output,
+                                                                      job.get("resume_count", 0))
+                    
                     # Get the current output content
                     current_output = ""
                     if os.path.exists(output_file):
@@ -1180,21 +2206,113 @@ class HashcatJobRunner:
                 return False
         return False
         
+    def refresh_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Refresh a job's output and reconcile its status with what hashcat reported.
+        
+        Returns the updated job, or None if the refresh failed. This runs
+        subprocesses and file I/O, so request handlers should call it from a
+        worker thread.
+        """
+        job = self.jobs.get(job_id)
+        if not job:
+            return None
+        # Nothing is running, and a checkpoint's output must not read as a finished job
+        if job.get("status") in PARKED_STATUSES:
+            return job
+        
+        # Before refreshing, ensure any output file exists
+        output_path = os.path.join("outputs", f"hashcat_{job_id}.txt")
+        if not output_exists(output_path):
+            try:
+                with open(output_path, "w") as f:
+                    f.write("HASHCAT COMMAND:\n\nInitializing...\n")
+            except Exception as e:
+                print(f"Error creating output file: {str(e)}")
+                # Continue anyway, the refresh may still work
+        
+        success = self.refresh_job_output(job_id)
+        
+        job = self.jobs.get(job_id)
+        if job and not job.get("status", "").startswith("completed") and os.path.exists(output_path):
+            try:
+                self._reconcile_status_from_output(job_id, output_path)
+            except Exception as e:
+                print(f"Error reading output file during refresh: {str(e)}")
+        
+        updated_job = self.jobs.get(job_id)
+        if success or updated_job:
+            return updated_job
+        return None
+    
+    def _reconcile_status_from_output(self, job_id: str, output_path: str):
+        """Mark a job completed if the end of its output shows hashcat finished"""
+        # Hashcat's final status is at the end; don't parse the whole file
+        content = read_output_tail(output_path).lower()
+        lines = [line.strip() for line in content.split("\n")]
+        
+        # First, look for explicit status messages from hashcat
+        for line in lines:
+            if line.startswith("status") and ":" in line:
+                if "cracked" in line:
+                    self.update_job_status(job_id, "completed_success")
+                    return
+                if "exhausted" in line:
+                    self.update_job_status(job_id, "completed_exhausted")
+                    return
+        
+        # Otherwise only trust completion markers once hashcat has exited
+        if self.is_job_running(job_id):
+            return
+        
+        if "exhausted" in content or "approaching final keyspace" in content:
+            self.update_job_status(job_id, "completed_exhausted")
+        elif any(line.startswith("progress") and "100.00%" in line for line in lines):
+            if "recovered.....: 0/" not in content:  # Some hashes recovered
+                self.update_job_status(job_id, "completed_success")
+            else:  # No hashes recovered - exhausted
+                self.update_job_status(job_id, "completed_exhausted")
+    
     def delete_job(self, job_id: str) -> bool:
         """Delete a job"""
         if job_id not in self.jobs:
             return False
+        if self.jobs[job_id].get("pipeline_id"):
+            self.pipelines.job_deleted(self.jobs[job_id])
         
-        # Remove output file if exists
+        # Remove output, cracked and restore files if they exist
+        paths = [self.jobs[job_id].get(key) for key in ("output_file", "cracked_file", "restore_file")]
         output_file = self.jobs[job_id].get("output_file")
-        if output_file and os.path.exists(output_file):
-            try:
-                os.remove(output_file)
-            except:
-                pass
+        if output_file:
+            # The nohup log and pid file, and the compressed copies left by retention
+            paths += [f"{output_file}.log", f"{output_file}.pid",
+                      compressed_path(output_file), compressed_path(f"{output_file}.log")]
+            paths += log_chunks(f"{output_file}.log", compressed=True)
+        for path in paths:
+            if path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except:
+                    pass
+        
+        # Drop the job's cracked results
+        try:
+            self.results_store.delete_job(job_id)
+        except Exception as e:
+            print(f"Error deleting results for job {job_id}: {str(e)}")
+        self.timeseries.delete(job_id)
+        self.output_logs.delete(job_id)
         
         # Remove job from records
+        job = self.jobs[job_id]
+        was_running = job.get("status") in ("starting", "running")
+        batch_members = job.get("batch_members") or []
+        lead = self.jobs.get(job.get("batch_lead")) if job.get("status") == "batched" else None
         del self.jobs[job_id]
+        if lead and job_id in lead.get("batch_members", []):
+            # The shared run goes on for the remaining jobs
+            lead["batch_members"].remove(job_id)
+            self._route_batch_results(lead["id"])
         self._save_jobs()
         
         # Try to kill the background process if on Linux/Mac
@@ -1207,20 +2325,20 @@ class HashcatJobRunner:
                 
                 # Try tmux
                 try:
-                    tmux_check = subprocess.run(["which", "tmux"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                    tmux_check = run_subprocess(["which", "tmux"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
                     if tmux_check.returncode == 0:
                         print(f"Trying to kill tmux session: {session_name}")
-                        subprocess.run(["tmux", "kill-session", "-t", session_name], 
+                        run_subprocess(["tmux", "kill-session", "-t", session_name], 
                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
                 except Exception as e:
                     print(f"Error killing tmux session: {str(e)}")
                 
                 # Try screen
                 try:
-                    screen_check = subprocess.run(["which", "screen"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                    screen_check = run_subprocess(["which", "screen"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
                     if screen_check.returncode == 0:
                         print(f"Trying to kill screen session: {session_name}")
-                        subprocess.run(["screen", "-X", "-S", session_name, "quit"], 
+                        run_subprocess(["screen", "-X", "-S", session_name, "quit"], 
                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
                 except Exception as e:
                     print(f"Error killing screen session: {str(e)}")
@@ -1228,7 +2346,7 @@ class HashcatJobRunner:
                 # Kill by process name/pattern as last resort
                 try:
                     print(f"Trying to kill process by pattern: hashcat.*{job_id}")
-                    subprocess.run(f"pkill -f 'hashcat.*{job_id}'", shell=True, 
+                    run_subprocess(f"pkill -f 'hashcat.*{job_id}'", shell=True, 
                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
                 except Exception as e:
                     print(f"Error killing process by pattern: {str(e)}")
@@ -1236,4 +2354,47 @@ class HashcatJobRunner:
             except Exception as e:
                 print(f"Failed to kill session/process for job {job_id}: {str(e)}")
         
+        # Keep anything the job cracked, then drop its potfile
+        self.potfile_manager.finalize_job(job_id, remove=True)
+        
+        # Jobs batched with it go back into the queue with the cracks they already have
+        for member_id in batch_members:
+            if self.jobs.get(member_id, {}).get("status") == "batched":
+                self._update_job_status(member_id, "queued", batch_lead=None, started_at=None,
+                                        queued_at=datetime.now().isoformat())
+        batch_file = job.get("batch_hash_file")
+        if batch_file and os.path.exists(batch_file):
+            try:
+                os.remove(batch_file)
+            except OSError:
+                pass
+        
+        # Mask files written for a split mask attack belong to their job
+        mask = job.get("mask") or ""
+        if job.get("shard_group") and os.path.dirname(mask) == os.path.join(self.base_dir, "masks", "shards"):
+            try:
+                os.remove(mask)
+            except OSError:
+                pass
+        
+        # Let the next queued (or preempted) job have the devices
+        if was_running or batch_members:
+            threading.Thread(target=self._check_queue, daemon=True).start()
+        
         return True
+
+
+def read_output_tail(path: str, max_bytes: int = 64 * 1024) -> str:
+    """Read the last max_bytes of an output file, compressed or not"""
+    if not os.path.exists(path) and os.path.exists(compressed_path(path)):
+        # A gzip stream cannot seek from the end: read through, keeping the tail
+        tail = b""
+        with open_output(path) as f:
+            for chunk in iter(lambda: f.read(max_bytes), b""):
+                tail = (tail + chunk)[-max_bytes:]
+        return tail.decode("utf-8", errors="replace")
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(size - max_bytes, 0))
+        return f.read().decode("utf-8", errors="replace")
@@ -0,0 +1,242 @@
+import os
+import re
+import json
+import gzip
+import time
+import threading
+from typing import Any, Dict, List, Optional
+
+# Speeds as printed on hashcat's status screen, e.g. "1234.5 MH/s"
+SPEED_UNITS = {"H/s": 1, "kH/s": 1e3, "MH/s": 1e6, "GH/s": 1e9, "TH/s": 1e12, "PH/s": 1e15}
+SPEED_PATTERN = re.compile(r"^Speed\.#(\S+?)\.*:\s*([\d.]+)\s*([kMGTP]?H/s)")
+FIELD_PATTERN = re.compile(r"^([A-Za-z][A-Za-z0-9.#*]*?)\.*:\s*(.*)$")
+FRACTION_PATTERN = re.compile(r"(\d+)/(\d+)")
+TEMP_PATTERN = re.compile(r"Temp:\s*(\d+)c")
+
+
+def parse_status_block(lines: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Parse the last status block in hashcat output into a sample.
+
+    Understands the text status screen and --status-json lines. Returns None
+    when the lines contain no progress information.
+    """
+    # The last block starts at the last "Session" field or JSON status line
+    start = None
+    for i in range(len(lines) - 1, -1, -1):
+        line = lines[i].strip()
+        if line.startswith("{") and '"progress"' in line:
+            return _parse_status_json(line)
+        if line.startswith("Session.") or line.startswith("Status."):
+            start = i
+            if line.startswith("Session."):
+                break
+    if start is None:
+        return None
+
+    sample: Dict[str, Any] = {"speeds": {}, "temps": {}}
+    for raw in lines[start:]:
+        line = raw.strip()
+        if not line:
+            # A blank line ends the block
+            if "progress" in sample:
+                break
+            continue
+        speed = SPEED_PATTERN.match(line)
+        if speed:
+            device, value, unit = speed.groups()
+            rate = float(value) * SPEED_UNITS.get(unit, 1)
+            if device == "*":
+                sample["speed"] = rate
+            else:
+                sample["speeds"][device] = rate
+            continue
+        field = FIELD_PATTERN.match(line)
+        if not field:
+            continue
+        name, value = field.groups()
+        if name == "Status":
+            sample["status"] = value.strip()
+        elif name in ("Progress", "Recovered", "Rejected"):
+            fraction = FRACTION_PATTERN.search(value)
+            if fraction:
+                done, total = int(fraction.group(1)), int(fraction.group(2))
+                key = name.lower()
+                sample[key] = done
+                if name != "Rejected":
+                    sample[f"{key}_total"] = total
+        elif name.startswith("Hardware.Mon.#"):
+            temp = TEMP_PATTERN.search(value)
+            if temp:
+                sample["temps"][name[len("Hardware.Mon.#"):]] = int(temp.group(1))
+
+    if "progress" not in sample:
+        return None
+    if "speed" not in sample:
+        sample["speed"] = sum(sample["speeds"].values())
+    return sample
+
+
+def _parse_status_json(line: str) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None
+    devices = data.get("devices") or []
+    progress = data.get("progress") or [0, 0]
+    recovered = data.get("recovered_hashes") or [0, 0]
+    sample = {
+        "status": str(data.get("status", "")),
+        "progress": progress[0],
+        "progress_total": progress[1],
+        "recovered": recovered[0],
+        "recovered_total": recovered[1],
+        "rejected": data.get("rejected", 0),
+        "speeds": {str(d.get("device_id")): float(d.get("speed", 0)) for d in devices},
+        "temps": {str(d.get("device_id")): d["temp"] for d in devices if d.get("temp") is not None},
+    }
+    sample["speed"] = sum(sample["speeds"].values())
+    return sample
+
+
+def _merge_samples(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine consecutive samples: speeds and temperatures are averaged, counters keep the latest value"""
+    merged = dict(samples[-1])
+    count = len(samples)
+    merged["speed"] = sum(s.get("speed", 0) for s in samples) / count
+    for key in ("speeds", "temps"):
+        totals: Dict[str, float] = {}
+        for sample in samples:
+            for device, value in sample.get(key, {}).items():
+                totals[device] = totals.get(device, 0) + value
+        merged[key] = {device: value / count for device, value in totals.items()}
+    # Keep the slowest moment visible; a throttle dip shouldn't average away
+    merged["speed_min"] = min(s.get("speed_min", s.get("speed", 0)) for s in samples)
+    return merged
+
+
+class TimeSeriesBuffer:
+    """
+    Fixed-size, downsampling ring buffer of status samples.
+
+    Holds at most capacity samples. When full, adjacent pairs are merged,
+    halving the resolution, and from then on every `stride` incoming samples
+    are merged into one, so the buffer always spans the whole job at an
+    even resolution and never grows.
+    """
+    def __init__(self, capacity: int = 720):
+        self.capacity = max(2, capacity - capacity % 2)
+        self.samples: List[Dict[str, Any]] = []
+        self.stride = 1
+        self._pending: List[Dict[str, Any]] = []
+
+    def append(self, sample: Dict[str, Any]) -> None:
+        self._pending.append(sample)
+        if len(self._pending) < self.stride:
+            return
+        self.samples.append(_merge_samples(self._pending) if len(self._pending) > 1 else self._pending[0])
+        self._pending = []
+        if len(self.samples) >= self.capacity:
+            self.samples = [_merge_samples(self.samples[i:i + 2]) for i in range(0, len(self.samples), 2)]
+            self.stride *= 2
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Samples including any not yet merged into a full stride"""
+        if self._pending:
+            return self.samples + [_merge_samples(self._pending)]
+        return list(self.samples)
+
+
+class JobTimeSeriesStore:
+    """
+    Per-job speed/progress history.
+
+    Running jobs keep their samples in a TimeSeriesBuffer; when a job
+    finishes or is paused the buffer is written to timeseries/<job_id>.json.gz
+    and dropped from memory, and picked up again if the job resumes.
+    """
+    def __init__(self, base_dir: str, capacity: int = 720):
+        self.series_dir = os.path.join(base_dir, "timeseries")
+        self.capacity = capacity
+        self._buffers: Dict[str, TimeSeriesBuffer] = {}
+        self._last: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        try:
+            os.makedirs(self.series_dir, exist_ok=True)
+        except PermissionError:
+            print(f"WARNING: Permission denied creating directory: {self.series_dir}")
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.series_dir, f"{job_id}.json.gz")
+
+    def record(self, job_id: str, lines: List[str]) -> Optional[Dict[str, Any]]:
+        """Parse the latest status block from output lines and append it if it is new"""
+        sample = parse_status_block(lines)
+        if sample is None:
+            return None
+        # The same screen is captured until hashcat prints its next status
+        key = (sample.get("progress"), sample.get("speed"), sample.get("recovered"), sample.get("status"))
+        with self._lock:
+            if self._last.get(job_id) == key:
+                return None
+            self._last[job_id] = key
+            buffer = self._buffers.get(job_id)
+            if buffer is None:
+                buffer = self._buffers[job_id] = self._reopen(job_id)
+            sample["t"] = round(time.time(), 1)
+            buffer.append(sample)
+        return sample
+
+    def _reopen(self, job_id: str) -> TimeSeriesBuffer:
+        """A buffer for a job, continuing its compacted series if it was paused or interrupted"""
+        buffer = TimeSeriesBuffer(self.capacity)
+        path = self._path(job_id)
+        if os.path.exists(path):
+            try:
+                with gzip.open(path, "rt") as f:
+                    data = json.load(f)
+                buffer.samples = data.get("samples", [])[-(buffer.capacity - 1):]
+                buffer.stride = data.get("stride", 1)
+            except (OSError, ValueError) as e:
+                print(f"Error reading time series for job {job_id}: {str(e)}")
+        return buffer
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        """The job's samples, from memory while it runs or from disk afterwards"""
+        with self._lock:
+            buffer = self._buffers.get(job_id)
+            if buffer is not None:
+                return {"job_id": job_id, "live": True, "stride": buffer.stride, "samples": buffer.to_list()}
+        path = self._path(job_id)
+        if os.path.exists(path):
+            try:
+                with gzip.open(path, "rt") as f:
+                    data = json.load(f)
+                data["live"] = False
+                return data
+            except (OSError, ValueError) as e:
+                print(f"Error reading time series for job {job_id}: {str(e)}")
+        return {"job_id": job_id, "live": False, "stride": 1, "samples": []}
+
+    def finalize(self, job_id: str) -> None:
+        """Compact a finished job's samples to disk and free the buffer"""
+        with self._lock:
+            buffer = self._buffers.pop(job_id, None)
+            self._last.pop(job_id, None)
+        if buffer is None:
+            return
+        data = {"job_id": job_id, "stride": buffer.stride, "samples": buffer.to_list()}
+        try:
+            with gzip.open(self._path(job_id), "wt") as f:
+                json.dump(data, f, separators=(",", ":"))
+        except OSError as e:
+            print(f"Error saving time series for job {job_id}: {str(e)}")
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._buffers.pop(job_id, None)
+            self._last.pop(job_id, None)
+        try:
+            os.remove(self._path(job_id))
+        except OSError:
+            pass
@@ -1,41 +1,38 @@
 import os
+import csv
+import io
 import uuid
 import json
-import shutil
+import time
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Optional
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Request
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Request, Response
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from fastapi.middleware.gzip import GZipMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 import secrets
+import aiofiles
 import uvicorn
 from pydantic import BaseModel
 
-from auth import get_current_username, initialize_credentials
+from auth import get_current_username, get_admin_user, initialize_credentials, verify_credentials, refresh_identity
+from credential_cache import get_last_login_writer
+from session_tokens import ACCESS_COOKIE, REFRESH_COOKIE, TOKEN_ACCESS, TOKEN_REFRESH, get_session_signer
 from job_runner import HashcatJobRunner
+from job_estimates import format_duration
+from mask_attacks import MASK_ATTACK_MODES, read_hcmask
+from output_retention import compressed_path, iter_output, output_exists
+from scheduling import get_queue_policy
+from asgi_middleware import CompressionMiddleware, MetricsMiddleware, ProxyHeadersMiddleware, PublicRouteMiddleware
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, UPLOADS, UPLOAD_BYTES, UPLOAD_SECONDS, get_metrics_registry
 
 # Initialize credentials on startup to ensure we have valid credentials
 initialize_credentials()
 
-# Custom middleware for handling proxy headers
-class ProxyHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # Handle X-Forwarded headers from reverse proxy
-        if "x-forwarded-proto" in request.headers:
-            request.scope["scheme"] = request.headers["x-forwarded-proto"]
-        
-        if "x-forwarded-host" in request.headers:
-            request.scope["headers"].append(
-                (b"host", request.headers["x-forwarded-host"].encode())
-            )
-            
-        response = await call_next(request)
-        return response
-
 # Initialize FastAPI
 app = FastAPI(
     title="Hashcat Server API", 
@@ -44,10 +41,6 @@ app = FastAPI(
     root_path=os.getenv("ROOT_PATH", "")
 )
 
-# Add middlewares
-app.add_middleware(GZipMiddleware, minimum_size=1000)
-app.add_middleware(ProxyHeadersMiddleware)
-
 # Setup templates and static files
 templates = Jinja2Templates(directory="templates")
 
@@ -68,26 +61,60 @@ PUBLIC_ROUTES = [
     # Add any other routes that should be accessible without authentication
 ]
 
-# Custom middleware to bypass authentication for public routes
-class AuthenticationBypassMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # Check if the path is a public route
-        path = request.url.path
-        for public_route in PUBLIC_ROUTES:
-            if path.startswith(public_route):
-                # For public routes, add a special marker to skip auth in dependencies
-                request.state.skip_auth = True
-                return await call_next(request)
-        
-        # Apply authentication for all other routes
-        return await call_next(request)
-
-# Add authentication bypass middleware
-app.add_middleware(AuthenticationBypassMiddleware)
+# Prometheus scrapes /metrics with Basic Auth unless it is explicitly made public
+if os.getenv("METRICS_PUBLIC", "").lower() in ("1", "true", "yes"):
+    PUBLIC_ROUTES.append("/metrics")
+
+# Add middlewares (pure ASGI; the last one added runs first)
+app.add_middleware(CompressionMiddleware, minimum_size=1000)
+# Public routes are matched with a precompiled prefix trie and marked to skip auth
+app.add_middleware(PublicRouteMiddleware, prefixes=PUBLIC_ROUTES)
+# Per-route request counts and latencies; sits inside the proxy middleware,
+# which may copy the scope, so it sees the route the router matched
+app.add_middleware(MetricsMiddleware)
+# Handle X-Forwarded-*/Forwarded headers from trusted reverse proxies
+app.add_middleware(
+    ProxyHeadersMiddleware,
+    trusted_hosts=[host.strip() for host in os.getenv("FORWARDED_ALLOW_IPS", "*").split(",") if host.strip()]
+)
 
 # Initialize job runner
 job_runner = HashcatJobRunner()
 
+# Bounded pool for blocking work (subprocesses, file I/O, database queries) so
+# a slow refresh or upload never stalls the event loop for other requests
+blocking_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BLOCKING_WORKERS", "16")),
+    thread_name_prefix="blocking"
+)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call in the bounded worker pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_executor, functools.partial(func, *args, **kwargs))
+
+async def save_upload(upload: UploadFile, file_path: str, kind: str = "file"):
+    """Stream an uploaded file to disk without blocking the event loop"""
+    start = time.perf_counter()
+    received = 0
+    try:
+        async with aiofiles.open(file_path, "wb") as f:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                received += len(chunk)
+                await f.write(chunk)
+    except Exception:
+        UPLOADS.labels(kind, "error").inc()
+        raise
+    finally:
+        UPLOAD_BYTES.labels(kind).inc(received)
+    UPLOAD_SECONDS.labels(kind).observe(time.perf_counter() - start)
+    UPLOADS.labels(kind, "ok").inc()
+
 # Ensure directories exist
 os.makedirs("uploads", exist_ok=True)
 os.makedirs("hashes", exist_ok=True)
@@ -125,6 +152,81 @@ async def check_auth(username: str = Depends(get_current_username)):
     """Check if authentication is valid"""
     return {"authenticated": True, "username": username}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(username: str = Depends(get_current_username)):
+    """Prometheus metrics for the API, job runner, potfile and uploads"""
+    return Response(get_metrics_registry().render(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+class LoginRequest(BaseModel):
+    username: str
+    password: str
+
+class RefreshRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+class BenchmarkRequest(BaseModel):
+    modes: List[str]
+
+class RuleOptimizeRequest(BaseModel):
+    probe_wordlist: Optional[str] = None
+
+class PipelineStageRequest(BaseModel):
+    attack_mode: str
+    wordlist: str = ""
+    mask: str = ""
+    options: str = ""
+
+class PipelineRequest(BaseModel):
+    hash_mode: str
+    hash_file: str
+    stages: List[PipelineStageRequest]
+    priority: int = 0
+    deadline: Optional[str] = None
+
+def _issue_session(request: Request, response: Response, identity: dict, refresh_token: Optional[str] = None):
+    """Issue an access token (and a refresh token if none is given) as JSON and cookies"""
+    signer = get_session_signer()
+    access_token = signer.issue(identity, TOKEN_ACCESS)
+    secure = request.url.scheme == "https"
+    response.set_cookie(ACCESS_COOKIE, access_token, max_age=signer.access_ttl,
+                        httponly=True, samesite="lax", secure=secure)
+    if refresh_token is None:
+        refresh_token = signer.issue(identity, TOKEN_REFRESH)
+        response.set_cookie(REFRESH_COOKIE, refresh_token, max_age=signer.refresh_ttl,
+                            path="/api/auth", httponly=True, samesite="strict", secure=secure)
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "expires_in": signer.access_ttl,
+        "username": identity["username"]
+    }
+
+@app.post("/api/auth/login")
+async def login(request: Request, response: Response, login_data: LoginRequest):
+    """Verify credentials once and issue signed session tokens"""
+    identity = await run_blocking(verify_credentials, login_data.username, login_data.password)
+    if identity is None:
+        raise HTTPException(status_code=401, detail="Incorrect username or password")
+    get_last_login_writer().record(identity["id"])
+    return _issue_session(request, response, identity)
+
+@app.post("/api/auth/refresh")
+async def refresh_session(request: Request, response: Response, refresh_data: Optional[RefreshRequest] = None):
+    """Issue a new access token from a refresh token (body or cookie)"""
+    refresh_token = (refresh_data.refresh_token if refresh_data else None) or request.cookies.get(REFRESH_COOKIE)
+    identity = await run_blocking(refresh_identity, refresh_token)
+    if identity is None:
+        raise HTTPException(status_code=401, detail="Session expired")
+    return _issue_session(request, response, identity, refresh_token=refresh_token)
+
+@app.post("/api/auth/logout")
+async def logout(response: Response):
+    """Clear the session cookies"""
+    response.delete_cookie(ACCESS_COOKIE)
+    response.delete_cookie(REFRESH_COOKIE, path="/api/auth")
+    return {"status": "logged_out"}
+
 @app.get("/upload", response_class=HTMLResponse)
 async def upload_page(request: Request, username: str = Depends(get_current_username)):
     """Render the upload page"""
@@ -153,8 +255,7 @@ async def upload_hashlist(hashlist: UploadFile = File(...), username: str = Depe
     file_path = os.path.join("hashes", filename)
     
     try:
-        with open(file_path, "wb") as f:
-            shutil.copyfileobj(hashlist.file, f)
+        await save_upload(hashlist, file_path, "hashlist")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Could not upload file: {str(e)}")
     
@@ -169,38 +270,271 @@ async def upload_wordlist(wordlist: UploadFile = File(...), username: str = Depe
     file_path = os.path.join("wordlists", filename)
     
     try:
-        with open(file_path, "wb") as f:
-            shutil.copyfileobj(wordlist.file, f)
+        await save_upload(wordlist, file_path, "wordlist")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Could not upload file: {str(e)}")
     
-    return {"filename": filename, "path": file_path}
+    # Catalog the wordlist and warm hashcat's dictionary cache in the background
+    entry = await run_blocking(job_runner.wordlist_catalog.register, file_path)
+    
+    return {"filename": filename, "path": file_path, "dictstat": entry["dictstat"]}
+
+@app.post("/api/upload/rules")
+async def upload_rules(rules: UploadFile = File(...), username: str = Depends(get_current_username)):
+    """Upload a hashcat rule file"""
+    short_id = str(uuid.uuid4())[:8]
+    filename = f"{short_id}_{rules.filename}"
+    file_path = os.path.join("rules", filename)
+    
+    try:
+        await save_upload(rules, file_path, "rules")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not upload file: {str(e)}")
+    
+    entry = await run_blocking(job_runner.rule_catalog.register, file_path)
+    return {"filename": filename, "path": file_path, "rule_count": entry["rule_count"]}
+
+@app.post("/api/upload/masks")
+async def upload_masks(masks: UploadFile = File(...), username: str = Depends(get_current_username)):
+    """Upload a hashcat .hcmask file"""
+    short_id = str(uuid.uuid4())[:8]
+    filename = f"{short_id}_{masks.filename}"
+    file_path = os.path.join("masks", filename)
+    
+    try:
+        await save_upload(masks, file_path, "masks")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not upload file: {str(e)}")
+    
+    mask_count = len(await run_blocking(read_hcmask, file_path))
+    return {"filename": filename, "path": file_path, "mask_count": mask_count}
+
+@app.get("/api/rules")
+async def list_rules(username: str = Depends(get_current_username)):
+    """List catalogued rule files with their rule counts and optimization results"""
+    return {"rules": job_runner.rule_catalog.list()}
+
+@app.post("/api/rules/{filename}/optimize")
+async def optimize_rules(filename: str, request: Optional[RuleOptimizeRequest] = None,
+                         username: str = Depends(get_current_username)):
+    """Write a copy of a rule file without duplicate and no-op rules"""
+    if not job_runner.rule_catalog.get(filename):
+        raise HTTPException(status_code=404, detail="Rule file not found")
+    probe_wordlist = request.probe_wordlist if request else None
+    if probe_wordlist and not os.path.exists(os.path.join("wordlists", probe_wordlist)):
+        raise HTTPException(status_code=404, detail="Probe wordlist not found")
+    
+    entry = await run_blocking(job_runner.rule_catalog.optimize, filename, probe_wordlist)
+    return {"filename": entry["filename"], "rule_count": entry["rule_count"], "optimization": entry["optimization"]}
+
+@app.get("/api/wordlists")
+async def list_wordlists(username: str = Depends(get_current_username)):
+    """List catalogued wordlists with their metadata and dictionary cache state"""
+    return {"wordlists": job_runner.wordlist_catalog.list()}
+
+@app.get("/api/benchmarks")
+async def list_benchmarks(username: str = Depends(get_current_username)):
+    """List measured hashcat -b speeds by host, hash mode and device"""
+    return job_runner.hash_benchmarks.list()
+
+@app.post("/api/benchmarks")
+async def run_benchmarks(request: BenchmarkRequest, user = Depends(get_admin_user)):
+    """Queue hash modes to be benchmarked the next time the scheduler is idle"""
+    modes = [mode.strip() for mode in request.modes if mode.strip()]
+    if not modes or not all(mode.isdigit() for mode in modes):
+        raise HTTPException(status_code=400, detail="Hash modes must be numbers")
+    
+    queued = [mode for mode in modes if job_runner.hash_benchmarks.enqueue(mode)]
+    return {"queued": queued, "pending": job_runner.hash_benchmarks.list()["pending"]}
+
+def _parse_deadline(deadline: Optional[str]) -> Optional[str]:
+    """Validate an ISO 8601 deadline and convert it to naive local time like job timestamps"""
+    if not deadline:
+        return None
+    try:
+        parsed = datetime.fromisoformat(deadline)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Deadline must be an ISO 8601 date and time")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.isoformat()
+
+def _resolve_attack_inputs(attack_mode: str, wordlist: str, mask: str) -> tuple:
+    """
+    Check a job's wordlist and mask against its attack mode: brute force (-a 3)
+    takes a mask, hybrid attacks (-a 6/7) both, the others a wordlist. A mask
+    is an uploaded .hcmask file's name or an inline mask like ?u?l?l?l?d?d.
+    Returns the wordlist path and the mask (None when not used).
+    """
+    wordlist_path = None
+    if attack_mode != "3":
+        if not wordlist:
+            raise HTTPException(status_code=400, detail=f"Attack mode {attack_mode} needs a wordlist")
+        wordlist_path = os.path.join("wordlists", wordlist)
+        if not os.path.exists(wordlist_path):
+            raise HTTPException(status_code=404, detail=f"Wordlist not found: {wordlist}")
+    if attack_mode not in MASK_ATTACK_MODES:
+        return wordlist_path, None
+    if not mask:
+        raise HTTPException(status_code=400, detail=f"Attack mode {attack_mode} needs a mask or .hcmask file")
+    mask_path = os.path.join("masks", mask)
+    if os.path.isfile(mask_path):
+        return wordlist_path, mask_path
+    if mask.endswith(".hcmask"):
+        raise HTTPException(status_code=404, detail=f"Mask file not found: {mask}")
+    if "'" in mask:
+        raise HTTPException(status_code=400, detail="Inline masks cannot contain ' (use ?s or an .hcmask file)")
+    return wordlist_path, mask
 
 @app.post("/api/run/hashcat")
 async def run_hashcat(
     hash_mode: str = Form(...),
     attack_mode: str = Form(...),
     hash_file: str = Form(...),
-    wordlist: str = Form(...),
+    wordlist: str = Form(""),
+    mask: str = Form(""),
+    increment: bool = Form(False),
+    increment_min: int = Form(0),
+    increment_max: int = Form(0),
+    split_masks: bool = Form(True),
     options: str = Form(""),
     auto_delete_hash: bool = Form(False),
     queue_if_busy: bool = Form(False),
+    dry_run: bool = Form(False),
+    deadline: str = Form(""),
+    priority: int = Form(0),
+    rule_file: str = Form(""),
     username: str = Depends(get_current_username)
 ):
-    """Launch a hashcat job"""
+    """
+    Launch a hashcat job, or with dry_run only estimate its keyspace and runtime.
+    Long brute-force attacks are split into jobs run side by side (split_masks).
+    """
     hash_file_path = os.path.join("hashes", hash_file)
-    wordlist_path = os.path.join("wordlists", wordlist)
     
     if not os.path.exists(hash_file_path):
         raise HTTPException(status_code=404, detail="Hash file not found")
-    if not os.path.exists(wordlist_path):
-        raise HTTPException(status_code=404, detail="Wordlist not found")
+    wordlist_path, mask = _resolve_attack_inputs(attack_mode, wordlist, mask)
+    if increment:
+        if not mask:
+            raise HTTPException(status_code=400, detail="Increment mode needs a mask")
+        options = " ".join(part for part in (
+            options, "--increment",
+            f"--increment-min={increment_min}" if increment_min else "",
+            f"--increment-max={increment_max}" if increment_max else ""
+        ) if part)
+    if rule_file:
+        rule_path = os.path.join("rules", rule_file)
+        if not os.path.exists(rule_path):
+            raise HTTPException(status_code=404, detail="Rule file not found")
+        options = f'{options} -r "{os.path.abspath(rule_path)}"'.strip()
+    deadline = _parse_deadline(deadline)
+    
+    estimate = await run_blocking(
+        job_runner.estimate_job,
+        hash_mode, attack_mode, hash_file_path, wordlist_path, options, mask
+    )
+    brute_force = attack_mode == "3"
+    if dry_run:
+        response = {"status": "dry_run", "estimate": estimate}
+        if brute_force and split_masks and not estimate.get("potfile_only"):
+            shards = await run_blocking(job_runner.plan_mask_attack, hash_mode, mask, options, estimate)
+            response["shards"] = [
+                {"masks": [entry["mask"] for entry in shard["entries"]], "skip": shard["skip"],
+                 "limit": shard["limit"], "candidates": shard["candidates"],
+                 "estimated_runtime": format_duration(shard["estimated_seconds"])}
+                for shard in shards
+            ]
+        return response
+    if estimate["over_budget"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Estimated runtime {estimate['estimated_runtime']} exceeds the "
+                   f"{format_duration(estimate['budget_seconds'])} job budget"
+        )
+    
+    if brute_force:
+        result = await run_blocking(
+            job_runner.start_mask_attack,
+            hash_mode, hash_file_path, mask, options, auto_delete_hash, queue_if_busy,
+            estimate, deadline or None, priority, split_masks
+        )
+    else:
+        result = await run_blocking(
+            job_runner.start_job,
+            hash_mode, attack_mode, hash_file_path, wordlist_path, 
+            options, auto_delete_hash, queue_if_busy, estimate, deadline or None, priority, mask=mask
+        )
+    return {**result, "estimate": estimate}
+
+@app.post("/api/pipelines")
+async def create_pipeline(request: PipelineRequest, username: str = Depends(get_current_username)):
+    """Run attack stages in order, each over only the hashes earlier stages left uncracked"""
+    hash_file_path = os.path.join("hashes", request.hash_file)
+    if not os.path.exists(hash_file_path):
+        raise HTTPException(status_code=404, detail="Hash file not found")
+    if not request.stages:
+        raise HTTPException(status_code=400, detail="A pipeline needs at least one stage")
+    stages = []
+    for stage in request.stages:
+        wordlist_path, mask = _resolve_attack_inputs(stage.attack_mode, stage.wordlist, stage.mask)
+        stages.append({"attack_mode": stage.attack_mode, "wordlist": wordlist_path, "mask": mask,
+                       "options": stage.options})
     
-    result = job_runner.start_job(
-        hash_mode, attack_mode, hash_file_path, wordlist_path, 
-        options, auto_delete_hash, queue_if_busy
+    pipeline = await run_blocking(
+        job_runner.pipelines.create,
+        request.hash_mode, hash_file_path, stages, request.priority, _parse_deadline(request.deadline)
     )
-    return result
+    return {"pipeline_id": pipeline["id"], "status": pipeline["status"], "pipeline": pipeline}
+
+@app.get("/api/pipelines")
+async def list_pipelines(username: str = Depends(get_current_username)):
+    """List pipelines with their stages and aggregate progress"""
+    return {"pipelines": job_runner.pipelines.list()}
+
+@app.get("/api/pipelines/{pipeline_id}")
+async def get_pipeline(pipeline_id: str, username: str = Depends(get_current_username)):
+    """Get a pipeline's stages, current stage and cracked count across all stages"""
+    pipeline = job_runner.pipelines.get(pipeline_id)
+    if not pipeline:
+        raise HTTPException(status_code=404, detail="Pipeline not found")
+    return {"pipeline": pipeline}
+
+@app.get("/api/pipelines/{pipeline_id}/results")
+async def get_pipeline_results(
+    pipeline_id: str,
+    offset: int = 0,
+    limit: int = 100,
+    username: str = Depends(get_current_username)
+):
+    """Get a page of the results collected from a pipeline's finished stages"""
+    if not job_runner.pipelines.get(pipeline_id):
+        raise HTTPException(status_code=404, detail="Pipeline not found")
+    
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), 1000)
+    return {
+        "pipeline_id": pipeline_id,
+        "total": await run_blocking(job_runner.results_store.count, pipeline_id),
+        "offset": offset,
+        "limit": limit,
+        "results": await run_blocking(job_runner.results_store.get_results, pipeline_id, offset, limit)
+    }
+
+@app.delete("/api/pipelines/{pipeline_id}")
+async def delete_pipeline(pipeline_id: str, username: str = Depends(get_current_username)):
+    """Delete a pipeline, stopping its current stage and removing its stage jobs"""
+    if not await run_blocking(job_runner.pipelines.delete, pipeline_id):
+        raise HTTPException(status_code=404, detail="Pipeline not found")
+    return {"status": "deleted"}
+
+@app.get("/api/job-groups/{group_id}")
+async def get_job_group(group_id: str, username: str = Depends(get_current_username)):
+    """Get the jobs of a split brute-force attack and their combined progress"""
+    group = await run_blocking(job_runner.get_job_group, group_id)
+    if not group:
+        raise HTTPException(status_code=404, detail="Job group not found")
+    return {"group": group}
 
 @app.get("/api/jobs")
 async def list_jobs(username: str = Depends(get_current_username)):
@@ -214,7 +548,8 @@ async def get_jobs_status(username: str = Depends(get_current_username)):
         "has_running_jobs": job_runner.has_running_jobs(),
         "total_jobs": len(job_runner.jobs),
         "running_jobs": sum(1 for job in job_runner.list_jobs() if job["status"] in ["running", "starting"]),
-        "queued_jobs": sum(1 for job in job_runner.list_jobs() if job["status"] == "queued")
+        "queued_jobs": sum(1 for job in job_runner.list_jobs() if job["status"] == "queued"),
+        "queue_policy": get_queue_policy().name
     }
 
 @app.get("/api/jobs/{job_id}")
@@ -225,16 +560,10 @@ async def get_job(job_id: str, username: str = Depends(get_current_username)):
         raise HTTPException(status_code=404, detail="Job not found")
     return {"job": job}
 
-@app.get("/api/jobs/{job_id}/output")
-async def get_job_output(job_id: str, username: str = Depends(get_current_username)):
-    """Get job output file"""
-    # First check if the job exists
-    job = job_runner.get_job(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    
+def _prepare_job_output(job_id: str, job: dict) -> str:
+    """Make sure a job's output file exists and is up to date, returning its path"""
     output_path = os.path.join("outputs", f"hashcat_{job_id}.txt")
-    if not os.path.exists(output_path):
+    if not output_exists(output_path):
         # If the output file doesn't exist, create a simple one with job info
         try:
             with open(output_path, "w") as f:
@@ -243,19 +572,115 @@ async def get_job_output(job_id: str, username: str = Depends(get_current_userna
                 f.write(f"Status: {job.get('status', 'Unknown')}\n")
                 f.write(f"Started: {job.get('started_at', 'Unknown')}\n")
                 f.write(f"Completed: {job.get('completed_at', 'Not completed')}\n\n")
-                f.write("No output available for this job.")
+                if job.get("output_deleted"):
+                    f.write("Output removed by the outputs size limit (jobs.outputs_max_mb).")
+                else:
+                    f.write("No output available for this job.")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error creating output file: {str(e)}")
     
     # For completed jobs with existing output, ensure we get any potential
     # last bit of output that might have been missed
     if job.get("status", "").startswith("completed") and os.path.exists(output_path):
-        # Before returning the file, check if it's a completed job and refresh its output
-        # This ensures we've captured all final output
         job_runner.refresh_job_output(job_id)
+    return output_path
+
+@app.get("/api/jobs/{job_id}/output")
+async def get_job_output(job_id: str, request: Request, username: str = Depends(get_current_username)):
+    """Get job output file"""
+    # First check if the job exists
+    job = job_runner.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    output_path = await run_blocking(_prepare_job_output, job_id, job)
+    if os.path.exists(output_path):
+        return FileResponse(output_path, media_type="text/plain", filename=f"hashcat_{job_id}.txt")
+    
+    # Compressed by retention: send the gzip as is to clients that accept it,
+    # and decompress on the fly for the rest
+    disposition = {"Content-Disposition": f'attachment; filename="hashcat_{job_id}.txt"'}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return FileResponse(compressed_path(output_path), media_type="text/plain",
+                            headers={**disposition, "Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    return StreamingResponse(iter_output(output_path), media_type="text/plain", headers=disposition)
+
+@app.get("/api/jobs/{job_id}/timeseries")
+async def get_job_timeseries(job_id: str, username: str = Depends(get_current_username)):
+    """Get a job's speed, progress, recovered and rejected samples"""
+    job = job_runner.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return await run_blocking(job_runner.timeseries.get, job_id)
+
+@app.get("/api/jobs/{job_id}/status-log")
+async def get_job_status_log(job_id: str, username: str = Depends(get_current_username)):
+    """Get a job's latest status block, sampled status history and non-status output lines"""
+    job = job_runner.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return await run_blocking(job_runner.output_logs.get, job_id)
+
+@app.get("/api/jobs/{job_id}/results")
+async def get_job_results(
+    job_id: str,
+    offset: int = 0,
+    limit: int = 100,
+    username: str = Depends(get_current_username)
+):
+    """Get a page of cracked results for a job"""
+    job = job_runner.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
     
-    return FileResponse(output_path, media_type="text/plain", filename=f"hashcat_{job_id}.txt")
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), 1000)
+    return {
+        "job_id": job_id,
+        "total": await run_blocking(job_runner.results_store.count, job_id),
+        "offset": offset,
+        "limit": limit,
+        "results": await run_blocking(job_runner.results_store.get_results, job_id, offset, limit)
+    }
+
+@app.get("/api/jobs/{job_id}/results/export")
+async def export_job_results(job_id: str, format: str = "csv", username: str = Depends(get_current_username)):
+    """Stream all cracked results for a job as CSV or JSONL"""
+    job = job_runner.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if format not in ("csv", "jsonl"):
+        raise HTTPException(status_code=400, detail="Format must be 'csv' or 'jsonl'")
+    
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["hash", "plain", "cracked_at"])
+        for result in job_runner.results_store.iter_results(job_id):
+            writer.writerow([result["hash"], result["plain"], result["cracked_at"]])
+            if buffer.tell() > 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    def generate_jsonl():
+        for result in job_runner.results_store.iter_results(job_id):
+            yield json.dumps(result) + "\n"
+    
+    if format == "csv":
+        content, media_type = generate_csv(), "text/csv"
+    else:
+        content, media_type = generate_jsonl(), "application/x-ndjson"
     
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="hashcat_{job_id}_results.{format}"'}
+    )
+
 @app.post("/api/jobs/{job_id}/refresh")
 async def refresh_job(job_id: str, username: str = Depends(get_current_username)):
     """Force refresh of job output and status"""
@@ -263,125 +688,9 @@ async def refresh_job(job_id: str, username: str = Depends(get_current_username)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    # Before refreshing, ensure any output file exists
-    output_path = os.path.join("outputs", f"hashcat_{job_id}.txt")
-    if not os.path.exists(output_path):
-        # If the output file doesn't exist, create an empty one
-        try:
-            with open(output_path, "w") as f:
-                f.write("HASHCAT COMMAND:\n\nInitializing...\n")
-        except Exception as e:
-            print(f"Error creating output file: {str(e)}")
-            # Continue anyway, the refresh may still work
-    
-    success = job_runner.refresh_job_output(job_id)
-    
-    # Get the updated job information
-    updated_job = job_runner.get_job(job_id)
-    
-    # Check if the job is actually complete but not marked as such
-    if updated_job and not updated_job.get('status').startswith('completed'):
-        # Make sure the job is still running
-        is_job_running = job_runner.is_job_running(job_id)
-        output_path = os.path.join("outputs", f"hashcat_{job_id}.txt")
-        
-        # Only process if the output file exists
-        if os.path.exists(output_path):
-            try:
-                with open(output_path, "r") as f:
-                    content = f.read().lower()
-                    
-                    # Check hashcat status lines
-                    status_found = False
-                    
-                    # First, look for explicit status messages from hashcat
-                    for line in content.split("\n"):
-                        line_lower = line.lower().strip()
-                        if line_lower.startswith("status") and ":" in line_lower:
-                            if "cracked" in line_lower:
-                                # If hashcat explicitly reports "Cracked", mark as success
-                                job_runner.update_job_status(job_id, "completed_success")
-                                updated_job = job_runner.get_job(job_id)
-                                status_found = True
-                                break
-                            elif "exhausted" in line_lower:
-                                # If hashcat explicitly reports "Exhausted", mark as exhausted
-                                job_runner.update_job_status(job_id, "completed_exhausted")
-                                updated_job = job_runner.get_job(job_id)
-                                status_found = True
-                                break
-                    
-                    # If we didn't find an explicit status line, use backup methods
-                    if not status_found:
-                        # Check if the job is explicitly exhausted
-                        if "exhausted" in content or "keyspace exhausted" in content or "approaching final keyspace" in content:
-                            if not is_job_running:
-                                # If job is not running and has exhaustion marker, mark as exhausted
-                                job_runner.update_job_status(job_id, "completed_exhausted")
-                                # Get the updated job info again
-                                updated_job = job_runner.get_job(job_id)
-                        
-                        # Check for 100% progress as an additional completion indicator
-                        elif not is_job_running:
-                            progress_complete = False
-                            for line in content.split("\n"):
-                                line_lower = line.lower().strip()
-                                if line_lower.startswith("progress") and "100.00%" in line_lower:
-                                    progress_complete = True
-                                    break
-                            
-                            if progress_complete:
-                                # If job shows 100% progress and is not running, mark as completed
-                                if "recovered.....: 0/" not in content.lower():  # Some hashes recovered
-                                    job_runner.update_job_status(job_id, "completed_success")
-                                else:  # No hashes recovered - exhausted
-                                    job_runner.update_job_status(job_id, "completed_exhausted")
-                                # Get the updated job info again
-                                updated_job = job_runner.get_job(job_id)
-                    
-                    # Check for cracked hashes
-                    elif any(marker in content for marker in ["all hashes have been recovered", "all hashes found"]):
-                        if not is_job_running:
-                            # If job is not running and all hashes found, mark as success
-                            job_runner.update_job_status(job_id, "completed_success")
-                            # Get the updated job info again
-                            updated_job = job_runner.get_job(job_id)
-                    
-                    # Check for 100% progress indicator (usually means job is complete)
-                    elif not status_found:
-                        for line in content.split("\n"):
-                            line_lower = line.lower().strip()
-                            # Look for progress: 100% lines
-                            if line_lower.startswith("progress") and "100.00%" in line_lower:
-                                # If we see 100% progress but hashcat is not running anymore
-                                if not is_job_running:
-                                    # Check if we see recovered lines that indicate success
-                                    if "recovered.....: 0/" not in content.lower():  # Some hashes recovered
-                                        job_runner.update_job_status(job_id, "completed_success")
-                                    else:  # No hashes recovered - exhausted
-                                        job_runner.update_job_status(job_id, "completed_exhausted")
-                                    # Get the updated job info again
-                                    updated_job = job_runner.get_job(job_id)
-                                    status_found = True
-                                    break
-                    
-                    # Check for other completion markers, but only if the job is not running anymore
-                    elif not status_found and not is_job_running and any(marker in content for marker in [
-                        "session completed", 
-                        "session stopped", 
-                        "finished",
-                        "hashcat stopped!",
-                        "[Job Complete]",  # Our custom completion marker
-                        "Waiting 10 seconds to capture final status"  # Our custom delay message
-                    ]):
-                        # Update job status to completed
-                        job_runner.update_job_status(job_id, "completed")
-                        # Get the updated job info again
-                        updated_job = job_runner.get_job(job_id)
-            except Exception as e:
-                print(f"Error reading output file during refresh: {str(e)}")
-    
-    if success or updated_job:
+    updated_job = await run_blocking(job_runner.refresh_job, job_id)
+    
+    if updated_job:
         return {
             "status": "refreshed", 
             "job_id": job_id,
@@ -390,9 +699,8 @@ async def refresh_job(job_id: str, username: str = Depends(get_current_username)
     else:
         raise HTTPException(status_code=500, detail="Failed to refresh job output")
     
-@app.get("/api/files")
-async def list_uploaded_files(username: str = Depends(get_current_username)):
-    """List all files in the hashes and wordlists directories"""
+def _list_uploaded_files() -> list:
+    """List all files in the hashes, wordlists, rules and masks directories"""
     files = []
     
     # List hash files
@@ -407,12 +715,35 @@ async def list_uploaded_files(username: str = Depends(get_current_username)):
     # List wordlist files
     if os.path.exists("wordlists"):
         for file in os.listdir("wordlists"):
+            entry = job_runner.wordlist_catalog.get(file)
             files.append({
                 "filename": file,
                 "path": os.path.join("wordlists", file),
-                "type": "wordlist"
+                "type": "wordlist",
+                "dictstat": entry["dictstat"] if entry else None
+            })
+    
+    # List rule files
+    if os.path.exists("rules"):
+        for file in os.listdir("rules"):
+            entry = job_runner.rule_catalog.get(file)
+            files.append({
+                "filename": file,
+                "path": os.path.join("rules", file),
+                "type": "rules",
+                "rule_count": entry["rule_count"] if entry else None
             })
     
+    # List mask files
+    if os.path.exists("masks"):
+        for file in os.listdir("masks"):
+            if os.path.isfile(os.path.join("masks", file)):
+                files.append({
+                    "filename": file,
+                    "path": os.path.join("masks", file),
+                    "type": "masks"
+                })
+    
     # For backward compatibility - check uploads directory too
     if os.path.exists("uploads"):
         for file in os.listdir("uploads"):
@@ -422,12 +753,41 @@ async def list_uploaded_files(username: str = Depends(get_current_username)):
                 "type": "wordlist" if file.endswith((".txt", ".dict", ".wordlist")) else "hashlist"
             })
             
-    return {"files": files}
+    return files
+
+@app.get("/api/files")
+async def list_uploaded_files(username: str = Depends(get_current_username)):
+    """List all files in the hashes, wordlists, rules and masks directories"""
+    return {"files": await run_blocking(_list_uploaded_files)}
+
+@app.post("/api/jobs/{job_id}/pause")
+async def pause_job(job_id: str, username: str = Depends(get_current_username)):
+    """Stop a running job at its next checkpoint so it can be resumed later"""
+    job = job_runner.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job_runner.in_batch(job):
+        raise HTTPException(status_code=400, detail="Batched jobs share one hashcat run and cannot be paused on their own; "
+                                                    "delete a batched job to take it out of the run")
+    if not await run_blocking(job_runner.pause_job, job_id):
+        raise HTTPException(status_code=400, detail="Only running jobs can be paused, and jobs without a terminal only "
+                                                    "once hashcat has written a restore point")
+    return {"status": "pausing", "job_id": job_id}
+
+@app.post("/api/jobs/{job_id}/resume")
+async def resume_job(job_id: str, username: str = Depends(get_current_username)):
+    """Resume an interrupted or paused job from its last checkpoint"""
+    job = job_runner.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not await run_blocking(job_runner.resume_job, job_id):
+        raise HTTPException(status_code=400, detail="Job has no checkpoint to resume from")
+    return {"status": job_runner.get_job(job_id)["status"], "job_id": job_id}
 
 @app.delete("/api/jobs/{job_id}")
 async def delete_job(job_id: str, username: str = Depends(get_current_username)):
     """Delete a job"""
-    success = job_runner.delete_job(job_id)
+    success = await run_blocking(job_runner.delete_job, job_id)
     if not success:
         raise HTTPException(status_code=404, detail="Job not found")
     return {"status": "deleted"}
@@ -453,7 +813,7 @@ async def delete_hash_file(job_id: str, username: str = Depends(get_current_user
     
     # Delete the file
     try:
-        os.remove(hash_file_path)
+        await run_blocking(os.remove, hash_file_path)
         return {"status": "deleted", "file": hash_file_name}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete hash file: {str(e)}")
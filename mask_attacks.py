@@ -0,0 +1,285 @@
+import os
+import math
+import shlex
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+# Attack modes that take a mask: brute force and the two hybrid attacks
+MASK_ATTACK_MODES = ("3", "6", "7")
+
+# hashcat's built-in charsets
+BUILTIN_CHARSETS = {
+    "l": "abcdefghijklmnopqrstuvwxyz",
+    "u": "ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+    "d": "0123456789",
+    "h": "0123456789abcdef",
+    "H": "0123456789ABCDEF",
+    "s": " !\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~",
+}
+BUILTIN_CHARSETS["a"] = BUILTIN_CHARSETS["l"] + BUILTIN_CHARSETS["u"] + BUILTIN_CHARSETS["d"] + BUILTIN_CHARSETS["s"]
+
+# Custom charset options, as on the hashcat command line
+CUSTOM_CHARSET_OPTIONS = {"-1": 0, "-2": 1, "-3": 2, "-4": 3}
+
+
+def _split_escaped(line: str) -> List[str]:
+    """Split an .hcmask line on commas not escaped as \\,"""
+    fields, current, i = [], "", 0
+    while i < len(line):
+        if line[i] == "\\" and i + 1 < len(line) and line[i + 1] == ",":
+            current += ","
+            i += 2
+            continue
+        if line[i] == ",":
+            fields.append(current)
+            current = ""
+        else:
+            current += line[i]
+        i += 1
+    fields.append(current)
+    return fields
+
+
+def parse_hcmask_line(line: str) -> Optional[Tuple[List[Optional[str]], str]]:
+    """(custom charsets ?1-?4, mask) of an .hcmask line, or None for blanks and comments"""
+    line = line.rstrip("\r\n")
+    if not line.strip() or line.startswith("#"):
+        return None
+    fields = _split_escaped(line)
+    charsets: List[Optional[str]] = fields[:-1][:4]
+    return charsets + [None] * (4 - len(charsets)), fields[-1]
+
+
+def read_hcmask(path: str) -> List[Tuple[List[Optional[str]], str]]:
+    """The masks of an .hcmask file with their custom charsets"""
+    masks = []
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            parsed = parse_hcmask_line(line)
+            if parsed:
+                masks.append(parsed)
+    return masks
+
+
+def custom_charsets(options: str) -> List[Optional[str]]:
+    """Custom charsets given with -1..-4 / --custom-charset1..4 in an option string"""
+    charsets: List[Optional[str]] = [None] * 4
+    try:
+        tokens = shlex.split(options or "")
+    except ValueError:
+        return charsets
+    for i, token in enumerate(tokens):
+        if token in CUSTOM_CHARSET_OPTIONS and i + 1 < len(tokens):
+            charsets[CUSTOM_CHARSET_OPTIONS[token]] = tokens[i + 1]
+        elif token.startswith("--custom-charset") and "=" in token:
+            number = token[len("--custom-charset"):].split("=", 1)[0]
+            if number in ("1", "2", "3", "4"):
+                charsets[int(number) - 1] = token.split("=", 1)[1]
+    return charsets
+
+
+def increment_range(options: str) -> Optional[Tuple[int, int]]:
+    """(min, max) lengths if --increment is in an option string; max 0 means the whole mask"""
+    try:
+        tokens = shlex.split(options or "")
+    except ValueError:
+        return None
+    if "--increment" not in tokens and "-i" not in tokens:
+        return None
+    bounds = {"--increment-min": 1, "--increment-max": 0}
+    for i, token in enumerate(tokens):
+        name, _, value = token.partition("=")
+        if name in bounds:
+            if not value and i + 1 < len(tokens):
+                value = tokens[i + 1]
+            if value.isdigit():
+                bounds[name] = int(value)
+    return bounds["--increment-min"], bounds["--increment-max"]
+
+
+def strip_mask_options(options: str) -> str:
+    """An option string without its custom charset and --increment options"""
+    try:
+        tokens = shlex.split(options or "")
+    except ValueError:
+        return options
+    with_value = set(CUSTOM_CHARSET_OPTIONS) | {"--increment-min", "--increment-max"}
+    kept, skip = [], False
+    for token in tokens:
+        if skip:
+            skip = False
+            continue
+        name = token.split("=", 1)[0]
+        if token in with_value:
+            skip = True
+        elif token in ("--increment", "-i") or name in ("--increment-min", "--increment-max") \
+                or name.startswith("--custom-charset"):
+            continue
+        else:
+            kept.append(quote_arg(token) if token != shlex.quote(token) else token)
+    return " ".join(kept)
+
+
+def quote_arg(value: str) -> str:
+    """Double-quote an argument for the shell command hashcat runs in"""
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("$", "\\$").replace("`", "\\`")
+    return f'"{escaped}"'
+
+
+def mask_positions(mask: str) -> List[str]:
+    """A mask split into its positions: ?x placeholders and literal characters"""
+    positions, i = [], 0
+    while i < len(mask):
+        if mask[i] == "?" and i + 1 < len(mask):
+            positions.append(mask[i:i + 2])
+            i += 2
+        else:
+            positions.append(mask[i])
+            i += 1
+    return positions
+
+
+def _charset_chars(charset: str, custom: List[Optional[str]], depth: int = 0) -> set:
+    chars = set()
+    for position in mask_positions(charset):
+        if len(position) == 2 and depth < 4:
+            key = position[1]
+            if key in BUILTIN_CHARSETS:
+                chars.update(BUILTIN_CHARSETS[key])
+            elif key == "b":
+                chars.update(chr(c) for c in range(256))
+            elif key in "1234" and custom[int(key) - 1]:
+                chars.update(_charset_chars(custom[int(key) - 1], custom, depth + 1))
+            elif key == "?":
+                chars.add("?")
+        else:
+            chars.update(position)
+    return chars
+
+
+def mask_candidates(mask: str, custom: List[Optional[str]]) -> int:
+    """Candidates a mask produces: the product of its positions' charset sizes"""
+    total = 1
+    for position in mask_positions(mask):
+        total *= max(len(_charset_chars(position, custom)), 1) if len(position) == 2 else 1
+    return total
+
+
+def increment_masks(mask: str, minimum: int = 1, maximum: int = 0) -> List[str]:
+    """The masks hashcat --increment tries: the first N positions for each length in range"""
+    positions = mask_positions(mask)
+    maximum = min(maximum or len(positions), len(positions))
+    return ["".join(positions[:length]) for length in range(max(minimum, 1), maximum + 1)]
+
+
+def expand_masks(mask: str, options: str = "", increment: bool = False,
+                 increment_min: int = 1, increment_max: int = 0) -> List[Dict[str, Any]]:
+    """
+    The individual masks of a mask attack, each with its custom charsets and
+    candidate count. mask is an inline mask or the path of an .hcmask file.
+    """
+    defaults = custom_charsets(options)
+    if os.path.isfile(mask):
+        lines = read_hcmask(mask)
+    else:
+        lines = [([None] * 4, mask)]
+
+    entries = []
+    for charsets, line_mask in lines:
+        # Charsets on an .hcmask line replace those given as options
+        merged = [own if own is not None else default for own, default in zip(charsets, defaults)]
+        masks = increment_masks(line_mask, increment_min, increment_max) if increment else [line_mask]
+        for single in masks:
+            entries.append({"mask": single, "charsets": merged, "candidates": mask_candidates(single, merged)})
+    return entries
+
+
+def hcmask_line(entry: Dict[str, Any]) -> str:
+    """Write a mask and its custom charsets back as an .hcmask line"""
+    charsets = list(entry["charsets"])
+    while charsets and charsets[-1] is None:
+        charsets.pop()
+    fields = [(charset or "") for charset in charsets] + [entry["mask"]]
+    return ",".join(field.replace(",", "\\,") for field in fields)
+
+
+def charset_options(charsets: List[Optional[str]]) -> List[Tuple[str, str]]:
+    """-1..-4 options for the custom charsets of a single inline mask"""
+    return [(f"-{i + 1}", charset) for i, charset in enumerate(charsets) if charset is not None]
+
+
+def plan_shards(entries: List[Dict[str, Any]], seconds_per_candidate: Optional[float], chunk_seconds: float,
+                slots: int, max_chunks: int,
+                base_keyspace: Callable[[Dict[str, Any]], Optional[int]]) -> List[Dict[str, Any]]:
+    """
+    Split a mask attack into jobs that fit about chunk_seconds each:
+
+    - a mask estimated to run longer than a chunk is split into --skip/--limit
+      ranges of hashcat's base keyspace (at least one per slot, so every slot
+      works on it)
+    - shorter masks are grouped, in order, into chunks run as .hcmask files
+      (hashcat does not allow --skip/--limit with mask files)
+
+    Without a speed to estimate from, the masks are dealt evenly over the
+    slots. Each shard is {"entries", "skip", "limit", "candidates", "estimated_seconds"}.
+    """
+    def seconds(candidates: int) -> Optional[float]:
+        return candidates * seconds_per_candidate if seconds_per_candidate else None
+
+    shards: List[Dict[str, Any]] = []
+    if not seconds_per_candidate:
+        count = max(1, min(len(entries), slots, max_chunks))
+        size = math.ceil(len(entries) / count)
+        for start in range(0, len(entries), size):
+            group = entries[start:start + size]
+            candidates = sum(entry["candidates"] for entry in group)
+            shards.append({"entries": group, "skip": None, "limit": None,
+                           "candidates": candidates, "estimated_seconds": None})
+        return shards
+
+    group: List[Dict[str, Any]] = []
+
+    def close_group():
+        if group:
+            candidates = sum(entry["candidates"] for entry in group)
+            shards.append({"entries": list(group), "skip": None, "limit": None,
+                           "candidates": candidates, "estimated_seconds": seconds(candidates)})
+            group.clear()
+
+    for entry in entries:
+        estimated = seconds(entry["candidates"])
+        if estimated > chunk_seconds:
+            close_group()
+            pieces = min(max(math.ceil(estimated / chunk_seconds), slots), max_chunks)
+            base = base_keyspace(entry)
+            if not base or base < pieces:
+                shards.append({"entries": [entry], "skip": None, "limit": None,
+                               "candidates": entry["candidates"], "estimated_seconds": estimated})
+                continue
+            step = base // pieces
+            for piece in range(pieces):
+                skip = piece * step
+                limit = base - skip if piece == pieces - 1 else step
+                candidates = entry["candidates"] * limit // base
+                shards.append({"entries": [entry], "skip": skip, "limit": limit,
+                               "candidates": candidates, "estimated_seconds": seconds(candidates)})
+            continue
+        if group and seconds(sum(e["candidates"] for e in group) + entry["candidates"]) > chunk_seconds:
+            close_group()
+        group.append(entry)
+    close_group()
+
+    # Too many small chunks: merge neighbours until under the cap
+    while len(shards) > max_chunks:
+        merged = []
+        for i in range(0, len(shards), 2):
+            pair = shards[i:i + 2]
+            if len(pair) == 2 and pair[0]["skip"] is None and pair[1]["skip"] is None:
+                candidates = pair[0]["candidates"] + pair[1]["candidates"]
+                merged.append({"entries": pair[0]["entries"] + pair[1]["entries"], "skip": None, "limit": None,
+                               "candidates": candidates, "estimated_seconds": seconds(candidates)})
+            else:
+                merged.extend(pair)
+        if len(merged) == len(shards):
+            break
+        shards = merged
+    return shards
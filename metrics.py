@@ -0,0 +1,327 @@
+import os
+import time
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; suits request latencies and most background operations
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Seconds; for job runtimes and queue waits
+LONG_BUCKETS = (1, 5, 15, 30, 60, 300, 900, 1800, 3600, 7200, 21600, 86400)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Value:
+    """Value of one label combination of a counter or gauge"""
+    def __init__(self, metric: "_Metric"):
+        self._lock = threading.Lock()
+        self._value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = value
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        return [f"{name}{labels} {_format_value(self._value)}"]
+
+
+class _HistogramValue:
+    """Bucket counts and sum of one label combination of a histogram"""
+    def __init__(self, metric: "Histogram"):
+        self._lock = threading.Lock()
+        self._buckets = metric.buckets
+        self._counts = [0] * (len(metric.buckets) + 1)
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def time(self) -> "_Timer":
+        """Context manager observing the duration of its block"""
+        return _Timer(self)
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        # Insert "le" into the existing label set
+        prefix = labels[:-1] + "," if labels else "{"
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self._buckets + (float("inf"),), counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{prefix}le="{_format_value(bound)}"}} {cumulative}')
+        lines.append(f"{name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, value: _HistogramValue):
+        self.value = value
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.value.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _Metric:
+    """
+    Base class for metrics with optional labels.
+
+    Each label combination's value is created on first use and cached, so the
+    hot path is a dict lookup plus a short locked update. Unlabelled metrics
+    forward inc/set/observe to their single value.
+    """
+    type_name = "untyped"
+    value_class = _Value
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        self._function: Optional[Callable] = None
+        if not self.labelnames:
+            self._default = self.value_class(self)
+            self._values[()] = self._default
+
+    def labels(self, *values):
+        """Get the value for a label combination"""
+        key = tuple(str(v) for v in values)
+        value = self._values.get(key)
+        if value is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                value = self._values.setdefault(key, self.value_class(self))
+        return value
+
+    def set_function(self, func: Callable) -> None:
+        """
+        Compute the value when scraped instead. func returns a number, or for
+        labelled metrics a dict of label tuples to numbers.
+        """
+        self._function = func
+
+    def _label_string(self, key: Tuple[str, ...]) -> str:
+        if not key:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)) + "}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.type_name}"]
+        if self._function is not None:
+            try:
+                result = self._function()
+            except Exception as e:
+                print(f"Error collecting metric {self.name}: {str(e)}")
+                return lines
+            values = result if isinstance(result, dict) else {(): result}
+            for key, value in values.items():
+                key = tuple(str(v) for v in (key if isinstance(key, tuple) else (key,)))
+                lines.append(f"{self.name}{self._label_string(key)} {_format_value(value)}")
+            return lines
+        for key, value in list(self._values.items()):
+            lines.extend(value.samples(self.name, self._label_string(key)))
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    type_name = "counter"
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    type_name = "gauge"
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self._default.dec(amount)
+
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+    type_name = "histogram"
+    value_class = _HistogramValue
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def time(self) -> _Timer:
+        """Context manager observing the duration of its block"""
+        return self._default.time()
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together for /metrics"""
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    return _registry
+
+
+# --- Process ---
+
+PROCESS_START_TIME = _registry.gauge("process_start_time_seconds", "Start time of the process since the epoch")
+PROCESS_START_TIME.set(time.time())
+PROCESS_CPU = _registry.counter("process_cpu_seconds_total", "User and system CPU time spent by the process")
+PROCESS_CPU.set_function(lambda: sum(os.times()[:2]))
+PROCESS_RSS = _registry.gauge("process_resident_memory_bytes", "Resident memory size of the process")
+PROCESS_THREADS = _registry.gauge("process_threads", "Threads in the process")
+PROCESS_THREADS.set_function(threading.active_count)
+
+
+def _resident_memory() -> float:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+PROCESS_RSS.set_function(_resident_memory)
+
+# --- API ---
+
+HTTP_REQUESTS = _registry.counter(
+    "hashcat_http_requests_total", "HTTP requests by method, route template and status code",
+    ["method", "route", "status"])
+HTTP_REQUEST_SECONDS = _registry.histogram(
+    "hashcat_http_request_duration_seconds", "HTTP request latency by method and route template",
+    ["method", "route"])
+HTTP_IN_PROGRESS = _registry.gauge("hashcat_http_requests_in_progress", "HTTP requests being handled")
+
+# --- Job runner ---
+
+JOBS = _registry.gauge("hashcat_jobs", "Jobs by status (queue depth is status=\"queued\")", ["status"])
+JOB_TRANSITIONS = _registry.counter(
+    "hashcat_job_transitions_total", "Job status transitions", ["from_status", "to_status"])
+JOB_QUEUE_WAIT_SECONDS = _registry.histogram(
+    "hashcat_job_queue_wait_seconds", "Time jobs spent queued before starting", buckets=LONG_BUCKETS)
+JOB_RUN_SECONDS = _registry.histogram(
+    "hashcat_job_run_duration_seconds", "Time from start to completion by final status", ["status"],
+    buckets=LONG_BUCKETS)
+JOB_COMPLETION_PARSE_SECONDS = _registry.histogram(
+    "hashcat_job_completion_parse_seconds", "Time spent parsing a finished job's output and results")
+JOBS_SAVE_SECONDS = _registry.histogram(
+    "hashcat_jobs_save_duration_seconds", "Time spent writing jobs.json")
+MONITORS_ACTIVE = _registry.gauge("hashcat_job_monitors_active", "Running job monitor threads")
+MONITOR_LAG_SECONDS = _registry.histogram(
+    "hashcat_job_monitor_lag_seconds", "How late each monitor loop iteration ran past its interval")
+SUBPROCESS_SPAWNS = _registry.counter(
+    "hashcat_subprocess_spawns_total", "Subprocesses started by the job runner by program", ["program"])
+SUBPROCESS_SECONDS = _registry.histogram(
+    "hashcat_subprocess_duration_seconds", "Time spent waiting for job runner subprocesses", ["program"])
+LIVENESS_CHECKS = _registry.counter(
+    "hashcat_liveness_checks_total", "Checks whether a job's hashcat process is alive, by result", ["result"])
+LIVENESS_CHECK_SECONDS = _registry.histogram(
+    "hashcat_liveness_check_duration_seconds", "Time spent checking whether a job's process is alive")
+PROCESS_SCAN_SECONDS = _registry.histogram(
+    "hashcat_process_scan_duration_seconds", "Time spent scanning /proc for hashcat processes")
+
+# --- Potfile and results ---
+
+POTFILE_ENTRIES = _registry.gauge("hashcat_potfile_entries", "Unique entries in the global potfile")
+POTFILE_MERGE_QUEUE = _registry.gauge("hashcat_potfile_merge_queue_depth", "Job potfiles waiting to be merged")
+POTFILE_MERGED_ENTRIES = _registry.counter(
+    "hashcat_potfile_merged_entries_total", "New entries merged into the global potfile")
+POTFILE_MERGE_SECONDS = _registry.histogram(
+    "hashcat_potfile_merge_duration_seconds", "Time spent merging a job potfile")
+RESULTS_INGESTED = _registry.counter(
+    "hashcat_results_ingested_total", "Cracked results ingested from job outfiles")
+
+# --- Uploads ---
+
+UPLOADS = _registry.counter("hashcat_uploads_total", "File uploads by kind and result", ["kind", "result"])
+UPLOAD_BYTES = _registry.counter("hashcat_upload_bytes_total", "Bytes received in file uploads", ["kind"])
+UPLOAD_SECONDS = _registry.histogram(
+    "hashcat_upload_duration_seconds", "Time spent streaming an upload to disk", ["kind"])
+WORDLIST_WARM_SECONDS = _registry.histogram(
+    "hashcat_wordlist_warm_duration_seconds", "Time spent warming a wordlist's dictionary cache", ["result"],
+    buckets=LONG_BUCKETS)
+
+# --- Output retention ---
+
+OUTPUT_RETENTION_FILES = _registry.counter(
+    "hashcat_output_retention_files_total", "Job output files compressed or removed by retention, by action",
+    ["action"])
+OUTPUT_RETENTION_BYTES = _registry.counter(
+    "hashcat_output_retention_bytes_freed_total", "Disk space freed in outputs/ by compressing or removing files")
@@ -1,11 +1,9 @@
-import os
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
 from passlib.context import CryptContext
 
-Base = declarative_base()
+from database import Base, SessionLocal, engine
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # User model
@@ -27,6 +25,9 @@ class User(Base):
     def verify_password(self, password):
         return pwd_context.verify(password, self.password_hash)
     
+    def set_password(self, password):
+        self.password_hash = self.get_password_hash(password)
+    
     @staticmethod
     def get_password_hash(password):
         return pwd_context.hash(password)
@@ -43,14 +44,25 @@ class JobAssociation(Base):
     # Relationship to user
     user = relationship("User", back_populates="jobs")
 
+# Cracked hash results, ingested from each job's outfile as hashcat writes it
+class CrackedResult(Base):
+    __tablename__ = "cracked_results"
+    __table_args__ = (
+        UniqueConstraint("job_id", "hash", name="uq_cracked_results_job_hash"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    job_id = Column(String, nullable=False, index=True)
+    hash = Column(String, nullable=False, index=True)
+    plain = Column(String, nullable=False)
+    cracked_at = Column(DateTime, default=datetime.utcnow)
+
 # Database setup
 def get_db_engine():
-    db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hashcat_server.db")
-    return create_engine(f"sqlite:///{db_path}")
+    """Get the application's shared, pooled engine"""
+    return engine
 
 def get_db_session():
-    engine = get_db_engine()
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     return SessionLocal()
 
 def init_db():
@@ -0,0 +1,264 @@
+import os
+import re
+import gzip
+import time
+import threading
+from typing import Dict, List, Optional, Any, Iterator
+from datetime import datetime, timedelta
+
+from settings import get_settings_manager
+from metrics import OUTPUT_RETENTION_FILES, OUTPUT_RETENTION_BYTES
+from job_output import log_chunks
+
+# Files in outputs/ that belong to a job: hashcat_<job id>.txt, .txt.log.aaaaaa, .txt.pid, .cracked, ...
+OUTPUT_FILE_PATTERN = re.compile(
+    r"^hashcat_([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})[._]")
+
+# general.auto_delete_completed_jobs values
+JOB_RETENTION_AGES = {
+    "1_day": timedelta(days=1),
+    "7_days": timedelta(days=7),
+    "30_days": timedelta(days=30),
+}
+
+# Statuses of jobs that may still write to their output (job_runner.ACTIVE_STATUSES)
+LIVE_STATUSES = ("queued", "starting", "running", "interrupted", "paused", "batched")
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def compressed_path(path: str) -> str:
+    """Where the retention service keeps a compressed output file"""
+    return f"{path}.gz"
+
+
+def output_exists(path: str) -> bool:
+    """Whether an output file exists, plain or compressed"""
+    return os.path.exists(path) or os.path.exists(compressed_path(path))
+
+
+def open_output(path: str, mode: str = "rb"):
+    """Open an output file for reading, decompressing it if it was compressed"""
+    if not os.path.exists(path) and os.path.exists(compressed_path(path)):
+        return gzip.open(compressed_path(path), mode)
+    return open(path, mode)
+
+
+def iter_output(path: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Stream an output file's decompressed contents"""
+    with open_output(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+class OutputRetention:
+    """
+    Background retention of job output in outputs/.
+
+    Every sweep, it:
+
+    - deletes finished jobs older than general.auto_delete_completed_jobs
+    - gzips the output and nohup logs of jobs finished more than
+      jobs.output_compress_after_minutes ago, and drops their .pid files
+    - removes files left behind by jobs that no longer exist
+    - deletes the oldest finished jobs' logs while outputs/ is over
+      jobs.outputs_max_mb (0 for no limit)
+
+    The work runs in a low-priority thread, a file at a time, with reads
+    capped at jobs.retention_io_mb_per_second so it never competes with
+    running jobs for the disk. Outfiles (.cracked) are never compressed or
+    removed here; they go with their job.
+    """
+    def __init__(self, runner, interval_minutes: Optional[float] = None):
+        self.runner = runner
+        self.output_dir = os.path.join(runner.base_dir, "outputs")
+        self.interval_minutes = interval_minutes
+        self.orphan_grace = timedelta(hours=1)
+        self._lock = threading.Lock()
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def _setting(self, category: str, key: str, default):
+        return get_settings_manager().get_setting(category, key, default)
+
+    def _loop(self) -> None:
+        # Lowest CPU priority for this thread; the kernel derives best-effort
+        # I/O priority from it when none is set
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+        while True:
+            interval = self.interval_minutes or self._setting("jobs", "retention_interval_minutes", 10)
+            time.sleep(max(float(interval), 0.1) * 60)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error sweeping job outputs: {str(e)}")
+
+    def sweep(self) -> Dict[str, int]:
+        """Run every retention step once, returning what was done"""
+        with self._lock:
+            summary = {"jobs_deleted": self._delete_expired_jobs(), "compressed": 0, "removed": 0, "bytes_freed": 0}
+            for step in (self._compress_finished, self._remove_orphans, self._enforce_quota):
+                removed, compressed, freed = step()
+                summary["removed"] += removed
+                summary["compressed"] += compressed
+                summary["bytes_freed"] += freed
+            return summary
+
+    def _finished_jobs(self) -> List[Dict[str, Any]]:
+        return [job for job in list(self.runner.jobs.values()) if job.get("status") not in LIVE_STATUSES]
+
+    def _finished_at(self, job: Dict[str, Any]) -> Optional[datetime]:
+        """When a job finished, or its output was last written if it has no completion time"""
+        try:
+            if job.get("completed_at"):
+                return datetime.fromisoformat(job["completed_at"])
+        except (TypeError, ValueError):
+            pass
+        path = job.get("output_file") or ""
+        for candidate in (path, compressed_path(path)):
+            if candidate and os.path.exists(candidate):
+                return datetime.fromtimestamp(os.path.getmtime(candidate))
+        return None
+
+    def _delete_expired_jobs(self) -> int:
+        age = JOB_RETENTION_AGES.get(self._setting("general", "auto_delete_completed_jobs", "never"))
+        if not age:
+            return 0
+        deleted = 0
+        cutoff = datetime.now() - age
+        for job in self._finished_jobs():
+            finished = self._finished_at(job)
+            if finished and finished < cutoff and self.runner.delete_job(job["id"]):
+                print(f"Deleted job {job['id']} finished {finished.isoformat()} (retention)")
+                OUTPUT_RETENTION_FILES.labels("job_deleted").inc()
+                deleted += 1
+        return deleted
+
+    def _remove(self, path: str, action: str) -> int:
+        """Delete a file, returning the bytes freed"""
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return 0
+        OUTPUT_RETENTION_FILES.labels(action).inc()
+        OUTPUT_RETENTION_BYTES.inc(size)
+        return size
+
+    def _compress_file(self, path: str) -> int:
+        """Gzip a file in place under the I/O limit, returning the bytes saved"""
+        target = compressed_path(path)
+        partial = f"{target}.tmp"
+        rate = float(self._setting("jobs", "retention_io_mb_per_second", 4) or 0) * 1024 * 1024
+        stat = os.stat(path)
+        try:
+            with open(path, "rb") as src, gzip.open(partial, "wb", compresslevel=6) as dst:
+                while True:
+                    started = time.monotonic()
+                    chunk = src.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    if rate:
+                        time.sleep(max(len(chunk) / rate - (time.monotonic() - started), 0))
+            os.utime(partial, (stat.st_atime, stat.st_mtime))
+            os.replace(partial, target)
+            os.remove(path)
+        except OSError as e:
+            print(f"Error compressing {path}: {str(e)}")
+            if os.path.exists(partial):
+                os.remove(partial)
+            return 0
+        saved = stat.st_size - os.path.getsize(target)
+        OUTPUT_RETENTION_FILES.labels("compressed").inc()
+        OUTPUT_RETENTION_BYTES.inc(max(saved, 0))
+        return saved
+
+    def _compress_finished(self):
+        removed = compressed = freed = 0
+        cutoff = datetime.now() - timedelta(minutes=self._setting("jobs", "output_compress_after_minutes", 10))
+        for job in self._finished_jobs():
+            output_file = job.get("output_file")
+            finished = self._finished_at(job)
+            if not output_file or job.get("output_compressed") or not finished or finished > cutoff:
+                continue
+            pid_file = f"{output_file}.pid"
+            if os.path.exists(pid_file):
+                freed += self._remove(pid_file, "pid_removed")
+                removed += 1
+            for path in [output_file] + log_chunks(f"{output_file}.log"):
+                if os.path.exists(path):
+                    freed += self._compress_file(path)
+                    compressed += 1
+            # The job may have been deleted or restarted meanwhile
+            if self.runner.jobs.get(job["id"]) is job and job.get("status") not in LIVE_STATUSES:
+                job["output_compressed"] = True
+                self.runner._save_jobs()
+        return removed, compressed, freed
+
+    def _remove_orphans(self):
+        removed = freed = 0
+        cutoff = time.time() - self.orphan_grace.total_seconds()
+        try:
+            names = os.listdir(self.output_dir)
+        except OSError:
+            return 0, 0, 0
+        for name in names:
+            match = OUTPUT_FILE_PATTERN.match(name)
+            # Partial .gz files are left by a sweep that was interrupted
+            if not match or (match.group(1) in self.runner.jobs and not name.endswith(".tmp")):
+                continue
+            path = os.path.join(self.output_dir, name)
+            try:
+                if os.path.getmtime(path) > cutoff:
+                    continue
+            except OSError:
+                continue
+            freed += self._remove(path, "orphan_removed")
+            removed += 1
+        return removed, 0, freed
+
+    def _enforce_quota(self):
+        limit = float(self._setting("jobs", "outputs_max_mb", 0) or 0) * 1024 * 1024
+        if not limit:
+            return 0, 0, 0
+        removed = freed = 0
+        total = disk_usage(self.output_dir)
+        # Oldest finished jobs lose their logs first; outfiles stay with the job
+        jobs = sorted(self._finished_jobs(), key=lambda job: self._finished_at(job) or datetime.min)
+        for job in jobs:
+            if total <= limit:
+                break
+            output_file = job.get("output_file")
+            if not output_file or job.get("output_deleted"):
+                continue
+            paths = [output_file, compressed_path(output_file), f"{output_file}.log",
+                     compressed_path(f"{output_file}.log"), f"{output_file}.pid"]
+            for path in paths + log_chunks(f"{output_file}.log", compressed=True):
+                if os.path.exists(path):
+                    size = self._remove(path, "quota_removed")
+                    total -= size
+                    freed += size
+                    removed += 1
+            if self.runner.jobs.get(job["id"]) is job:
+                job["output_deleted"] = True
+                self.runner._save_jobs()
+        return removed, 0, freed
+
+
+def disk_usage(directory: str) -> int:
+    """Total size of the files directly in a directory"""
+    total = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                pass
+    return total
@@ -0,0 +1,221 @@
+import os
+import json
+import uuid
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+from potfile_manager import normalize_hash, read_hash_lines
+
+# Stage outcomes that end a pipeline instead of moving on to the next stage
+FAILED_STATUSES = ("failed", "error")
+
+
+class PipelineManager:
+    """
+    Ordered attack stages run as one logical job. Each stage is an ordinary
+    job whose hashlist holds only the hashes no earlier stage cracked (like
+    hashcat --left); the stages' results are collected under the pipeline's
+    id in the results store.
+    """
+    def __init__(self, runner):
+        self.runner = runner
+        self.pipelines_file = os.path.join(runner.base_dir, "pipelines.json")
+        self.stage_dir = os.path.join(runner.base_dir, "pipelines")
+        self.pipelines: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.pipelines_file):
+            return
+        try:
+            with open(self.pipelines_file, "r") as f:
+                self.pipelines = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Warning: Could not read pipelines file: {str(e)}")
+            self.pipelines = {}
+
+    def _save(self):
+        try:
+            with open(self.pipelines_file, "w") as f:
+                json.dump(self.pipelines, f, indent=2)
+        except OSError as e:
+            print(f"Error: Could not write pipelines file: {str(e)}")
+
+    def create(self, hash_mode: str, hash_file: str, stages: List[Dict[str, str]],
+               priority: int = 0, deadline: Optional[str] = None) -> Dict[str, Any]:
+        """Create a pipeline and start (or queue) its first stage"""
+        pipeline_id = str(uuid.uuid4())
+        hash_file_abs = os.path.abspath(hash_file)
+        pipeline = {
+            "id": pipeline_id,
+            "status": "running",
+            "hash_mode": hash_mode,
+            "hash_file": os.path.basename(hash_file),
+            "hash_file_path": hash_file_abs,
+            "stages": [
+                {
+                    "attack_mode": stage["attack_mode"],
+                    "wordlist": os.path.basename(stage["wordlist"]) if stage.get("wordlist") else None,
+                    "wordlist_path": os.path.abspath(stage["wordlist"]) if stage.get("wordlist") else None,
+                    "mask": stage.get("mask"),
+                    "options": stage.get("options", ""),
+                    "job_id": None,
+                    "status": "pending",
+                    "hashes": 0,
+                    "cracked_count": 0
+                }
+                for stage in stages
+            ],
+            "current_stage": None,
+            "created_at": datetime.now().isoformat(),
+            "completed_at": None,
+            "cracked_count": 0,
+            "total_hashes": len(read_hash_lines(hash_file_abs)),
+            "priority": priority,
+            "deadline": deadline
+        }
+        with self._lock:
+            self.pipelines[pipeline_id] = pipeline
+            self._save()
+            self._start_stage(pipeline, 0)
+        return self.get(pipeline_id)
+
+    def _remaining(self, pipeline: Dict[str, Any]) -> List[str]:
+        """The pipeline's hashes that no stage has cracked yet"""
+        cracked = {normalize_hash(result["hash"])
+                   for result in self.runner.results_store.iter_results(pipeline["id"])}
+        return [value for value in read_hash_lines(pipeline["hash_file_path"])
+                if normalize_hash(value) not in cracked]
+
+    def _start_stage(self, pipeline: Dict[str, Any], index: int) -> None:
+        """Start the stage at index over the remaining hashes, skipping ahead past potfile-only stages"""
+        stages = pipeline["stages"]
+        while index < len(stages):
+            remaining = self._remaining(pipeline)
+            if not remaining:
+                self._finish(pipeline, "completed_success")
+                return
+
+            stage = stages[index]
+            os.makedirs(self.stage_dir, exist_ok=True)
+            stage_file = os.path.join(self.stage_dir, f"{pipeline['id']}_stage{index + 1}.txt")
+            with open(stage_file, "w") as f:
+                f.write("\n".join(remaining) + "\n")
+
+            try:
+                estimate = self.runner.estimate_job(pipeline["hash_mode"], stage["attack_mode"], stage_file,
+                                                    stage["wordlist_path"], stage["options"], stage.get("mask"))
+            except Exception as e:
+                print(f"Could not estimate stage {index + 1} of pipeline {pipeline['id']}: {str(e)}")
+                estimate = None
+
+            # Stage hashlists are scratch files, removed when the stage job finishes
+            result = self.runner.start_job(
+                pipeline["hash_mode"], stage["attack_mode"], stage_file, stage["wordlist_path"],
+                stage["options"], auto_delete_hash=True, queue_if_busy=True, estimate=estimate,
+                deadline=pipeline.get("deadline"), priority=pipeline.get("priority", 0),
+                pipeline_id=pipeline["id"], pipeline_stage=index, mask=stage.get("mask")
+            )
+            stage.update(job_id=result["job_id"], status=result["status"], hashes=len(remaining),
+                         started_at=datetime.now().isoformat())
+            pipeline["current_stage"] = index
+            self._save()
+            print(f"Pipeline {pipeline['id']} stage {index + 1}/{len(stages)}: job {result['job_id']} "
+                  f"over {len(remaining)} remaining hashes")
+            if result["status"] != "completed":
+                if result["status"] == "queued":
+                    threading.Thread(target=self.runner._check_queue, daemon=True).start()
+                return
+
+            # Every remaining hash was already in the potfile
+            self._collect(pipeline, stage)
+            index += 1
+        # Past the last stage, which may have cracked everything that was left
+        self._finish(pipeline, "completed_exhausted" if self._remaining(pipeline) else "completed_success")
+
+    def _collect(self, pipeline: Dict[str, Any], stage: Dict[str, Any]) -> None:
+        """Copy a finished stage job's results into the pipeline's"""
+        store = self.runner.results_store
+        pairs = [(result["hash"], result["plain"]) for result in store.iter_results(stage["job_id"])]
+        store.add_results(pipeline["id"], pairs)
+        job = self.runner.jobs.get(stage["job_id"]) or {}
+        stage.update(status=job.get("status", stage["status"]), cracked_count=len(pairs),
+                     completed_at=job.get("completed_at") or datetime.now().isoformat())
+        pipeline["cracked_count"] = store.count(pipeline["id"])
+
+    def _finish(self, pipeline: Dict[str, Any], status: str, **fields) -> None:
+        pipeline.update(status=status, current_stage=None, completed_at=datetime.now().isoformat(), **fields)
+        self._save()
+        print(f"Pipeline {pipeline['id']} {status}: {pipeline['cracked_count']}/{pipeline['total_hashes']} cracked")
+
+    def job_finished(self, job: Dict[str, Any]) -> None:
+        """A stage job reached a final status: collect its results and run the next stage"""
+        with self._lock:
+            pipeline = self.pipelines.get(job.get("pipeline_id"))
+            if not pipeline or pipeline["status"] != "running":
+                return
+            index = job.get("pipeline_stage")
+            if index is None or pipeline.get("current_stage") != index:
+                return
+            stage = pipeline["stages"][index]
+            if stage.get("job_id") != job["id"]:
+                return
+
+            # Make sure the stage's outfile is fully ingested before copying
+            self.runner.results_store.unwatch(job["id"])
+            self._collect(pipeline, stage)
+            if job["status"] in FAILED_STATUSES:
+                self._finish(pipeline, "failed",
+                             error_message=f"Stage {index + 1} ended with status {job['status']}")
+            else:
+                self._start_stage(pipeline, index + 1)
+
+    def job_deleted(self, job: Dict[str, Any]) -> None:
+        """Deleting a running stage's job cancels its pipeline"""
+        with self._lock:
+            pipeline = self.pipelines.get(job.get("pipeline_id"))
+            if not pipeline or pipeline["status"] != "running":
+                return
+            index = pipeline.get("current_stage")
+            if index is None or pipeline["stages"][index].get("job_id") != job["id"]:
+                return
+            self._collect(pipeline, pipeline["stages"][index])
+            pipeline["stages"][index]["status"] = "deleted"
+            self._finish(pipeline, "cancelled", error_message=f"Stage {index + 1} job was deleted")
+
+    def get(self, pipeline_id: str) -> Optional[Dict[str, Any]]:
+        """A pipeline with live progress from its current stage"""
+        with self._lock:
+            pipeline = self.pipelines.get(pipeline_id)
+            if not pipeline:
+                return None
+            pipeline = json.loads(json.dumps(pipeline))
+        index = pipeline.get("current_stage")
+        if index is not None:
+            stage = pipeline["stages"][index]
+            job = self.runner.jobs.get(stage.get("job_id")) or {}
+            # Stage hashlists exclude everything cracked before, so the counts add up
+            stage.update(status=job.get("status", stage["status"]), cracked_count=job.get("cracked_count") or 0)
+            pipeline["cracked_count"] += stage["cracked_count"]
+        return pipeline
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [self.get(pipeline_id) for pipeline_id in list(self.pipelines)]
+
+    def delete(self, pipeline_id: str) -> bool:
+        """Delete a pipeline, its stage jobs and its collected results"""
+        with self._lock:
+            pipeline = self.pipelines.pop(pipeline_id, None)
+            if not pipeline:
+                return False
+            self._save()
+        for index, stage in enumerate(pipeline["stages"]):
+            if stage.get("job_id") and stage["job_id"] in self.runner.jobs:
+                self.runner.delete_job(stage["job_id"])
+            stage_file = os.path.join(self.stage_dir, f"{pipeline_id}_stage{index + 1}.txt")
+            if os.path.exists(stage_file):
+                os.remove(stage_file)
+        self.runner.results_store.delete_job(pipeline_id)
+        return True
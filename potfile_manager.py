@@ -0,0 +1,231 @@
+import os
+import queue
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from metrics import POTFILE_ENTRIES, POTFILE_MERGE_QUEUE, POTFILE_MERGED_ENTRIES, POTFILE_MERGE_SECONDS
+
+
+def normalize_hash(value: str) -> str:
+    """Normalize a hash for potfile lookups (hex digests are case-insensitive)"""
+    value = value.strip()
+    if value and all(c in "0123456789abcdefABCDEF" for c in value):
+        return value.lower()
+    return value
+
+
+def split_pot_line(line: str) -> Optional[Tuple[str, str]]:
+    """Split a potfile line into (hash, plain)
+
+    Hashcat hex-encodes plains containing the separator, so the last colon
+    always separates the hash from the plain.
+    """
+    line = line.rstrip("\r\n")
+    if ":" not in line:
+        return None
+    hash_part, plain = line.rsplit(":", 1)
+    if not hash_part:
+        return None
+    return hash_part, plain
+
+
+class PotfileManager:
+    """
+    Manages the global potfile and the per-job potfiles that feed it.
+
+    Each job cracks into its own potfile under potfiles/jobs/, seeded with
+    only the known entries for its hashlist. A single background merger
+    appends new entries from job potfiles to the deduplicated global potfile,
+    so concurrent hashcat processes never write to the same file.
+    """
+    def __init__(self, base_dir: str):
+        self.potfile_dir = os.path.join(base_dir, "potfiles")
+        self.jobs_dir = os.path.join(self.potfile_dir, "jobs")
+        self.global_potfile = os.path.join(self.potfile_dir, "hashcat.pot")
+
+        # normalized hash -> plain, for every entry in the global potfile
+        self._index: Dict[str, str] = {}
+        self._index_ready = threading.Event()
+        self._index_lock = threading.Lock()
+
+        # Bytes of each job potfile already merged into the global potfile
+        self._offsets: Dict[str, int] = {}
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._merge_queue: "queue.Queue" = queue.Queue()
+
+        try:
+            os.makedirs(self.jobs_dir, exist_ok=True)
+        except PermissionError:
+            print(f"WARNING: Permission denied creating directory: {self.jobs_dir}")
+
+        POTFILE_ENTRIES.set_function(self.entry_count)
+        POTFILE_MERGE_QUEUE.set_function(self._merge_queue.qsize)
+
+        # The merger thread is the only writer of the global potfile
+        threading.Thread(target=self._merge_loop, daemon=True).start()
+
+    def job_potfile_path(self, job_id: str) -> str:
+        """Get the potfile path used by a job"""
+        return os.path.join(self.jobs_dir, f"{job_id}.pot")
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the global potfile index to be loaded"""
+        return self._index_ready.wait(timeout)
+
+    def lookup(self, hashes: List[str]) -> Dict[str, str]:
+        """Return the known plains for the given hashes, keyed by the hash as given"""
+        self.wait_until_ready()
+        found = {}
+        with self._index_lock:
+            for value in hashes:
+                plain = self._index.get(normalize_hash(value))
+                if plain is not None:
+                    found[value] = plain
+        return found
+
+    def entry_count(self) -> int:
+        """Number of unique entries in the global potfile"""
+        with self._index_lock:
+            return len(self._index)
+
+    def seed_job_potfile(self, job_id: str, hash_file: str) -> Tuple[str, Dict[str, str]]:
+        """
+        Create a job potfile holding only the global entries relevant to the hashlist.
+
+        Returns the potfile path and the seeded hash -> plain pairs.
+        """
+        potfile_path = self.job_potfile_path(job_id)
+        targets = read_hash_lines(hash_file)
+        seeded = self.lookup(targets)
+
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        with open(potfile_path, "w") as f:
+            for hash_value, plain in seeded.items():
+                f.write(f"{hash_value}:{plain}\n")
+
+        # Seeded entries are already in the global potfile, skip them when merging
+        with self._pending_lock:
+            self._offsets[potfile_path] = os.path.getsize(potfile_path)
+        return potfile_path, seeded
+
+    def submit(self, job_id: str) -> None:
+        """Queue the job potfile for merging into the global potfile"""
+        potfile_path = self.job_potfile_path(job_id)
+        with self._pending_lock:
+            if potfile_path in self._pending:
+                return
+            self._pending.add(potfile_path)
+        self._merge_queue.put(("merge", potfile_path))
+
+    def finalize_job(self, job_id: str, remove: bool = False) -> None:
+        """Merge the remaining entries of a job potfile, optionally removing it afterwards"""
+        potfile_path = self.job_potfile_path(job_id)
+        self._merge_queue.put(("finalize" if remove else "merge", potfile_path))
+
+    def _merge_loop(self) -> None:
+        """Background merger: load the index, then merge job potfiles as they are submitted"""
+        try:
+            self._load_index()
+        except Exception as e:
+            print(f"Error loading global potfile: {str(e)}")
+        finally:
+            self._index_ready.set()
+
+        while True:
+            action, potfile_path = self._merge_queue.get()
+            with self._pending_lock:
+                self._pending.discard(potfile_path)
+            try:
+                with POTFILE_MERGE_SECONDS.time():
+                    merged = self._merge(potfile_path)
+                POTFILE_MERGED_ENTRIES.inc(merged)
+                if action == "finalize" and os.path.exists(potfile_path):
+                    os.remove(potfile_path)
+                    with self._pending_lock:
+                        self._offsets.pop(potfile_path, None)
+            except Exception as e:
+                print(f"Error merging potfile {potfile_path}: {str(e)}")
+
+    def _load_index(self) -> None:
+        """Load the global potfile, compacting it if it contains duplicates"""
+        os.makedirs(self.potfile_dir, exist_ok=True)
+        if not os.path.exists(self.global_potfile):
+            with open(self.global_potfile, "a"):
+                pass
+            return
+
+        duplicates = 0
+        with open(self.global_potfile, "r", errors="replace") as f:
+            for line in f:
+                entry = split_pot_line(line)
+                if not entry:
+                    continue
+                key = normalize_hash(entry[0])
+                if key in self._index:
+                    duplicates += 1
+                    continue
+                self._index[key] = entry[1]
+
+        if duplicates:
+            # Rewrite the potfile without the duplicates left by earlier shared writers
+            print(f"Compacting global potfile: removing {duplicates} duplicate entries")
+            tmp_path = f"{self.global_potfile}.tmp"
+            with open(tmp_path, "w") as f:
+                for key, plain in self._index.items():
+                    f.write(f"{key}:{plain}\n")
+            os.replace(tmp_path, self.global_potfile)
+
+    def _merge(self, potfile_path: str) -> int:
+        """Append entries from a job potfile that the global potfile does not have yet"""
+        if not os.path.exists(potfile_path):
+            return 0
+
+        with self._pending_lock:
+            offset = self._offsets.get(potfile_path, 0)
+        size = os.path.getsize(potfile_path)
+        if size < offset:
+            offset = 0
+        if size == offset:
+            return 0
+
+        new_lines = []
+        with open(potfile_path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+
+        # Only consume complete lines; hashcat may be mid-write
+        end = data.rfind(b"\n") + 1
+        with self._index_lock:
+            for line in data[:end].decode("utf-8", errors="replace").splitlines():
+                entry = split_pot_line(line)
+                if not entry:
+                    continue
+                key = normalize_hash(entry[0])
+                if key in self._index:
+                    continue
+                self._index[key] = entry[1]
+                new_lines.append(f"{entry[0]}:{entry[1]}\n")
+
+        if new_lines:
+            with open(self.global_potfile, "a") as f:
+                f.writelines(new_lines)
+
+        with self._pending_lock:
+            self._offsets[potfile_path] = offset + end
+        return len(new_lines)
+
+
+def read_hash_lines(hash_file: str) -> List[str]:
+    """Read the unique, non-empty hash lines of a hashlist"""
+    hashes = []
+    seen = set()
+    if not hash_file or not os.path.exists(hash_file):
+        return hashes
+    with open(hash_file, "r", errors="replace") as f:
+        for line in f:
+            value = line.strip()
+            if value and value not in seen:
+                seen.add(value)
+                hashes.append(value)
+    return hashes
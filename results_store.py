@@ -0,0 +1,228 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from metrics import RESULTS_INGESTED
+from models import CrackedResult, get_db_engine
+from potfile_manager import normalize_hash, split_pot_line
+
+# hashcat --outfile-format: 1 = hash, 2 = plain (written as "hash:plain")
+OUTFILE_FORMAT = "1,2"
+
+
+class ResultsStore:
+    """
+    Indexed store of cracked results.
+
+    Each running job's outfile is tailed by a background thread, and new
+    "hash:plain" lines are inserted into the cracked_results table as soon as
+    hashcat writes them, so counts are exact and available while the job runs.
+    """
+    def __init__(self, poll_interval: float = 1.0,
+                 on_ingest: Optional[Callable[[str, int], None]] = None):
+        self.engine = get_db_engine()
+        CrackedResult.__table__.create(bind=self.engine, checkfirst=True)
+        self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.poll_interval = poll_interval
+        self.on_ingest = on_ingest
+
+        # job_id -> outfile path, and bytes of each outfile already ingested
+        self._watched: Dict[str, str] = {}
+        self._offsets: Dict[str, int] = {}
+        # job_id -> {normalized hash: job_ids} for runs cracking several jobs' hashes
+        self._routes: Dict[str, Dict[str, List[str]]] = {}
+        self._lock = threading.Lock()
+        # Held from reading an outfile until its results are stored, so two
+        # ingests never read the same lines
+        self._ingest_lock = threading.Lock()
+
+        threading.Thread(target=self._tail_loop, daemon=True).start()
+
+    # --- Ingestion ---
+
+    def watch(self, job_id: str, outfile: str) -> None:
+        """Start tailing a job's outfile"""
+        with self._lock:
+            self._watched[job_id] = outfile
+
+    def set_route(self, job_id: str, route: Optional[Dict[str, List[str]]]) -> None:
+        """
+        Hand results reported for job_id to the jobs whose hashlists contain
+        each hash (a batched run); hashes missing from the route stay with
+        job_id. None removes the route.
+        """
+        with self._lock:
+            if route is None:
+                self._routes.pop(job_id, None)
+            else:
+                self._routes[job_id] = route
+
+    def unwatch(self, job_id: str) -> None:
+        """Ingest anything left in a job's outfile and stop tailing it"""
+        with self._lock:
+            outfile = self._watched.pop(job_id, None)
+        if outfile:
+            self.ingest_outfile(job_id, outfile)
+
+    def ingest_outfile(self, job_id: str, outfile: str) -> int:
+        """Insert any new complete lines from an outfile, returning the number of new results"""
+        if not outfile or not os.path.exists(outfile):
+            return 0
+
+        with self._ingest_lock:
+            with self._lock:
+                offset = self._offsets.get(outfile, 0)
+            size = os.path.getsize(outfile)
+            if size < offset:
+                offset = 0
+            if size == offset:
+                return 0
+            with open(outfile, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+            # Only consume complete lines; hashcat may be mid-write
+            end = data.rfind(b"\n") + 1
+
+            pairs = []
+            for line in data[:end].decode("utf-8", errors="replace").splitlines():
+                entry = split_pot_line(line)
+                if entry:
+                    pairs.append(entry)
+            # Move past these lines only once they are stored; if the insert
+            # fails they are read again next time
+            added = self.add_results(job_id, pairs)
+            with self._lock:
+                self._offsets[outfile] = offset + end
+            return added
+
+    def add_results(self, job_id: str, pairs: Iterable[Tuple[str, str]]) -> int:
+        """Insert (hash, plain) pairs for a job, ignoring hashes the job already has"""
+        pairs = list(pairs)
+        if not pairs:
+            return 0
+        with self._lock:
+            route = self._routes.get(job_id)
+        if route is None:
+            return self._insert(job_id, pairs)
+
+        groups: Dict[str, List[Tuple[str, str]]] = {}
+        for hash_value, plain in pairs:
+            for target in route.get(normalize_hash(hash_value), (job_id,)):
+                groups.setdefault(target, []).append((hash_value, plain))
+        return sum(self._insert(target, group) for target, group in groups.items())
+
+    def _insert(self, job_id: str, pairs: List[Tuple[str, str]]) -> int:
+        now = datetime.utcnow()
+        session = self.Session()
+        try:
+            known = set()
+            hashes = list({h for h, _ in pairs})
+            # Look up existing rows in chunks to stay under SQLite's variable limit
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                rows = session.query(CrackedResult.hash).filter(
+                    CrackedResult.job_id == job_id,
+                    CrackedResult.hash.in_(chunk)
+                ).all()
+                known.update(row[0] for row in rows)
+
+            added = 0
+            for hash_value, plain in pairs:
+                if hash_value in known:
+                    continue
+                known.add(hash_value)
+                session.add(CrackedResult(job_id=job_id, hash=hash_value, plain=plain, cracked_at=now))
+                added += 1
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        RESULTS_INGESTED.inc(added)
+        if added and self.on_ingest:
+            self.on_ingest(job_id, self.count(job_id))
+        return added
+
+    def _tail_loop(self) -> None:
+        """Poll watched outfiles for new cracks"""
+        while True:
+            with self._lock:
+                watched = list(self._watched.items())
+            for job_id, outfile in watched:
+                try:
+                    self.ingest_outfile(job_id, outfile)
+                except Exception as e:
+                    print(f"Error ingesting results for job {job_id}: {str(e)}")
+            time.sleep(self.poll_interval)
+
+    # --- Queries ---
+
+    def count(self, job_id: str) -> int:
+        """Exact number of cracked results for a job"""
+        session = self.Session()
+        try:
+            return session.query(func.count(CrackedResult.id)).filter(
+                CrackedResult.job_id == job_id
+            ).scalar() or 0
+        finally:
+            session.close()
+
+    def get_results(self, job_id: str, offset: int = 0, limit: int = 100) -> List[Dict[str, str]]:
+        """Get a page of results for a job, in crack order"""
+        session = self.Session()
+        try:
+            rows = session.query(CrackedResult).filter(
+                CrackedResult.job_id == job_id
+            ).order_by(CrackedResult.id).offset(offset).limit(limit).all()
+            return [self._to_dict(row) for row in rows]
+        finally:
+            session.close()
+
+    def iter_results(self, job_id: str, batch_size: int = 1000) -> Iterator[Dict[str, str]]:
+        """Iterate over all results for a job in batches, using keyset pagination"""
+        last_id = 0
+        while True:
+            session = self.Session()
+            try:
+                rows = session.query(CrackedResult).filter(
+                    CrackedResult.job_id == job_id,
+                    CrackedResult.id > last_id
+                ).order_by(CrackedResult.id).limit(batch_size).all()
+                batch = [self._to_dict(row) for row in rows]
+                if rows:
+                    last_id = rows[-1].id
+            finally:
+                session.close()
+            if not batch:
+                return
+            for result in batch:
+                yield result
+
+    def delete_job(self, job_id: str) -> None:
+        """Remove all results for a job"""
+        with self._lock:
+            self._routes.pop(job_id, None)
+            outfile = self._watched.pop(job_id, None)
+            if outfile:
+                self._offsets.pop(outfile, None)
+        session = self.Session()
+        try:
+            session.query(CrackedResult).filter(CrackedResult.job_id == job_id).delete()
+            session.commit()
+        finally:
+            session.close()
+
+    @staticmethod
+    def _to_dict(row: CrackedResult) -> Dict[str, str]:
+        return {
+            "hash": row.hash,
+            "plain": row.plain,
+            "cracked_at": row.cracked_at.isoformat() if row.cracked_at else None
+        }
@@ -0,0 +1,131 @@
+import os
+import json
+import threading
+from typing import Dict, List, Optional, Any
+from datetime import datetime
+
+from job_estimates import count_rules
+from rule_engine import optimize_rules
+
+# Lines of a wordlist added to the optimizer's probe words when one is given
+PROBE_WORDLIST_LINES = 1000
+
+
+class RuleCatalog:
+    """
+    Catalog of uploaded hashcat rule files with their rule counts.
+
+    Public rule sets often repeat rules or contain rules that change nothing,
+    and each one multiplies a rule attack's keyspace. optimize() writes a copy
+    of a rule file without them, next to the original in the catalog.
+    """
+    def __init__(self, base_dir: str):
+        self.rules_dir = os.path.join(base_dir, "rules")
+        self.wordlist_dir = os.path.join(base_dir, "wordlists")
+        self.catalog_file = os.path.join(base_dir, "rules.json")
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load_catalog()
+        self.sync()
+
+    def _load_catalog(self):
+        """Load the catalog from file"""
+        if os.path.exists(self.catalog_file):
+            try:
+                with open(self.catalog_file, "r") as f:
+                    self.entries = json.load(f)
+            except (json.JSONDecodeError, PermissionError) as e:
+                print(f"Warning: Error reading rule catalog: {str(e)}. Rebuilding it.")
+                self.entries = {}
+
+    def _save_catalog(self):
+        """Save the catalog to file"""
+        try:
+            with open(self.catalog_file, "w") as f:
+                json.dump(self.entries, f, indent=2)
+        except PermissionError:
+            print(f"Error: Permission denied writing to rule catalog: {self.catalog_file}")
+
+    def sync(self) -> None:
+        """Register rule files on disk and drop missing ones"""
+        if not os.path.isdir(self.rules_dir):
+            return
+        on_disk = set()
+        for filename in os.listdir(self.rules_dir):
+            path = os.path.join(self.rules_dir, filename)
+            if filename.startswith(".") or not os.path.isfile(path):
+                continue
+            on_disk.add(filename)
+            self.register(path)
+        with self._lock:
+            for filename in list(self.entries):
+                if filename not in on_disk:
+                    del self.entries[filename]
+            self._save_catalog()
+
+    def register(self, path: str, **fields) -> Dict[str, Any]:
+        """Add or refresh a rule file in the catalog"""
+        filename = os.path.basename(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self.entries.get(filename)
+            if not entry or entry.get("size") != stat.st_size or entry.get("mtime") != stat.st_mtime:
+                entry = {
+                    "filename": filename,
+                    "path": os.path.abspath(path),
+                    "size": stat.st_size,
+                    "mtime": stat.st_mtime,
+                    "rule_count": count_rules(path),
+                    "registered_at": datetime.now().isoformat(),
+                    "optimized_from": None,
+                    "optimized_as": None,
+                    "optimization": None
+                }
+                self.entries[filename] = entry
+            entry.update(fields)
+            self._save_catalog()
+            return dict(entry)
+
+    def get(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Get a rule file's catalog entry"""
+        with self._lock:
+            entry = self.entries.get(filename)
+            return dict(entry) if entry else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """List all catalogued rule files"""
+        with self._lock:
+            return [dict(entry) for entry in self.entries.values()]
+
+    def optimize(self, filename: str, probe_wordlist: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Write <name>.optimized.rule without duplicate and no-op rules and
+        catalog it. Rules are compared by the candidates they make from a
+        built-in probe corpus, plus the start of probe_wordlist if given.
+        """
+        entry = self.get(filename)
+        if not entry:
+            raise FileNotFoundError(f"Rule file not found: {filename}")
+        with open(entry["path"], "rb") as f:
+            lines = f.read().splitlines()
+
+        extra = []
+        if probe_wordlist:
+            with open(os.path.join(self.wordlist_dir, probe_wordlist), "rb") as f:
+                for line in f:
+                    extra.append(line.rstrip(b"\r\n"))
+                    if len(extra) >= PROBE_WORDLIST_LINES:
+                        break
+
+        kept, report = optimize_rules(lines, extra)
+        stem = filename[:-len(".rule")] if filename.endswith(".rule") else filename
+        output = os.path.join(self.rules_dir, f"{stem}.optimized.rule")
+        with open(output, "wb") as f:
+            f.write(b"\n".join(kept) + b"\n")
+        report.update(probe_wordlist=probe_wordlist, optimized_at=datetime.now().isoformat())
+
+        optimized = self.register(output, optimized_from=filename, optimization=report)
+        self.register(entry["path"], optimized_as=optimized["filename"])
+        print(f"Optimized rule file {filename}: {report['rules']} -> {report['kept']} rules "
+              f"({report['duplicates']} duplicate, {report['noops']} no-op)")
+        return optimized
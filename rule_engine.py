@@ -0,0 +1,331 @@
+import random
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple, Any
+
+# Rule positions: 0-9, then A-Z for 10-35
+POSITIONS = b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# Candidates hashcat's rule engine produces are capped at this length
+MAX_CANDIDATE_LENGTH = 256
+
+# Arguments of each rule function: N = position, X = character
+RULE_ARGS = {
+    ":": "", "l": "", "u": "", "c": "", "C": "", "t": "", "T": "N", "r": "", "d": "", "p": "N",
+    "f": "", "{": "", "}": "", "$": "X", "^": "X", "[": "", "]": "", "D": "N", "x": "NN",
+    "O": "NN", "i": "NX", "o": "NX", "'": "N", "s": "XX", "@": "X", "z": "N", "Z": "N",
+    "q": "", "k": "", "K": "", "*": "NN", "L": "N", "R": "N", "+": "N", "-": "N", ".": "N",
+    ",": "N", "y": "N", "Y": "N", "E": "", "e": "X", "3": "NX",
+    # Memory
+    "M": "", "4": "", "6": "", "X": "NNN", "Q": "",
+    # Rejections
+    "<": "N", ">": "N", "_": "N", "!": "X", "/": "X", "(": "X", ")": "X", "=": "NX", "%": "NX",
+}
+
+# Words a rule is evaluated on before it is compared with the rest of the set
+QUICK_PROBE_SIZE = 48
+
+Rule = List[Tuple[str, Tuple[int, ...]]]
+
+
+def parse_rule(line: bytes) -> Optional[Rule]:
+    """Parse one rule line into (function, args) steps, or None if hashcat syntax isn't understood"""
+    steps = []
+    i = 0
+    while i < len(line):
+        op = chr(line[i])
+        i += 1
+        if op == " ":
+            continue
+        layout = RULE_ARGS.get(op)
+        if layout is None or i + len(layout) > len(line):
+            return None
+        args = []
+        for kind in layout:
+            value = line[i]
+            i += 1
+            if kind == "N":
+                value = POSITIONS.find(bytes([value]))
+                if value < 0:
+                    return None
+            args.append(value)
+        steps.append((op, tuple(args)))
+    return steps
+
+
+def _toggle(c: int) -> int:
+    return bytes([c]).swapcase()[0]
+
+
+def _title(word: bytearray, separator: int) -> bytearray:
+    word = bytearray(bytes(word).lower())
+    for i in range(len(word)):
+        if i == 0 or word[i - 1] == separator:
+            word[i] = bytes([word[i]]).upper()[0]
+    return word
+
+
+def apply_rule(rule: Rule, word: bytes) -> Optional[bytes]:
+    """The candidate a rule makes from a word, or None if the rule rejects it"""
+    w = bytearray(word)
+    memory = bytes(word)
+    for op, args in rule:
+        n = len(w)
+        a = args[0] if args else 0
+        if op == ":":
+            pass
+        elif op == "l":
+            w = bytearray(bytes(w).lower())
+        elif op == "u":
+            w = bytearray(bytes(w).upper())
+        elif op == "c":
+            w = bytearray(bytes(w[:1]).upper() + bytes(w[1:]).lower())
+        elif op == "C":
+            w = bytearray(bytes(w[:1]).lower() + bytes(w[1:]).upper())
+        elif op == "t":
+            w = bytearray(bytes(w).swapcase())
+        elif op == "T":
+            if a < n:
+                w[a] = _toggle(w[a])
+        elif op == "r":
+            w.reverse()
+        elif op == "d":
+            w = w + w
+        elif op == "p":
+            w = w * (a + 1)
+        elif op == "f":
+            w = w + w[::-1]
+        elif op == "{":
+            w = w[1:] + w[:1]
+        elif op == "}":
+            w = w[-1:] + w[:-1]
+        elif op == "$":
+            w.append(a)
+        elif op == "^":
+            w.insert(0, a)
+        elif op == "[":
+            del w[:1]
+        elif op == "]":
+            if n:
+                del w[-1]
+        elif op == "D":
+            if a < n:
+                del w[a]
+        elif op == "x":
+            if a + args[1] <= n:
+                w = w[a:a + args[1]]
+        elif op == "O":
+            if a + args[1] <= n:
+                del w[a:a + args[1]]
+        elif op == "i":
+            if a <= n:
+                w.insert(a, args[1])
+        elif op == "o":
+            if a < n:
+                w[a] = args[1]
+        elif op == "'":
+            if a < n:
+                del w[a:]
+        elif op == "s":
+            w = bytearray(bytes(w).replace(bytes([a]), bytes([args[1]])))
+        elif op == "@":
+            w = bytearray(bytes(w).replace(bytes([a]), b""))
+        elif op == "z":
+            w = w[:1] * a + w
+        elif op == "Z":
+            w = w + w[-1:] * a
+        elif op == "q":
+            w = bytearray(c for c in w for _ in (0, 1))
+        elif op == "k":
+            if n >= 2:
+                w[0], w[1] = w[1], w[0]
+        elif op == "K":
+            if n >= 2:
+                w[-1], w[-2] = w[-2], w[-1]
+        elif op == "*":
+            if a < n and args[1] < n:
+                w[a], w[args[1]] = w[args[1]], w[a]
+        elif op == "L":
+            if a < n:
+                w[a] = (w[a] << 1) & 0xFF
+        elif op == "R":
+            if a < n:
+                w[a] >>= 1
+        elif op == "+":
+            if a < n:
+                w[a] = (w[a] + 1) & 0xFF
+        elif op == "-":
+            if a < n:
+                w[a] = (w[a] - 1) & 0xFF
+        elif op == ".":
+            if a + 1 < n:
+                w[a] = w[a + 1]
+        elif op == ",":
+            if 0 < a < n:
+                w[a] = w[a - 1]
+        elif op == "y":
+            if a <= n:
+                w = w[:a] + w
+        elif op == "Y":
+            if a <= n:
+                w = w + w[n - a:]
+        elif op == "E":
+            w = _title(w, ord(" "))
+        elif op == "e":
+            w = _title(w, a)
+        elif op == "3":
+            seen = 0
+            for i, c in enumerate(w):
+                if c == args[1]:
+                    if seen == a:
+                        if i + 1 < n:
+                            w[i + 1] = _toggle(w[i + 1])
+                        break
+                    seen += 1
+        elif op == "M":
+            memory = bytes(w)
+        elif op == "4":
+            w = w + memory
+        elif op == "6":
+            w = bytearray(memory) + w
+        elif op == "X":
+            if a + args[1] <= len(memory) and args[2] <= n:
+                w[args[2]:args[2]] = memory[a:a + args[1]]
+        elif op == "Q":
+            if bytes(w) == memory:
+                return None
+        elif op == "<":
+            if n > a:
+                return None
+        elif op == ">":
+            if n < a:
+                return None
+        elif op == "_":
+            if n != a:
+                return None
+        elif op == "!":
+            if a in w:
+                return None
+        elif op == "/":
+            if a not in w:
+                return None
+        elif op == "(":
+            if not n or w[0] != a:
+                return None
+        elif op == ")":
+            if not n or w[-1] != a:
+                return None
+        elif op == "=":
+            if a >= n or w[a] != args[1]:
+                return None
+        elif op == "%":
+            if w.count(args[1]) < a:
+                return None
+        if len(w) > MAX_CANDIDATE_LENGTH:
+            return None
+    return bytes(w)
+
+
+def probe_corpus(rules: Iterable[Rule] = (), extra: Iterable[bytes] = ()) -> List[bytes]:
+    """
+    Words to tell rules apart: common passwords, every printable character
+    repeated (for s, @, %, 3 and e), random words up to past the last rule
+    position, and any other character the rules take as an argument. The first
+    QUICK_PROBE_SIZE words are the most varied.
+    """
+    words = [
+        b"", b"a", b"A", b"ab", b"Ab", b"abc", b"password", b"Password", b"PASSWORD", b"p@ssw0rd",
+        b"Password1", b"password123", b"123456", b"qwerty", b"letmein", b"iloveyou", b"dragon",
+        b"hello world", b"Hello World", b"john.smith", b"admin!", b"Summer2024!", b"aaaaaa",
+        b"abababab", b"1234567890", b"abcdefghijklmnopqrstuvwxyz", b"The Quick-Brown Fox_Jumps",
+        b"ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789abcd", b"x" * 40,
+    ]
+    rng = random.Random(0x5EED)
+    printable = bytes(range(0x20, 0x7F))
+    lengths = list(range(1, 42))
+    # Fill the quick probes with random words of spread-out lengths, then the rest
+    spread = lengths[::2][:QUICK_PROBE_SIZE - len(words)]
+    for length in spread + lengths * 3:
+        words.append(bytes(rng.choice(printable) for _ in range(length)))
+
+    chars = set(printable)
+    for rule in rules:
+        for op, args in rule:
+            for kind, value in zip(RULE_ARGS[op], args):
+                if kind == "X":
+                    chars.add(value)
+    for c in sorted(chars):
+        words.append(b"x" + (bytes([c]) + b"y") * 6)
+        words.append(bytes([c]) * 3 + b"Ab1" + bytes([c]))
+    words.extend(extra)
+    return words
+
+
+def _signature(rule: Rule, words: List[bytes]) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    for word in words:
+        out = apply_rule(rule, word)
+        if out is None:
+            digest.update(b"\x00")
+        else:
+            digest.update(b"\x01" + len(out).to_bytes(2, "little") + out)
+    return digest.digest()
+
+
+def optimize_rules(lines: List[bytes], extra_probe: Iterable[bytes] = ()) -> Tuple[List[bytes], Dict[str, Any]]:
+    """
+    Drop rules that make the same candidates as an earlier rule on every probe
+    word (no-ops collapse into the first identity rule, so the plain word is
+    still tried if it was before). Rules that cannot be parsed or that reject
+    every probe are kept as they are. Returns the kept lines and a report.
+    """
+    entries = []
+    comments = 0
+    for line in lines:
+        text = line.rstrip(b"\r\n")
+        if not text.strip() or text.lstrip().startswith(b"#"):
+            comments += 1
+            continue
+        entries.append((text, parse_rule(text)))
+
+    probes = probe_corpus((rule for _, rule in entries if rule), extra_probe)
+    quick = probes[:QUICK_PROBE_SIZE]
+    identity = _signature([(":", ())], probes)
+    rejects_all = _signature([("_", (999,))], probes)
+
+    # Rules equal on the quick probes are compared again on the whole corpus
+    quick_groups: Dict[bytes, List[int]] = {}
+    for index, (_, rule) in enumerate(entries):
+        if rule is not None:
+            quick_groups.setdefault(_signature(rule, quick), []).append(index)
+    full: Dict[int, bytes] = {}
+    for group in quick_groups.values():
+        if len(group) > 1:
+            for index in group:
+                full[index] = _signature(entries[index][1], probes)
+
+    kept: List[bytes] = []
+    seen_rules = set()
+    seen_signatures = set()
+    report = {"rules": len(entries), "kept": 0, "duplicates": 0, "noops": 0, "unparsed": 0,
+              "comments": comments, "probe_words": len(probes)}
+    for index, (text, rule) in enumerate(entries):
+        # Exact duplicates: the same parsed steps (a space may be an argument,
+        # so spacing alone can't be compared), or the same unparsed text
+        key = ("steps", tuple(rule)) if rule is not None else ("text", text)
+        if key in seen_rules:
+            report["duplicates"] += 1
+            continue
+        seen_rules.add(key)
+        if rule is None:
+            report["unparsed"] += 1
+            kept.append(text)
+            continue
+        signature = full.get(index)
+        if signature is not None and signature != rejects_all:
+            if signature in seen_signatures:
+                report["noops" if signature == identity else "duplicates"] += 1
+                continue
+            seen_signatures.add(signature)
+        kept.append(text)
+    report["kept"] = len(kept)
+    return kept, report
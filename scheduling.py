@@ -0,0 +1,127 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+from settings import get_settings_manager
+
+# Assumed runtime for queued jobs without an estimate (no benchmark yet, or
+# a keyspace hashcat could not compute)
+UNKNOWN_ESTIMATE_SECONDS = 3600
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _queued_at(job: Dict[str, Any]) -> str:
+    return job.get("queued_at") or ""
+
+
+def job_priority(job: Dict[str, Any]) -> int:
+    """A job's priority; higher runs first and may preempt lower (default 0)"""
+    try:
+        return int(job.get("priority") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class QueuePolicy:
+    """
+    Decides which queued job starts next.
+
+    select() gets the queued job records and the current time and returns
+    the job to start; order() returns all of them in start order, for display.
+    Higher job priority always wins; sort_key() orders jobs of equal priority.
+    """
+    name = "base"
+
+    def sort_key(self, job: Dict[str, Any], now: datetime) -> tuple:
+        raise NotImplementedError
+
+    def _key(self, job: Dict[str, Any], now: datetime) -> tuple:
+        return (-job_priority(job),) + self.sort_key(job, now)
+
+    def order(self, jobs: List[Dict[str, Any]], now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        now = now or datetime.now()
+        return sorted(jobs, key=lambda job: self._key(job, now))
+
+    def select(self, jobs: List[Dict[str, Any]], now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        if not jobs:
+            return None
+        now = now or datetime.now()
+        return min(jobs, key=lambda job: self._key(job, now))
+
+
+class FifoPolicy(QueuePolicy):
+    """Oldest queued job first"""
+    name = "fifo"
+
+    def sort_key(self, job: Dict[str, Any], now: datetime) -> tuple:
+        return (_queued_at(job),)
+
+
+class ShortestEstimatedFirstPolicy(QueuePolicy):
+    """
+    Shortest estimated runtime first, with aging.
+
+    Every second a job waits takes aging_factor seconds off its estimate, so
+    quick jobs overtake long ones but a long job is not starved forever.
+    """
+    name = "sjf"
+
+    def __init__(self, aging_factor: float = 1.0):
+        self.aging_factor = aging_factor
+
+    def sort_key(self, job: Dict[str, Any], now: datetime) -> tuple:
+        estimate = job.get("estimated_seconds")
+        if estimate is None:
+            estimate = UNKNOWN_ESTIMATE_SECONDS
+        queued_at = _parse_time(job.get("queued_at"))
+        waited = (now - queued_at).total_seconds() if queued_at else 0.0
+        return (estimate - self.aging_factor * max(waited, 0.0), _queued_at(job))
+
+
+class EarliestDeadlineFirstPolicy(QueuePolicy):
+    """
+    Earliest deadline first. Jobs without a deadline run after all jobs that
+    have one, oldest first.
+    """
+    name = "edf"
+
+    def sort_key(self, job: Dict[str, Any], now: datetime) -> tuple:
+        deadline = _parse_time(job.get("deadline"))
+        if deadline is None:
+            return (1, 0.0, _queued_at(job))
+        return (0, deadline.timestamp(), _queued_at(job))
+
+
+POLICIES = {
+    FifoPolicy.name: FifoPolicy,
+    ShortestEstimatedFirstPolicy.name: ShortestEstimatedFirstPolicy,
+    EarliestDeadlineFirstPolicy.name: EarliestDeadlineFirstPolicy,
+}
+
+
+def create_queue_policy(name: str, aging_factor: float = 1.0) -> QueuePolicy:
+    """Create a policy by name ("fifo", "sjf" or "edf")"""
+    if name not in POLICIES:
+        raise ValueError(f"Unknown queue policy: {name}. Choose from {', '.join(POLICIES)}")
+    if name == ShortestEstimatedFirstPolicy.name:
+        return ShortestEstimatedFirstPolicy(aging_factor)
+    return POLICIES[name]()
+
+
+def get_queue_policy() -> QueuePolicy:
+    """The policy configured in jobs.queue_policy, falling back to FIFO"""
+    settings = get_settings_manager()
+    name = settings.get_setting("jobs", "queue_policy", "fifo")
+    aging_factor = settings.get_setting("jobs", "queue_aging_factor", 1.0)
+    try:
+        return create_queue_policy(name, aging_factor)
+    except ValueError as e:
+        print(f"Warning: {str(e)}. Using fifo.")
+        return FifoPolicy()
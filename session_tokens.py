@@ -0,0 +1,124 @@
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import secrets
+import threading
+from typing import Dict, Optional, Any
+
+# Cookie names used by the web UI
+ACCESS_COOKIE = "hashcat_session"
+REFRESH_COOKIE = "hashcat_refresh"
+
+TOKEN_ACCESS = "access"
+TOKEN_REFRESH = "refresh"
+
+SECRET_FILE = ".session_secret"
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def load_secret_key() -> bytes:
+    """
+    Get the server's token signing key.
+
+    Uses HASHCAT_SECRET_KEY when set, otherwise a random key persisted to
+    .session_secret so sessions survive restarts.
+    """
+    env_key = os.getenv("HASHCAT_SECRET_KEY")
+    if env_key:
+        return env_key.encode("utf-8")
+
+    if os.path.exists(SECRET_FILE):
+        with open(SECRET_FILE, "r") as f:
+            key = f.read().strip()
+        if key:
+            return key.encode("utf-8")
+
+    key = secrets.token_hex(32)
+    fd = os.open(SECRET_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(key)
+    print(f"Generated session signing key in {SECRET_FILE}")
+    return key.encode("utf-8")
+
+
+class SessionTokenSigner:
+    """
+    Issues and verifies HMAC-signed session tokens.
+
+    A token is base64url(payload).base64url(HMAC-SHA256(payload)), so checking
+    one costs a single constant-time signature comparison and no database
+    access. Access tokens are short-lived; refresh tokens live longer and carry
+    a fingerprint of the user's password hash, so changing the password
+    revokes them on the next refresh.
+    """
+    def __init__(self, secret: bytes, access_ttl: int = 900, refresh_ttl: int = 604800):
+        self.secret = secret
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+
+    def _sign(self, body: str) -> str:
+        return _b64encode(hmac.new(self.secret, body.encode("ascii"), hashlib.sha256).digest())
+
+    def password_fingerprint(self, password_hash: str) -> str:
+        """Short keyed fingerprint of a password hash, safe to embed in a token"""
+        return hmac.new(self.secret, password_hash.encode("utf-8"), hashlib.sha256).hexdigest()[:16]
+
+    def issue(self, identity: Dict[str, Any], token_type: str = TOKEN_ACCESS) -> str:
+        """Issue a signed token for an authenticated identity"""
+        ttl = self.access_ttl if token_type == TOKEN_ACCESS else self.refresh_ttl
+        payload = {
+            "typ": token_type,
+            "sub": identity["username"],
+            "uid": identity["id"],
+            "adm": bool(identity.get("is_admin")),
+            "exp": int(time.time()) + ttl
+        }
+        if token_type == TOKEN_REFRESH:
+            payload["pwv"] = identity.get("pwv")
+        body = _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        return f"{body}.{self._sign(body)}"
+
+    def verify(self, token: Optional[str], token_type: str = TOKEN_ACCESS) -> Optional[Dict[str, Any]]:
+        """Return the payload of a valid, unexpired token of the given type"""
+        if not token or token.count(".") != 1:
+            return None
+        body, signature = token.split(".")
+        try:
+            if not hmac.compare_digest(signature, self._sign(body)):
+                return None
+            payload = json.loads(_b64decode(body))
+        except (ValueError, UnicodeError):
+            return None
+        if payload.get("typ") != token_type or payload.get("exp", 0) < time.time():
+            return None
+        return payload
+
+
+_signer = None
+_signer_lock = threading.Lock()
+
+
+def get_session_signer() -> SessionTokenSigner:
+    """Get the process-wide token signer"""
+    global _signer
+    if _signer is None:
+        with _signer_lock:
+            if _signer is None:
+                from settings import get_settings_manager
+                settings = get_settings_manager()
+                _signer = SessionTokenSigner(
+                    load_secret_key(),
+                    access_ttl=settings.get_setting("security", "access_token_ttl", 900),
+                    refresh_ttl=settings.get_setting("security", "refresh_token_ttl", 604800)
+                )
+    return _signer
@@ -59,7 +59,35 @@ class SettingsManager:
                 "max_login_attempts": 5,
                 "lockout_time": 30,
                 "require_password_change": False,
-                "password_expiry_days": 90
+                "password_expiry_days": 90,
+                "credential_cache_ttl": 300,
+                "credential_cache_size": 1024,
+                "access_token_ttl": 900,
+                "refresh_token_ttl": 604800
+            },
+            "jobs": {
+                "auto_resume_interrupted": True,
+                "startup_budget_seconds": 5,
+                "hashcat_binary": "hashcat",
+                "timeseries_samples": 720,
+                "benchmark_modes": ["0", "100", "1000", "1800", "3200"],
+                "benchmark_max_age_days": 30,
+                "max_estimated_runtime_hours": 0,
+                "queue_policy": "fifo",
+                "queue_aging_factor": 1.0,
+                "preemption": True,
+                "preempt_min_runtime_minutes": 5,
+                "time_slice_minutes": 0,
+                "coalesce_jobs": True,
+                "coalesce_max_jobs": 16,
+                "mask_chunk_minutes": 60,
+                "mask_max_chunks": 64,
+                "retention_interval_minutes": 10,
+                "output_compress_after_minutes": 10,
+                "outputs_max_mb": 0,
+                "retention_io_mb_per_second": 4,
+                "status_history_blocks": 120,
+                "output_max_lines": 2000
             }
         }
     
@@ -44,7 +44,10 @@ const HashcatUI = {
     statusColors: {
         'starting': 'text-blue-400',
         'running': 'text-blue-400 pulse',
+        'batched': 'text-blue-400 pulse',
         'completed': 'text-green-400',
+        'interrupted': 'text-yellow-400',
+        'paused': 'text-yellow-400',
         'failed': 'text-red-400',
         'error': 'text-red-400'
     },
@@ -61,48 +64,69 @@ const HashcatUI = {
         // Skip auth check on the login page and for static resources
         if (window.location.pathname === '/login') return;
         
-        // Check for auth token in session storage
-        const auth = sessionStorage.getItem('auth');
-        if (!auth) {
-            // Redirect to login page
+        // The session lives in HttpOnly cookies set by /api/auth/login, so
+        // requests carry it automatically. When the short-lived access token
+        // expires, renew it once from the refresh cookie and retry.
+        const originalFetch = window.fetch;
+        let refreshing = null;
+        const refreshSession = function() {
+            if (!refreshing) {
+                refreshing = originalFetch('/api/auth/refresh', { method: 'POST', credentials: 'same-origin' })
+                    .then(response => response.ok)
+                    .catch(() => false)
+                    .finally(() => { refreshing = null; });
+            }
+            return refreshing;
+        };
+        const redirectToLogin = function() {
             window.location.href = '/login';
-            return;
-        }
+        };
         
-        // Add Authorization header to all future fetch requests
-        const originalFetch = window.fetch;
         window.fetch = function(url, options = {}) {
-            // Don't add auth headers for static resources
-            if (url.toString().startsWith('/static/')) {
+            // Don't intercept static resources or the auth endpoints themselves
+            const path = url.toString();
+            if (path.startsWith('/static/') || path.startsWith('/api/auth/')) {
                 return originalFetch(url, options);
             }
             
             options = options || {};
-            options.headers = options.headers || {};
-            
-            // Only add Authorization if not already present
-            if (!options.headers['Authorization']) {
-                options.headers['Authorization'] = `Basic ${auth}`;
-            }
+            options.credentials = options.credentials || 'same-origin';
             
-            return originalFetch(url, options);
+            return originalFetch(url, options).then(response => {
+                if (response.status !== 401) return response;
+                return refreshSession().then(ok => {
+                    if (!ok) {
+                        redirectToLogin();
+                        return response;
+                    }
+                    return originalFetch(url, options);
+                });
+            });
         };
         
-        // Test if auth token is valid (use already patched fetch)
+        // Test if the session is valid (use already patched fetch)
         fetch('/api/jobs')
         .then(response => {
             if (!response.ok) {
                 // Auth failed, redirect to login
-                sessionStorage.removeItem('auth');
-                window.location.href = '/login';
+                redirectToLogin();
             }
         })
         .catch(() => {
             // Error, redirect to login
-            sessionStorage.removeItem('auth');
-            window.location.href = '/login';
+            redirectToLogin();
         });
         
+        // Renew the access token before it expires so page navigations keep working
+        const sessionTtl = parseInt(sessionStorage.getItem('session_ttl') || '900', 10);
+        setInterval(refreshSession, Math.max(60, sessionTtl - 60) * 1000);
+        
+        const logout = function(e) {
+            e.preventDefault();
+            originalFetch('/api/auth/logout', { method: 'POST', credentials: 'same-origin' })
+                .finally(redirectToLogin);
+        };
+        
         // Add logout button to navigation
         const nav = document.querySelector('nav');
         if (nav) {
@@ -115,22 +139,14 @@ const HashcatUI = {
                 </svg>
                 <span>Logout</span>
             `;
-            logoutLink.addEventListener('click', function(e) {
-                e.preventDefault();
-                sessionStorage.removeItem('auth');
-                window.location.href = '/login';
-            });
+            logoutLink.addEventListener('click', logout);
             nav.appendChild(logoutLink);
             
             // Also update mobile menu logout
             const mobileLogout = document.getElementById('mobile-logout');
             if (mobileLogout) {
                 mobileLogout.classList.remove('hidden');
-                mobileLogout.addEventListener('click', function(e) {
-                    e.preventDefault();
-                    sessionStorage.removeItem('auth');
-                    window.location.href = '/login';
-                });
+                mobileLogout.addEventListener('click', logout);
             }
         }
     },
@@ -0,0 +1,239 @@
+import os
+import json
+import uuid
+import time
+import hashlib
+import tempfile
+import threading
+import subprocess
+import queue
+from typing import Callable, Dict, List, Optional, Any
+from datetime import datetime
+
+from metrics import WORDLIST_WARM_SECONDS
+
+# Dictionary cache (dictstat) states tracked per wordlist
+DICTSTAT_COLD = "cold"
+DICTSTAT_WARMING = "warming"
+DICTSTAT_WARM = "warm"
+DICTSTAT_FAILED = "failed"
+
+
+class WordlistCatalog:
+    """
+    Catalog of uploaded wordlists with their metadata and dictionary cache state.
+
+    Hashcat builds a dictstat entry the first time it sees a wordlist, which can
+    take minutes on large lists. The catalog warms that cache in the background
+    right after upload, while the scheduler is idle, so the first real job
+    starts cracking immediately.
+    """
+    def __init__(self, base_dir: str, is_idle: Optional[Callable[[], bool]] = None,
+                 hashcat_bin: str = "hashcat"):
+        self.base_dir = base_dir
+        self.wordlist_dir = os.path.join(base_dir, "wordlists")
+        self.catalog_file = os.path.join(base_dir, "wordlists.json")
+        self.is_idle = is_idle or (lambda: True)
+        self.hashcat_bin = hashcat_bin
+        self.idle_poll_interval = 5
+        self.warm_runtime = 1  # seconds of real attack after the cache is built
+
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._warm_queue: "queue.Queue" = queue.Queue()
+        self._load_catalog()
+
+        # Catalog wordlists that were added before the catalog existed, and
+        # re-queue anything that never finished warming
+        self.sync()
+
+        threading.Thread(target=self._warm_loop, daemon=True).start()
+
+    def _load_catalog(self):
+        """Load the catalog from file"""
+        if os.path.exists(self.catalog_file):
+            try:
+                with open(self.catalog_file, "r") as f:
+                    self.entries = json.load(f)
+            except (json.JSONDecodeError, PermissionError) as e:
+                print(f"Warning: Error reading wordlist catalog: {str(e)}. Rebuilding it.")
+                self.entries = {}
+
+    def _save_catalog(self):
+        """Save the catalog to file"""
+        try:
+            with open(self.catalog_file, "w") as f:
+                json.dump(self.entries, f, indent=2)
+        except PermissionError:
+            print(f"Error: Permission denied writing to wordlist catalog: {self.catalog_file}")
+
+    def sync(self) -> None:
+        """Register new wordlists on disk, drop missing ones and queue cold ones for warming"""
+        if not os.path.isdir(self.wordlist_dir):
+            return
+        on_disk = set()
+        for filename in os.listdir(self.wordlist_dir):
+            path = os.path.join(self.wordlist_dir, filename)
+            if filename.startswith(".") or not os.path.isfile(path):
+                continue
+            on_disk.add(filename)
+            self.register(path, warm=False)
+
+        with self._lock:
+            for filename in list(self.entries):
+                if filename not in on_disk:
+                    del self.entries[filename]
+            cold = [name for name, entry in self.entries.items()
+                    if entry.get("dictstat") in (DICTSTAT_COLD, DICTSTAT_WARMING)]
+            self._save_catalog()
+
+        for filename in cold:
+            self.enqueue_warm(filename)
+
+    def register(self, path: str, warm: bool = True) -> Dict[str, Any]:
+        """Add or refresh a wordlist in the catalog, optionally queueing it for warming"""
+        filename = os.path.basename(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self.entries.get(filename)
+            # A changed file invalidates hashcat's dictstat entry for it
+            if not entry or entry.get("size") != stat.st_size or entry.get("mtime") != stat.st_mtime:
+                entry = {
+                    "filename": filename,
+                    "path": os.path.abspath(path),
+                    "size": stat.st_size,
+                    "mtime": stat.st_mtime,
+                    "line_count": None,
+                    "registered_at": datetime.now().isoformat(),
+                    "dictstat": DICTSTAT_COLD,
+                    "warmed_at": None,
+                    "warm_seconds": None,
+                    "error": None
+                }
+                self.entries[filename] = entry
+                self._save_catalog()
+            entry = dict(entry)
+
+        if warm and entry["dictstat"] == DICTSTAT_COLD:
+            self.enqueue_warm(filename)
+        return entry
+
+    def get(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Get a wordlist's catalog entry"""
+        with self._lock:
+            entry = self.entries.get(filename)
+            return dict(entry) if entry else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """List all catalogued wordlists"""
+        with self._lock:
+            return [dict(entry) for entry in self.entries.values()]
+
+    def remove(self, filename: str) -> None:
+        """Forget a wordlist"""
+        with self._lock:
+            if self.entries.pop(filename, None) is not None:
+                self._save_catalog()
+
+    def enqueue_warm(self, filename: str) -> None:
+        """Queue a wordlist for background dictionary cache warming"""
+        self._warm_queue.put(filename)
+
+    def _update(self, filename: str, **kwargs) -> None:
+        with self._lock:
+            if filename in self.entries:
+                self.entries[filename].update(kwargs)
+                self._save_catalog()
+
+    def _warm_loop(self) -> None:
+        """Warm queued wordlists one at a time, only while no jobs are running"""
+        while True:
+            filename = self._warm_queue.get()
+            entry = self.get(filename)
+            if not entry or entry.get("dictstat") == DICTSTAT_WARM:
+                continue
+
+            # Use idle scheduler capacity only
+            while not self.is_idle():
+                time.sleep(self.idle_poll_interval)
+
+            try:
+                self._warm(entry)
+            except Exception as e:
+                print(f"Error warming dictionary cache for {filename}: {str(e)}")
+                self._update(filename, dictstat=DICTSTAT_FAILED, error=str(e))
+
+    def _warm(self, entry: Dict[str, Any]) -> None:
+        """Build hashcat's dictstat entry for a wordlist with a short throwaway attack"""
+        filename = entry["filename"]
+        path = entry["path"]
+        if not os.path.exists(path):
+            self.remove(filename)
+            return
+
+        self._update(filename, dictstat=DICTSTAT_WARMING, error=None)
+        print(f"Warming dictionary cache for wordlist {filename}")
+        start = time.time()
+
+        line_count = count_lines(path)
+
+        # A random MD5 that will never crack gives hashcat something to attack
+        target = hashlib.md5(uuid.uuid4().bytes).hexdigest()
+        fd, hash_path = tempfile.mkstemp(prefix="dictwarm_", suffix=".hash")
+        with os.fdopen(fd, "w") as f:
+            f.write(target + "\n")
+
+        # Must match the cache location jobs use, or the warm entry is never hit
+        env = dict(os.environ)
+        env["XDG_CACHE_HOME"] = os.path.join(os.path.expanduser("~"), ".cache")
+        cmd = [
+            self.hashcat_bin, "-m", "0", "-a", "0",
+            f"--session=dictwarm_{uuid.uuid4().hex[:8]}",
+            "--restore-disable", "--potfile-disable", "--quiet",
+            f"--runtime={self.warm_runtime}",
+            "-o", os.devnull,
+            hash_path, path
+        ]
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    text=True, env=env, check=False)
+        finally:
+            try:
+                os.remove(hash_path)
+            except OSError:
+                pass
+
+        # 0 = cracked, 1 = exhausted, 4 = stopped by --runtime; all mean the cache was built
+        warmed = result.returncode in (0, 1, 4) or "Dictionary cache" in (result.stdout or "")
+        WORDLIST_WARM_SECONDS.labels("warm" if warmed else "failed").observe(time.time() - start)
+        if warmed:
+            self._update(
+                filename,
+                dictstat=DICTSTAT_WARM,
+                line_count=line_count,
+                warmed_at=datetime.now().isoformat(),
+                warm_seconds=round(time.time() - start, 2)
+            )
+            print(f"Dictionary cache warm for wordlist {filename}")
+        else:
+            output = (result.stdout or "").strip().splitlines()
+            error = output[-1] if output else f"hashcat exited with code {result.returncode}"
+            self._update(filename, dictstat=DICTSTAT_FAILED, line_count=line_count, error=error)
+            print(f"Failed to warm dictionary cache for {filename}: {error}")
+
+
+def count_lines(path: str, chunk_size: int = 1024 * 1024) -> int:
+    """Count the lines of a file without loading it into memory"""
+    count = 0
+    last = b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            count += chunk.count(b"\n")
+            last = chunk
+    # A final line without a trailing newline still counts
+    if last and not last.endswith(b"\n"):
+        count += 1
+    return count